@@ -10,11 +10,34 @@ from datetime import datetime
 import re
 import threading
 import time
+import asyncio
+import queue
+import logging
 from collections import deque
-import gc
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 
 # Import the new file operations module
 from .file_operations import get_file_operations_manager
+from .connection_pool import get_connection_pool, CancelToken, RequestCancelled, abort_response
+from .streaming import get_stream_request, is_event_stream, iter_sse_events, extract_stream_delta, uses_gemini_api
+from .async_client import AsyncHTTPClient
+from .hedging import HedgingPolicy, find_hedge_model
+from .provider_health import (ProviderHealthTracker, ProviderError, check_provider_response, is_retryable,
+                              backoff_delay, classify_error)
+from .summarize_pipeline import SummarizePipeline
+from .single_flight import SingleFlight, request_key
+from .context_builder import ContextBuilder, estimate_tokens, make_message, MESSAGE_OVERHEAD
+from .response_schema import ResponseSchemaCache
+from .mock_provider import get_mock_provider, get_mock_models
+from .rate_scheduler import RateLimitScheduler, SchedulerBusy, VOICE, INTERACTIVE, BACKGROUND
+from .connection_warmer import get_connection_warmer
+from .telemetry import TelemetryRecorder, extract_usage
+from .lru_cache import LRUCache, response_cache_ttl
+from .history_journal import HistoryJournal
+from .conversation_store import create_conversation_store
+from .message import Message
+from .persistence import get_persistence_worker
+from .memory_governor import get_memory_governor, sizeof_messages, sizeof_message, PRIORITY_HISTORY
 
 # Load environment variables from .env file
 try:
@@ -26,6 +49,11 @@ except ImportError:
 except Exception as e:
     print(f"⚠️ Error loading .env file: {e}")
 
+logger = logging.getLogger(__name__)
+
+# Returned by chat() when the cancel token stopped the request before anything was committed
+CANCELLED_RESPONSE = "Error: Request cancelled."
+
 # 🔥 PERFORMANCE BEAST MODE - Memory Optimization System
 class MemoryOptimizer:
     """
@@ -37,15 +65,14 @@ class MemoryOptimizer:
     """
     def __init__(self, max_conversation_size=800, cache_size=300, aggressive_mode=False):
         self.max_conversation_size = max_conversation_size
-        self.response_cache = {}
         self.cache_size = cache_size
+        self.response_cache = LRUCache(cache_size, ttl=response_cache_ttl())
         self.memory_cleanup_interval = 50  # Clean every 50 interactions
         self.interaction_count = 0
         self.conversation_chunks = deque(maxlen=10)  # Keep last 10 chunks
         self.aggressive_mode = aggressive_mode  # Ultra performance mode
-        self.last_full_gc_time = time.time()
-        self.gc_full_interval = 300  # Full GC every 5 minutes
         self.memory_warning_threshold = 85  # Percentage
+        self.governor = get_memory_governor()  # byte budget + pressure-driven GC
         
     def optimize_conversation_history(self, conversation_history):
         """Smart conversation chunking for memory efficiency"""
@@ -63,74 +90,40 @@ class MemoryOptimizer:
         return recent_conversations
     
     def cache_response(self, query_hash, response):
-        """Cache responses for instant retrieval"""
-        if len(self.response_cache) >= self.cache_size:
-            # Remove oldest cached response
-            oldest_key = next(iter(self.response_cache))
-            del self.response_cache[oldest_key]
-            
-        self.response_cache[query_hash] = {
-            'response': response,
-            'timestamp': time.time(),
-            'access_count': 1
-        }
+        """Cache responses for instant retrieval (least recently used evicted when full)"""
+        self.response_cache.put(query_hash, response)
     
     def get_cached_response(self, query_hash):
-        """Get cached response if available"""
-        if query_hash in self.response_cache:
-            cache_entry = self.response_cache[query_hash]
-            cache_entry['access_count'] += 1
-            cache_entry['last_accessed'] = time.time()
-            return cache_entry['response']
-        return None
+        """Get cached response if available and not expired"""
+        return self.response_cache.get(query_hash)
+    
+    def get_cache_stats(self):
+        """Get response cache size and hit/miss/eviction counters"""
+        return self.response_cache.get_stats()
         
     def cleanup_memory(self):
         """Aggressive memory cleanup for low-RAM systems"""
         self.interaction_count += 1
-        current_time = time.time()
         
         # Standard cleanup interval
         if self.interaction_count % self.memory_cleanup_interval == 0:
-            # Force garbage collection (generation 0 only for speed)
-            gc.collect(0)
+            # Drop expired cache entries (bounded walk of the expiry queue)
+            expired_removed = self.response_cache.prune()
             
-            # Clean old cache entries
-            expired_keys = []
-            
-            for key, cache_entry in self.response_cache.items():
-                # Remove entries older than 1 hour with low access count
-                if (current_time - cache_entry['timestamp'] > 3600 and 
-                    cache_entry['access_count'] < 3):
-                    expired_keys.append(key)
-            
-            # Actually remove the expired keys
-            for key in expired_keys:
-                del self.response_cache[key]
-                
-            # Check if full garbage collection is needed
-            if current_time - self.last_full_gc_time > self.gc_full_interval:
-                # Full system garbage collection (all generations)
-                gc.collect(2)
-                self.last_full_gc_time = current_time
+            # Evict/collect only if the byte budget is under pressure (off the caller's thread)
+            get_persistence_worker().schedule(self.governor.enforce)
                 
         # Aggressive mode for extremely low memory systems
         if self.aggressive_mode:
             # More aggressive cache pruning
             if len(self.response_cache) > self.cache_size * 0.8:  # 80% full
-                # Sort by access count and remove least used 20%
-                sorted_cache = sorted(
-                    self.response_cache.items(),
-                    key=lambda x: x[1]['access_count']
-                )                # Remove bottom 20%
-                items_to_remove = int(len(sorted_cache) * 0.2)
-                for i in range(items_to_remove):
-                    if i < len(sorted_cache):
-                        del self.response_cache[sorted_cache[i][0]]
+                # Evict the least recently used 20%
+                self.response_cache.shrink(0.2)
                         
         # Return stats about memory cleanup
         return {
             "cache_size": len(self.response_cache),
-            "expired_keys_removed": len(expired_keys) if 'expired_keys' in locals() else 0,
+            "expired_keys_removed": expired_removed if 'expired_removed' in locals() else 0,
             "aggressive_mode": self.aggressive_mode
         }
     
@@ -145,6 +138,7 @@ class MemoryOptimizer:
             return {
                 "ram_usage_mb": memory_info.rss / 1024 / 1024,
                 "cache_size": len(self.response_cache),
+                "cache": self.response_cache.get_stats(),
                 "conversation_chunks": len(self.conversation_chunks)
             }
         except ImportError:
@@ -152,6 +146,7 @@ class MemoryOptimizer:
             return {
                 "ram_usage": "psutil not installed - run 'pip install psutil'",
                 "cache_size": len(self.response_cache),
+                "cache": self.response_cache.get_stats(),
                 "conversation_chunks": len(self.conversation_chunks)
             }
 
@@ -175,9 +170,23 @@ class JarvisAI:
         # Load user preferences from file if available
         self._load_user_preferences()
         
-        # Conversation history
+        # Conversation history - persisted as an append-only journal
         self.conversation_history = []
+        self.history_journal = HistoryJournal(
+            os.path.join("memory", "conversation_history.jsonl"),
+            legacy_path=os.path.join("memory", "conversation_history.json")
+        )
+        self._journal_tail = None  # last message already in the journal
+        # Only the recent tail is loaded; older messages are streamed from the journal on demand (0 = load all)
+        self.history_tail_messages = int(os.environ.get("HISTORY_TAIL_MESSAGES", "200"))
+        self.persistence = get_persistence_worker()  # debounced write-behind saves
         self._load_conversation_history()
+        
+        # FTS5 search index mirroring the journal (None = simple substring search)
+        self.conversation_store = create_conversation_store()
+        if self.conversation_store and self.conversation_history and not self.conversation_store.count():
+            # First run with the index - existing messages get an unknown date
+            self._backfill_conversation_store()
           # Default settings - R1 model set directly in code
         self.current_model = "DeepSeek R1 Distill Qwen 32B (OpenRouter)"  # Best R1 model for JARVIS
         self.personality_mode = os.environ.get("DEFAULT_PERSONALITY", "standard")
@@ -196,9 +205,58 @@ class JarvisAI:
         # File operations manager
         self.file_ops = get_file_operations_manager()
         
+        # Keep-alive HTTP pools shared by all outbound calls
+        self.http = get_connection_pool()
+        self.async_http = AsyncHTTPClient(self.http)
+        
+        # Pre-warms the active model's endpoint and keeps it alive while idle
+        self.warmer = get_connection_warmer(self.http)
+        
+        # Hedged requests - opt-in tail-latency control across providers
+        self.hedging_enabled = os.environ.get("HEDGED_REQUESTS", "false").lower() == "true"
+        self.hedging = HedgingPolicy()
+        self._hedge_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="jarvis-hedge")
+        
+        # Circuit breakers per provider/model with failover along a fallback chain
+        self.health = ProviderHealthTracker()
+        
+        # Rate-limit scheduler with voice > interactive > background lanes
+        self.scheduler = RateLimitScheduler()
+        
+        # Rolling per-model latency, throughput and token telemetry
+        self.telemetry = TelemetryRecorder(path=os.path.join("memory", "model_telemetry.json"))
+        
+        # Token-budgeted context window for every chat request
+        self.context_builder = ContextBuilder()
+        self.last_context_stats = None
+        
+        # Learned reply-text paths for providers with unknown response formats
+        self.response_schemas = ResponseSchemaCache()
+        
+        # Coalesces identical in-flight chat requests into one provider call
+        self.single_flight = SingleFlight()
+        
+        # Cancel tokens of generations in progress - cancel_current() aborts them
+        self._active_tokens = set()
+        self._active_lock = threading.Lock()
+        
+        # Bounded fetch -> summarize pipeline for web research
+        self.summarize_pipeline = SummarizePipeline(self.fetch_web_content)
+        
         # Beast Mode - Load from environment
         self.beast_mode_enabled = os.environ.get("BEAST_MODE_ENABLED", "false").lower() == "true"
         self._integrator = None
+        
+        # Global byte budget - history is the last pool evicted
+        self.governor = get_memory_governor()
+        self.min_history_messages = int(os.environ.get("MIN_HISTORY_MESSAGES", "20"))
+        self.governor.register(
+            "conversation_history",
+            lambda: sizeof_messages(self.conversation_history),
+            self._evict_history,
+            PRIORITY_HISTORY,
+            owner=self
+        )
           # Available AI models
         self.available_models = {
             # R1 Models (Latest DeepSeek Reasoning Models)
@@ -388,16 +446,40 @@ class JarvisAI:
             ]
         }
         
+        # Local mock provider for offline benchmarking (MOCK_PROVIDER=true)
+        if os.environ.get("MOCK_PROVIDER", "false").lower() == "true":
+            mock_url = os.environ.get("MOCK_PROVIDER_URL") or get_mock_provider().base_url
+            self.available_models.update(get_mock_models(mock_url.rstrip("/")))
+            if not self._get_api_key_for_model(self.current_model):
+                self.current_model = "Mock GPT (Local)"
+            print(f"🧪 Mock provider enabled at {mock_url}")
+        
         # Enhanced greeting and response system
         self.session_started = False
         self.last_interaction = None
+        self.last_stream_stats = None
+        
+        # Open the connection to the active model before the first message
+        self._warm_model(self.current_model)
         
+        # Start-up objects never become garbage - keep them out of every later collection
+        if os.environ.get("GC_FREEZE", "true").lower() == "true":
+            self.governor.freeze()
+    
     def switch_model(self, model_name):
         """Switch to a different AI model"""
         if model_name in self.available_models:
+            if model_name != self.current_model:
+                self._warm_model(model_name)
             self.current_model = model_name
             return True
         return False
+    
+    def _warm_model(self, model_name):
+        """Pre-warm the connection to a model's endpoint in the background"""
+        model_config = self.available_models.get(model_name)
+        if model_config and self._get_api_key_for_model(model_name):
+            self.warmer.warm(model_config["provider"], model_config["endpoint"])
         
     def get_current_model(self):
         """Get the current active model"""
@@ -510,40 +592,771 @@ class JarvisAI:
         # Default to current if no strong signal
         return self.personality_mode
         
-    def chat(self, message, system_prompt=None):
+    def chat(self, message, system_prompt=None, cancel_token=None):
         """
         Send a message to the AI and get a response
         
         Args:
             message: The user message to process
             system_prompt: Optional override for system prompt
+            cancel_token: Optional CancelToken - cancel_current() also aborts the call
+            
+        Returns:
+            str: AI response
+        """
+        self._apply_auto_personality(message)
+        
+        request = self._prepare_chat_request(message, system_prompt)
+        if isinstance(request, str):
+            return request
+        
+        model_config = request["model_config"]
+        cancel_token = self._track_token(cancel_token)
+        
+        def send():
+            if self.hedging_enabled:
+                return self._hedged_request(message, system_prompt, request, cancel_token)
+            return self._send_with_failover(
+                request, lambda model_name: self._prepare_chat_request(message, system_prompt, model_name=model_name),
+                cancel_token=cancel_token
+            )
+        
+        try:
+            # Identical requests already in flight (GUI retry, repeated voice command) share one call
+            assistant_response, shared = self.single_flight.do(request_key(request), send)
+            if not assistant_response:
+                return f"Error: Unable to parse response from {model_config['provider']}."
+            
+            # The leader records the turn - a coalesced duplicate must not add it twice
+            if not shared:
+                self._commit_turn(message, assistant_response)
+            
+            return assistant_response
+            
+        except RequestCancelled:
+            # Nothing was committed - history still ends at the previous turn
+            return CANCELLED_RESPONSE
+        except SchedulerBusy as e:
+            return f"Error: AI service busy - {str(e)}. Try again in {e.retry_after or 1}s."
+        except requests.exceptions.RequestException as e:
+            return f"Error connecting to AI service: {str(e)}"
+        except Exception as e:
+            return f"Error: {str(e)}"
+        finally:
+            self._untrack_token(cancel_token)
+    
+    def _track_token(self, cancel_token=None):
+        """Register a generation's cancel token (creating one if needed)"""
+        cancel_token = cancel_token or CancelToken()
+        with self._active_lock:
+            self._active_tokens.add(cancel_token)
+        return cancel_token
+    
+    def _untrack_token(self, cancel_token):
+        with self._active_lock:
+            self._active_tokens.discard(cancel_token)
+    
+    def cancel_current(self):
+        """
+        Abort every generation in progress (Ctrl-C / GUI Stop)
+        
+        The live connections are closed and no turn is added to history.
+        
+        Returns:
+            int: Number of generations cancelled
+        """
+        with self._active_lock:
+            tokens = list(self._active_tokens)
+        for token in tokens:
+            token.cancel()
+        return len(tokens)
+    
+    async def achat(self, message, system_prompt=None, timeout=60):
+        """
+        Async version of chat() for event-loop callers (voice engines, LiveKit)
+        
+        Awaits the provider call without blocking the loop and shares
+        history, personality switching and response parsing with chat().
+        Cancelling the awaiting task abandons the request and leaves history
+        untouched.
+        
+        Args:
+            message: The user message to process
+            system_prompt: Optional override for system prompt
+            timeout: Seconds to wait for the provider before giving up
             
         Returns:
             str: AI response
         """
-        # Auto-detect personality if enabled
+        self._apply_auto_personality(message)
+        
+        # Voice turns have no time for retries - go straight to a healthy model
+        request = self._prepare_chat_request(message, system_prompt, model_name=self._select_healthy_model(),
+                                             priority=VOICE)
+        if isinstance(request, str):
+            return request
+        
+        model_config = request["model_config"]
+        provider = model_config["provider"]
+        
+        async def send():
+            request["queue_time"] = await self.scheduler.acquire_async(self._rate_limit_key(request), VOICE, provider)
+            warm_probe = self.warmer.begin_request(provider, request["endpoint"])
+            start_time = self._mark_sent(request)
+            try:
+                response_json = await self.async_http.post_json(
+                    provider, request["endpoint"], request["payload"], request["headers"], timeout=timeout,
+                    check_response=lambda response: self._check_response(request, response)
+                )
+                
+                assistant_response = self._parse_response_json(response_json, model_config)
+                if not assistant_response:
+                    raise ValueError(f"Unable to parse response from {provider}.")
+            except asyncio.TimeoutError:
+                self.health.record_failure(request["model_name"], provider, "timeout", time.time() - start_time)
+                self._record_telemetry(request, start_time, error="timeout")
+                raise
+            except Exception as e:
+                self.health.record_failure(request["model_name"], provider, e, time.time() - start_time)
+                self._record_telemetry(request, start_time, error=e)
+                raise
+            
+            self.health.record_success(request["model_name"], provider, time.time() - start_time)
+            self.warmer.end_request(warm_probe, time.time() - start_time)
+            self._record_telemetry(request, start_time, response_json, assistant_response)
+            return assistant_response
+        
+        try:
+            assistant_response, shared = await self.single_flight.do_async(request_key(request), send)
+            
+            if not shared:
+                self._commit_turn(message, assistant_response)
+            
+            return assistant_response
+        
+        except asyncio.TimeoutError:
+            return f"Error connecting to AI service: no response within {timeout}s"
+        except SchedulerBusy as e:
+            return f"Error: AI service busy - {str(e)}. Try again in {e.retry_after or 1}s."
+        except requests.exceptions.RequestException as e:
+            return f"Error connecting to AI service: {str(e)}"
+        except Exception as e:
+            return f"Error: {str(e)}"
+    
+    def chat_stream(self, message, system_prompt=None, cancel_token=None):
+        """
+        Send a message to the AI and yield the response as it is generated
+        
+        Uses the providers' SSE endpoints (OpenAI-compatible "stream": true,
+        Gemini streamGenerateContent). History is committed once the stream
+        completes, exactly like chat(); a cancelled stream just stops and
+        commits nothing.
+        
+        Args:
+            message: The user message to process
+            system_prompt: Optional override for system prompt
+            cancel_token: Optional CancelToken - cancel_current() also aborts the stream
+            
+        Yields:
+            str: Response text deltas (or a single error message)
+        """
+        self._apply_auto_personality(message)
+        
+        request = self._prepare_chat_request(message, system_prompt)
+        if isinstance(request, str):
+            yield request
+            return
+        
+        provider = request["model_config"]["provider"]
+        start_time = time.time()
+        first_token_time = None
+        chunks = []
+        cancel_token = self._track_token(cancel_token)
+        
+        if self.hedging_enabled:
+            deltas = self._hedged_stream(message, system_prompt, request, cancel_token)
+        else:
+            deltas = self._stream_with_failover(
+                request, lambda model_name: self._prepare_chat_request(message, system_prompt, model_name=model_name),
+                cancel_token=cancel_token
+            )
+        
+        try:
+            for delta in deltas:
+                if first_token_time is None:
+                    first_token_time = time.time()
+                chunks.append(delta)
+                yield delta
+        except RequestCancelled:
+            return
+        except requests.exceptions.RequestException as e:
+            yield f"Error connecting to AI service: {str(e)}"
+            return
+        except Exception as e:
+            yield f"Error: {str(e)}"
+            return
+        finally:
+            self._untrack_token(cancel_token)
+        
+        assistant_response = "".join(chunks)
+        self.last_stream_stats = {
+            "model": self.current_model,
+            "time_to_first_token": round(first_token_time - start_time, 3) if first_token_time else None,
+            "total_time": round(time.time() - start_time, 3),
+            "chunks": len(chunks)
+        }
+        
+        if not assistant_response:
+            yield f"Error: Empty response from {provider}."
+            return
+        
+        self._commit_turn(message, assistant_response)
+    
+    def _iter_stream_deltas(self, request, cancel_token=None):
+        """
+        Open a streaming request and yield its text deltas
+        
+        Args:
+            request: Request spec from _prepare_chat_request
+            cancel_token: Optional CancelToken - closes the stream when cancelled
+            
+        Yields:
+            str: Non-empty text deltas
+            
+        Raises:
+            RequestCancelled: If the token was cancelled mid-stream
+        """
+        model_config = request["model_config"]
+        provider = model_config["provider"]
+        endpoint, payload = get_stream_request(model_config, request["endpoint"], request["payload"])
+        cancel_token = cancel_token or CancelToken()
+        
+        if cancel_token.is_cancelled():
+            raise RequestCancelled("Stream cancelled before sending")
+        
+        try:
+            request["queue_time"] = self.scheduler.acquire(self._rate_limit_key(request), request.get("priority"), provider)
+        except SchedulerBusy:
+            self.health.release(request["model_name"], provider)
+            raise
+        warm_probe = self.warmer.begin_request(provider, endpoint)
+        start_time = self._mark_sent(request)
+        first_token_latency = None
+        streamed = []
+        
+        try:
+            with self.http.open_cancellable(provider, "POST", endpoint, cancel_token, json=payload,
+                                            headers=request["headers"], timeout=60) as response:
+                self._check_response(request, response)
+                abort = lambda: abort_response(response)
+                cancel_token.add_callback(abort)
+                try:
+                    if is_event_stream(response):
+                        deltas = (extract_stream_delta(event, provider) for event in iter_sse_events(response))
+                    else:
+                        # Provider ignored the stream flag - fall back to the full JSON body
+                        deltas = [self._parse_response_json(response.json(), model_config)]
+                    
+                    for delta in deltas:
+                        if cancel_token.is_cancelled():
+                            break
+                        if delta:
+                            if first_token_latency is None:
+                                first_token_latency = time.time() - start_time
+                                self.warmer.end_request(warm_probe, first_token_latency)
+                            streamed.append(delta)
+                            yield delta
+                except (requests.exceptions.RequestException, OSError):
+                    if not cancel_token.is_cancelled():
+                        raise
+                finally:
+                    cancel_token.remove_callback(abort)
+        except RequestCancelled:
+            self.health.release(request["model_name"], provider)
+            raise
+        except Exception as e:
+            self.health.record_failure(request["model_name"], provider, e, time.time() - start_time)
+            self._record_telemetry(request, start_time, error=e, streamed=True)
+            raise
+        
+        if cancel_token.is_cancelled():
+            self.health.release(request["model_name"], provider)
+            raise RequestCancelled("Stream cancelled")
+        
+        # Time-to-first-token is the latency signal for streams
+        self.health.record_success(request["model_name"], provider,
+                                   first_token_latency if first_token_latency is not None else time.time() - start_time)
+        self._record_telemetry(request, start_time, text="".join(streamed), streamed=True)
+    
+    def _hedged_request(self, message, system_prompt, request, cancel_token=None):
+        """
+        Send a chat request with a delayed hedge to an equivalent model
+        
+        If the primary has not answered within the policy's percentile-based
+        delay, the same conversation is sent to an equivalent model on a
+        different provider. Each attempt goes through _send_with_failover, so
+        circuit breakers, retries and the fallback chain still apply to both.
+        The first successful answer wins and the loser's connection is
+        closed. Cancelling cancel_token closes both.
+        
+        Returns:
+            str: Assistant response from the winning attempt
+            
+        Raises:
+            Exception: The last error if every attempt failed
+        """
+        primary_model = request["model_name"]
+        hedge_model = find_hedge_model(primary_model, self.available_models,
+                                       self._is_model_usable, self.hedging.preferred_model)
+        cancel_tokens = {"primary": CancelToken(), "hedge": CancelToken()}
+        cancel_all = lambda: [token.cancel() for token in cancel_tokens.values()]
+        if cancel_token is not None:
+            cancel_token.add_callback(cancel_all)
+        start_time = time.time()
+        build_request = lambda model_name: self._prepare_chat_request(message, system_prompt, model_name=model_name)
+        
+        def attempt(role, attempt_request):
+            assistant_response = self._send_with_failover(attempt_request, build_request,
+                                                          cancel_token=cancel_tokens[role])
+            if role == "primary":
+                self.hedging.record_latency(primary_model, time.time() - start_time)
+            return assistant_response
+        
+        try:
+            futures = {self._hedge_executor.submit(attempt, "primary", request): "primary"}
+            done, pending = wait(list(futures), timeout=self.hedging.get_delay(primary_model))
+            
+            hedged = False
+            if not done and hedge_model and not cancel_tokens["primary"].is_cancelled():
+                hedge_request = self._prepare_chat_request(message, system_prompt, model_name=hedge_model)
+                if isinstance(hedge_request, dict):
+                    futures[self._hedge_executor.submit(attempt, "hedge", hedge_request)] = "hedge"
+                    hedged = True
+            
+            pending = set(futures)
+            last_error = None
+            while pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    try:
+                        assistant_response = future.result()
+                    except Exception as e:
+                        last_error = e
+                        continue
+                    if not assistant_response:
+                        continue
+                    
+                    winner = futures[future]
+                    for role, token in cancel_tokens.items():
+                        if role != winner:
+                            token.cancel()
+                    if winner == "hedge":
+                        # Censored sample keeps the primary's tail visible to the policy
+                        self.hedging.record_latency(primary_model, time.time() - start_time)
+                        print(f"⚡ Hedge won: {hedge_model} answered before {primary_model}")
+                    self.hedging.record_outcome(hedged, winner)
+                    return assistant_response
+            
+            self.hedging.record_outcome(hedged, None)
+            if cancel_token is not None and cancel_token.is_cancelled():
+                raise RequestCancelled("Request cancelled")
+            if last_error:
+                raise last_error
+            return None
+        finally:
+            if cancel_token is not None:
+                cancel_token.remove_callback(cancel_all)
+    
+    def _hedged_stream(self, message, system_prompt, request, cancel_token=None):
+        """
+        Streaming variant of _hedged_request, hedging on time-to-first-token
+        (each attempt streams through _stream_with_failover)
+        
+        Yields:
+            str: Text deltas from whichever attempt produced a token first
+        """
+        primary_model = request["model_name"]
+        hedge_model = find_hedge_model(primary_model, self.available_models,
+                                       self._is_model_usable, self.hedging.preferred_model)
+        cancel_tokens = {"primary": CancelToken(), "hedge": CancelToken()}
+        cancel_all = lambda: [token.cancel() for token in cancel_tokens.values()]
+        events = queue.Queue()
+        start_time = time.time()
+        build_request = lambda model_name: self._prepare_chat_request(message, system_prompt, model_name=model_name)
+        
+        def attempt(role, attempt_request):
+            try:
+                for delta in self._stream_with_failover(attempt_request, build_request, cancel_tokens[role]):
+                    events.put((role, "delta", delta))
+                events.put((role, "done", None))
+            except RequestCancelled:
+                events.put((role, "cancelled", None))
+            except Exception as e:
+                events.put((role, "error", e))
+        
+        if cancel_token is not None:
+            cancel_token.add_callback(cancel_all)
+        
+        try:
+            self._hedge_executor.submit(attempt, "primary", request)
+            running = {"primary"}
+            hedge_deadline = start_time + self.hedging.get_delay(primary_model)
+            hedged = False
+            winner = None
+            last_error = None
+            
+            while running:
+                timeout = None
+                if not hedged and winner is None and hedge_model:
+                    timeout = max(hedge_deadline - time.time(), 0)
+                try:
+                    role, kind, value = events.get(timeout=timeout)
+                except queue.Empty:
+                    hedge_request = self._prepare_chat_request(message, system_prompt, model_name=hedge_model)
+                    hedged = True
+                    if isinstance(hedge_request, dict):
+                        self._hedge_executor.submit(attempt, "hedge", hedge_request)
+                        running.add("hedge")
+                    continue
+                
+                if winner is not None and role != winner:
+                    if kind != "delta":
+                        running.discard(role)
+                    continue
+                
+                if kind == "delta":
+                    if winner is None:
+                        winner = role
+                        for other, token in cancel_tokens.items():
+                            if other != winner:
+                                token.cancel()
+                        # Time-to-first-token of the primary (censored when the hedge won)
+                        self.hedging.record_latency(primary_model, time.time() - start_time)
+                        if role == "hedge":
+                            print(f"\n⚡ Hedge won: {hedge_model} streamed before {primary_model}")
+                    yield value
+                elif kind == "done":
+                    running.discard(role)
+                    if role == winner:
+                        self.hedging.record_outcome(hedged, winner)
+                        return
+                else:
+                    running.discard(role)
+                    if kind == "error":
+                        last_error = value
+                        if role == winner:
+                            self.hedging.record_outcome(hedged, None)
+                            raise value
+            
+            self.hedging.record_outcome(hedged, winner)
+            if last_error:
+                raise last_error
+        finally:
+            # Consumer stopped early or the race is over - close any attempt still streaming
+            cancel_all()
+            if cancel_token is not None:
+                cancel_token.remove_callback(cancel_all)
+        
+        if cancel_token is not None and cancel_token.is_cancelled():
+            raise RequestCancelled("Stream cancelled")
+    
+    def _send_request(self, request, cancel_token=None, timeout=60):
+        """
+        Send one provider request and record the outcome with the circuit breakers
+        
+        Args:
+            request: Request spec from _prepare_chat_request
+            cancel_token: Optional CancelToken - closes the connection when cancelled
+            timeout: Provider timeout in seconds
+        
+        Returns:
+            str: Assistant response text
+        
+        Raises:
+            ProviderError: On HTTP error statuses
+            RequestCancelled: If the token was cancelled (not counted as a failure)
+            SchedulerBusy: If the rate-limit queue pushed back (not counted as a failure)
+        """
+        model_config = request["model_config"]
+        provider = model_config["provider"]
+        
+        # Queue for a rate-limit slot first - SchedulerBusy is backpressure, not a provider failure
+        try:
+            request["queue_time"] = self.scheduler.acquire(self._rate_limit_key(request), request.get("priority"), provider)
+        except SchedulerBusy:
+            self.health.release(request["model_name"], provider)
+            raise
+        warm_probe = self.warmer.begin_request(provider, request["endpoint"])
+        start_time = self._mark_sent(request)
+        
+        try:
+            if cancel_token is None:
+                response = self.http.post(provider, request["endpoint"], json=request["payload"],
+                                          headers=request["headers"], timeout=timeout)
+                self._check_response(request, response)
+                response_json = response.json()
+            else:
+                response_json = self.http.post_json_cancellable(
+                    provider, request["endpoint"], cancel_token,
+                    check_response=lambda response: self._check_response(request, response),
+                    json=request["payload"], headers=request["headers"], timeout=timeout
+                )
+            
+            assistant_response = self._parse_response_json(response_json, model_config)
+            if not assistant_response:
+                raise ValueError(f"Unable to parse response from {provider}.")
+        except RequestCancelled:
+            self.health.release(request["model_name"], provider)
+            raise
+        except Exception as e:
+            self.health.record_failure(request["model_name"], provider, e, time.time() - start_time)
+            self._record_telemetry(request, start_time, error=e)
+            raise
+        
+        self.health.record_success(request["model_name"], provider, time.time() - start_time)
+        self.warmer.end_request(warm_probe, time.time() - start_time)
+        self._record_telemetry(request, start_time, response_json, assistant_response)
+        return assistant_response
+    
+    def _mark_sent(self, request):
+        """Stamp the send time on a request attempt - returns it as start_time"""
+        request["sent_at"] = time.time()
+        request["ttfb"] = None
+        return request["sent_at"]
+    
+    def _record_telemetry(self, request, start_time, response_json=None, text=None, error=None, streamed=False):
+        """Record one provider call, preferring the provider's usage block over local token estimates"""
+        prompt_tokens, completion_tokens = extract_usage(response_json)
+        estimated = False
+        if error is None:
+            if prompt_tokens is None:
+                prompt_tokens = request.get("prompt_tokens")
+                estimated = True
+            if completion_tokens is None and text:
+                completion_tokens = estimate_tokens(text)
+                estimated = True
+        
+        self.telemetry.record(
+            request["model_name"], request["model_config"]["provider"], time.time() - start_time,
+            ttfb=request.get("ttfb"), prompt_tokens=prompt_tokens, completion_tokens=completion_tokens,
+            error=classify_error(error) if isinstance(error, BaseException) else error,
+            estimated=estimated, streamed=streamed
+        )
+    
+    def _rate_limit_key(self, request):
+        """
+        Scheduler bucket for a request
+        
+        Providers limit requests per account, so every model of a provider
+        shares one bucket. A model entry with "rate_limit_bucket" (e.g. its
+        own name, for providers that limit each model separately) gets a
+        bucket of its own.
+        """
+        model_config = request["model_config"]
+        return model_config.get("rate_limit_bucket") or model_config["provider"]
+    
+    def _check_response(self, request, response):
+        """Feed rate-limit headers to the scheduler, then raise on HTTP error statuses"""
+        provider = request["model_config"]["provider"]
+        if request.get("sent_at") is not None:
+            request["ttfb"] = time.time() - request["sent_at"]
+        self.scheduler.observe(self._rate_limit_key(request), response.headers, response.status_code, provider)
+        check_provider_response(response, provider)
+    
+    def _send_with_failover(self, request, build_request, timeout=60, cancel_token=None):
+        """
+        Send a request, retrying transient errors and failing over along the fallback chain
+        
+        Models whose circuit breaker is open are skipped. Rate limits, 5xx and
+        timeouts are retried on the same model with jittered backoff before
+        moving on; any other error fails over straight away. SchedulerBusy is
+        local backpressure, not a model failure, so it ends the chain and
+        reaches the caller with its retry_after.
+        
+        Args:
+            request: Request spec for the primary model
+            build_request: Callable(model_name) -> request spec (or str error) for fallbacks
+            timeout: Provider timeout in seconds
+            cancel_token: Optional CancelToken - stops retries and failover when cancelled
+        
+        Returns:
+            str: Assistant response text
+        
+        Raises:
+            RequestCancelled: If cancel_token was cancelled
+            SchedulerBusy: If the rate-limit queue pushed back
+            Exception: The last error if every model in the chain failed
+        """
+        primary_model = request["model_name"]
+        last_error = None
+        
+        for model_name in self._get_fallback_chain(primary_model):
+            attempt_request = request if model_name == primary_model else build_request(model_name)
+            if isinstance(attempt_request, str):
+                continue
+            provider = attempt_request["model_config"]["provider"]
+            
+            for attempt in range(self.health.max_retries + 1):
+                if not self.health.allow_request(model_name, provider):
+                    break
+                try:
+                    assistant_response = self._send_request(attempt_request, cancel_token, timeout=timeout)
+                except (RequestCancelled, SchedulerBusy):
+                    raise
+                except Exception as e:
+                    last_error = e
+                    if not is_retryable(e) or attempt == self.health.max_retries:
+                        break
+                    if self._backoff(attempt, e, cancel_token):
+                        raise RequestCancelled("Request cancelled during retry backoff")
+                    continue
+                
+                if model_name != primary_model:
+                    self.health.failovers += 1
+                    print(f"🔀 Failover: {model_name} answered for {primary_model}")
+                return assistant_response
+        
+        if last_error:
+            raise last_error
+        raise ProviderError("All models in the fallback chain are unavailable (circuit open).")
+    
+    def _stream_with_failover(self, request, build_request, cancel_token=None):
+        """
+        Streaming variant of _send_with_failover
+        
+        Failover only happens before the first token - once text has been
+        yielded a failure is raised to the caller.
+        
+        Yields:
+            str: Text deltas from the first model that starts streaming
+        """
+        primary_model = request["model_name"]
+        last_error = None
+        
+        for model_name in self._get_fallback_chain(primary_model):
+            attempt_request = request if model_name == primary_model else build_request(model_name)
+            if isinstance(attempt_request, str):
+                continue
+            provider = attempt_request["model_config"]["provider"]
+            
+            for attempt in range(self.health.max_retries + 1):
+                if not self.health.allow_request(model_name, provider):
+                    break
+                started = False
+                try:
+                    for delta in self._iter_stream_deltas(attempt_request, cancel_token):
+                        if not started and model_name != primary_model:
+                            self.health.failovers += 1
+                            print(f"\n🔀 Failover: {model_name} streaming for {primary_model}")
+                        started = True
+                        yield delta
+                    return
+                except (RequestCancelled, SchedulerBusy):
+                    raise
+                except Exception as e:
+                    if started:
+                        raise
+                    last_error = e
+                    if not is_retryable(e) or attempt == self.health.max_retries:
+                        break
+                    if self._backoff(attempt, e, cancel_token):
+                        raise RequestCancelled("Stream cancelled during retry backoff")
+        
+        if last_error:
+            raise last_error
+        raise ProviderError("All models in the fallback chain are unavailable (circuit open).")
+    
+    def _backoff(self, attempt, error, cancel_token=None):
+        """Sleep the retry backoff - returns True if cancel_token fired meanwhile"""
+        delay = backoff_delay(attempt, error)
+        if cancel_token is None:
+            time.sleep(delay)
+            return False
+        return cancel_token.wait(delay)
+    
+    def _get_fallback_chain(self, primary_model):
+        """Get the ordered models to try for a request, primary first"""
+        return self.health.build_fallback_chain(primary_model, self.available_models, self._get_api_key_for_model)
+    
+    def _is_model_usable(self, model_name):
+        """Check that a model has an API key and a closed (or probing) circuit breaker"""
+        model_config = self.available_models.get(model_name)
+        if not model_config or not self._get_api_key_for_model(model_name):
+            return False
+        return self.health.is_available(model_name, model_config["provider"])
+    
+    def _select_healthy_model(self):
+        """Get the first model in the current model's fallback chain whose breaker admits requests"""
+        for model_name in self._get_fallback_chain(self.current_model):
+            if self._is_model_usable(model_name):
+                return model_name
+        return self.current_model
+    
+    def _apply_auto_personality(self, message):
+        """Auto-detect and switch personality for a message if enabled"""
         if self.auto_personality:
             detected_mode = self.detect_personality_from_message(message)
             if detected_mode != self.personality_mode:
                 self.switch_personality(detected_mode)
+    
+    def get_cache_context(self, message, system_prompt=None):
+        """
+        Describe what a chat request for this message would send, for response cache keys
+        
+        Predicts the auto-personality switch without applying it.
+        
+        Returns:
+            dict: model, system_prompt and context (history window) - or None if the model is unknown
+        """
+        model_config = self.available_models.get(self.current_model)
+        if not model_config:
+            return None
+        
+        if not system_prompt:
+            mode = self.detect_personality_from_message(message) if self.auto_personality else self.personality_mode
+            system_prompt = self.personalities.get(mode)
+        
+        reserved_tokens = estimate_tokens(system_prompt) + estimate_tokens(message) + 2 * MESSAGE_OVERHEAD
+        context, _ = self.context_builder.build(self.conversation_history, model_config, reserved_tokens)
+        return {"model": self.current_model, "system_prompt": system_prompt, "context": context}
+    
+    def _prepare_chat_request(self, message, system_prompt=None, model_name=None, priority=INTERACTIVE):
+        """
+        Build the provider request for a chat message
+        
+        Args:
+            message: The user message to process
+            system_prompt: Optional override for system prompt
+            model_name: Model to target (defaults to the current model)
+            priority: Scheduler lane (VOICE, INTERACTIVE or BACKGROUND)
+            
+        Returns:
+            dict: endpoint, headers, payload and model_config - or str error message
+        """
+        model_name = model_name or self.current_model
         
         # Generate API key for selected provider
-        api_key = self._get_api_key_for_model(self.current_model)
+        api_key = self._get_api_key_for_model(model_name)
         if not api_key:
             return "Error: API key not found for the selected model."
             
         # Get model configuration
-        model_config = self.available_models.get(self.current_model)
+        model_config = self.available_models.get(model_name)
         if not model_config:
             return "Error: Model configuration not found."
             
-        # Prepare conversation history for model context
-        formatted_history = self._format_conversation_for_model(model_config["provider"])
-        
         # Get appropriate system prompt
         if not system_prompt:
             system_prompt = self.personalities.get(self.personality_mode)
         
+        # Pack the most recent history into the model's token budget
+        reserved_tokens = estimate_tokens(system_prompt) + estimate_tokens(message) + 2 * MESSAGE_OVERHEAD
+        formatted_history, context_report = self.context_builder.build(
+            self.conversation_history, model_config, reserved_tokens
+        )
+        context_report["model"] = model_name
+        self.last_context_stats = context_report
+        
         # Prepare API parameters
         endpoint = model_config["endpoint"]
         headers = self._get_headers_for_provider(model_config["provider"], api_key)
@@ -561,18 +1374,44 @@ class JarvisAI:
         # Add user message
         messages.append({"role": "user", "content": message})
         
+        payload = self._build_payload(model_config, messages, max_tokens=800)
+        
+        # Payload is ready with provider-specific formatting
+        return {
+            "model_name": model_name,
+            "endpoint": endpoint,
+            "headers": headers,
+            "payload": payload,
+            "model_config": model_config,
+            "context": context_report,
+            "prompt_tokens": context_report["prompt_tokens"],
+            "priority": priority
+        }
+    
+    def _build_payload(self, model_config, messages, max_tokens=800):
+        """
+        Build the provider-specific request body for a list of chat messages
+        
+        Args:
+            model_config: Configuration of the target model
+            messages: OpenAI-style message list
+            max_tokens: Maximum tokens to generate
+        
+        Returns:
+            dict: Request payload
+        """
         # Base payload (works for OpenAI and OpenRouter)
         payload = {
             "model": model_config["model_id"],
             "messages": messages,
             "temperature": 0.7,
-            "max_tokens": 800
+            "max_tokens": max_tokens
         }
         
         # Apply provider-specific formatting
         if model_config["provider"] == "openrouter":
             payload["route"] = "fallback"  # Use fallback route for reliability
-        elif model_config["provider"] == "google":
+        elif uses_gemini_api(model_config):
             # For Google AI, we need a completely different format
             google_payload = {
                 "contents": []
@@ -590,66 +1429,87 @@ class JarvisAI:
             # Add generation config
             google_payload["generationConfig"] = {
                 "temperature": 0.7,
-                "maxOutputTokens": 800,
+                "maxOutputTokens": max_tokens,
                 "topP": 0.95
             }
             
             payload = google_payload
         
-        # Payload is ready with provider-specific formatting
+        return payload
+    
+    def _parse_response_json(self, response_json, model_config):
+        """
+        Extract the assistant text from a provider response
         
-        try:
-            response = requests.post(endpoint, json=payload, headers=headers, timeout=60)
-            response_json = response.json()
-            
-            # 🔥 UNIVERSAL DEVIL PARSER - HANDLES ANY PROVIDER, ANY MODEL FORMAT 🔥
-            try:
-                # OpenRouter and OpenAI format
-                if "choices" in response_json and len(response_json["choices"]) > 0:
-                    if "message" in response_json["choices"][0]:
-                        assistant_response = response_json["choices"][0]["message"]["content"]
-                    elif "text" in response_json["choices"][0]:
-                        assistant_response = response_json["choices"][0]["text"]
-                # Google AI / Gemini format
-                elif "candidates" in response_json and len(response_json["candidates"]) > 0:
-                    if "content" in response_json["candidates"][0]:
-                        parts = response_json["candidates"][0]["content"].get("parts", [])
-                        assistant_response = "".join([p.get("text", "") for p in parts])
-                # Anthropic format
-                elif "completion" in response_json:
-                    assistant_response = response_json["completion"]
-                # DeepSeek direct API format
-                elif "response" in response_json:
-                    assistant_response = response_json["response"]
-                # Totally unknown format - devil mode parsing
-                else:
-                    # Look through the response for any text content
-                    assistant_response = self._devil_parse_unknown_format(response_json)
-            except Exception as parse_error:
-                print(f"🔥 DEVIL PARSER ERROR: {parse_error}")
-                print(f"🔥 RAW RESPONSE: {response_json}")
-                assistant_response = f"Error parsing response from AI provider. Raw response: {str(response_json)[:200]}..."
-                
-                if not assistant_response:
-                    return f"Error: Unable to parse response from {model_config['provider']}."
-            
-            # Update conversation history
-            self.conversation_history.append({"role": "user", "content": message})
-            self.conversation_history.append({"role": "assistant", "content": assistant_response})
-            
-            # Save updated conversation history
-            self._save_conversation_history()
-            
-            # Update interaction timestamp
-            self.last_interaction = datetime.now()
-            self.session_started = True
-            
-            return assistant_response
+        Args:
+            response_json: Decoded JSON response
+            model_config: Configuration of the model that produced it
             
-        except requests.exceptions.RequestException as e:
-            return f"Error connecting to AI service: {str(e)}"
-        except Exception as e:
-            return f"Error: {str(e)}"
+        Returns:
+            str: Assistant response text, or None if none could be found (callers treat
+            that as a parse failure - the raw payload is only logged at debug level)
+        """
+        assistant_response = None
+        
+        # 🔥 UNIVERSAL DEVIL PARSER - HANDLES ANY PROVIDER, ANY MODEL FORMAT 🔥
+        try:
+            # OpenRouter and OpenAI format
+            if "choices" in response_json and len(response_json["choices"]) > 0:
+                if "message" in response_json["choices"][0]:
+                    assistant_response = response_json["choices"][0]["message"]["content"]
+                elif "text" in response_json["choices"][0]:
+                    assistant_response = response_json["choices"][0]["text"]
+            # Google AI / Gemini format
+            elif "candidates" in response_json and len(response_json["candidates"]) > 0:
+                if "content" in response_json["candidates"][0]:
+                    parts = response_json["candidates"][0]["content"].get("parts", [])
+                    assistant_response = "".join([p.get("text", "") for p in parts])
+            # Anthropic format
+            elif "completion" in response_json:
+                assistant_response = response_json["completion"]
+            # DeepSeek direct API format
+            elif "response" in response_json:
+                assistant_response = response_json["response"]
+            # Totally unknown format - devil mode parsing
+            else:
+                # Look through the response for any text content
+                assistant_response = self._devil_parse_unknown_format(response_json, model_config)
+        except Exception as parse_error:
+            print(f"🔥 DEVIL PARSER ERROR: {parse_error}")
+            logger.debug("Unparseable provider response: %.200s", response_json)
+            assistant_response = None
+        
+        return assistant_response
+    
+    def _commit_turn(self, message, assistant_response):
+        """Append a completed user/assistant exchange to history and persist it"""
+        # Update conversation history (token estimates are cached on append)
+        self.conversation_history.append(make_message("user", message))
+        self.conversation_history.append(make_message("assistant", assistant_response))
+        
+        # Save updated conversation history in the background
+        self.persistence.schedule(self._save_conversation_history)
+        
+        # Keep engine state inside the memory budget - measuring and gc run on the
+        # persistence worker so achat() never blocks the event loop on them
+        self.persistence.schedule(self.governor.enforce)
+        
+        # Update interaction timestamp
+        self.last_interaction = datetime.now()
+        self.session_started = True
+    
+    def _evict_history(self, nbytes):
+        """Drop the oldest history messages to free nbytes (keeps MIN_HISTORY_MESSAGES)"""
+        freed = 0
+        count = 0
+        removable = len(self.conversation_history) - self.min_history_messages
+        while count < removable and freed < nbytes:
+            freed += sizeof_message(self.conversation_history[count])
+            count += 1
+        if count:
+            del self.conversation_history[:count]
+            print(f"⚠️ Memory budget reached - dropped {count} oldest messages from history")
+        return freed
     
     def _get_api_key_for_model(self, model_name):
         """
@@ -675,6 +1535,9 @@ class JarvisAI:
             return os.environ.get("GOOGLE_AI_API_KEY")
         elif provider == "deepseek":
             return os.environ.get("DEEPSEEK_API_KEY")
+        elif provider == "mock":
+            # Local mock provider accepts any key
+            return os.environ.get("MOCK_API_KEY", "mock-key")
         
         return None
     
@@ -704,6 +1567,7 @@ class JarvisAI:
         elif provider == "google":
             return {
                 "Content-Type": "application/json",
+                "x-goog-api-key": api_key
             }
         elif provider == "deepseek":
             return {
@@ -713,55 +1577,77 @@ class JarvisAI:
         
         return {"Content-Type": "application/json"}
     
-    def _format_conversation_for_model(self, provider):
+    def _save_conversation_history(self):
         """
-        Format conversation history for specific providers
+        Persist conversation history changes to the journal
         
-        Args:
-            provider: API provider name
-            
-        Returns:
-            list: Formatted conversation messages
+        Only messages after the last journaled one are appended. Dropping
+        old messages from memory (optimizer, memory governor) leaves the
+        journal untouched; an emptied history is recorded as a clear.
+        Runs on the persistence worker, so it works on a snapshot of the list.
         """
-        # Limit history length based on provider
-        max_history = 10  # Default
-        
-        if provider == "openai":
-            max_history = 15
-        elif provider == "anthropic":
-            max_history = 12
-        
-        # Get most recent messages within limit
-        recent_history = self.conversation_history[-max_history:] if len(self.conversation_history) > max_history else self.conversation_history
-        
-        return recent_history
-    
-    def _save_conversation_history(self):
-        """Save conversation history to file"""
-        history_file = os.path.join("memory", "conversation_history.json")
-        
-        # Create directory if it doesn't exist
-        os.makedirs("memory", exist_ok=True)
+        history = list(self.conversation_history)
+        tail = self._journal_tail
         
         try:
-            with open(history_file, "w", encoding="utf-8") as f:
-                json.dump(self.conversation_history, f, ensure_ascii=False, indent=2)
+            start = 0
+            if tail is not None:
+                # The journaled tail is normally within the last few messages
+                start = next((i + 1 for i in range(len(history) - 1, -1, -1) if history[i] is tail), None)
+                if start is None:
+                    # History was cleared or replaced since the last save
+                    self.history_journal.clear(compact=not history)
+                    if self.conversation_store:
+                        self._update_conversation_store(self.conversation_store.clear)
+                    start = 0
+            
+            self.history_journal.append(history[start:])
+            # The journal is the source of truth - never re-append what it already holds
+            self._journal_tail = history[-1] if history else None
+            if self.conversation_store:
+                self._update_conversation_store(self.conversation_store.add, history[start:])
+            self.history_journal.maybe_compact()
         except Exception as e:
             print(f"Error saving conversation history: {str(e)}")
     
+    def _update_conversation_store(self, operation, *args):
+        """Apply a change to the search index - a failure only costs search results, never the journal"""
+        try:
+            operation(*args)
+        except Exception as e:
+            print(f"⚠️ Conversation search index update failed: {str(e)}")
+    
     def _load_conversation_history(self):
-        """Load conversation history from file"""
-        history_file = os.path.join("memory", "conversation_history.json")
-        
-        if not os.path.exists(history_file):
-            return
-        
+        """Load the recent tail of the conversation journal (migrating the old JSON file once)"""
         try:
-            with open(history_file, "r", encoding="utf-8") as f:
-                self.conversation_history = json.load(f)
+            self.conversation_history = [
+                Message.from_dict(record) for record in self.history_journal.load(tail=self.history_tail_messages or None)
+            ]
         except Exception as e:
             print(f"Error loading conversation history: {str(e)}")
             self.conversation_history = []
+        self._journal_tail = self.conversation_history[-1] if self.conversation_history else None
+    
+    def iter_conversation_history(self):
+        """
+        Stream the full conversation history from the journal, oldest first
+        
+        conversation_history only holds the recent tail; summaries, the
+        fallback search and exports page older messages in through this
+        instead of keeping them in memory.
+        """
+        self.persistence.flush()
+        return self.history_journal.iter_messages()
+    
+    def _backfill_conversation_store(self, batch_size=1000):
+        """Index every journaled message in batches"""
+        batch = []
+        for message in self.history_journal.iter_messages():
+            batch.append(message)
+            if len(batch) >= batch_size:
+                self.conversation_store.add(batch, created=0)
+                batch = []
+        self.conversation_store.add(batch, created=0)
     
     def _load_user_preferences(self):
         """Load user preferences from file"""
@@ -825,8 +1711,8 @@ class JarvisAI:
                 "{self.master_title}", self.master_title
             )
         
-        # Save updated preferences
-        self._save_user_preferences()
+        # Save updated preferences in the background
+        self.persistence.schedule(self._save_user_preferences)
         
         return self.get_master_identity()
     
@@ -868,21 +1754,26 @@ class JarvisAI:
     def clear_conversation_history(self):
         """Clear the conversation history"""
         self.conversation_history = []
-        self._save_conversation_history()
+        self.persistence.schedule(self._save_conversation_history)
         return True
     
     def get_conversation_summary(self):
-        """Get a summary of the conversation history"""
-        total_messages = len(self.conversation_history)
-        user_messages = len([m for m in self.conversation_history if m.get("role") == "user"])
-        assistant_messages = len([m for m in self.conversation_history if m.get("role") == "assistant"])
+        """Get a summary of the full conversation history (streamed from the journal)"""
+        total_messages = 0
+        counts = {"user": 0, "assistant": 0}
+        lengths = {"user": 0, "assistant": 0}
+        for m in self.iter_conversation_history():
+            total_messages += 1
+            role = m.get("role")
+            if role in counts:
+                counts[role] += 1
+                lengths[role] += len(m.get("content", ""))
+        user_messages = counts["user"]
+        assistant_messages = counts["assistant"]
         
         # Calculate average message length
-        user_message_lengths = [len(m.get("content", "")) for m in self.conversation_history if m.get("role") == "user"]
-        assistant_message_lengths = [len(m.get("content", "")) for m in self.conversation_history if m.get("role") == "assistant"]
-        
-        avg_user_length = sum(user_message_lengths) / len(user_message_lengths) if user_message_lengths else 0
-        avg_assistant_length = sum(assistant_message_lengths) / len(assistant_message_lengths) if assistant_message_lengths else 0
+        avg_user_length = lengths["user"] / user_messages if user_messages else 0
+        avg_assistant_length = lengths["assistant"] / assistant_messages if assistant_messages else 0
         
         return {
             "total_messages": total_messages,
@@ -900,6 +1791,82 @@ class JarvisAI:
             "beast_mode": self.beast_mode_enabled
         }
     
+    def get_cache_stats(self):
+        """Get response cache size and hit/miss/eviction counters"""
+        return self.optimizer.get_cache_stats()
+    
+    def get_journal_stats(self):
+        """Get conversation journal record counts, fsync policy and size ("loaded" = messages in memory)"""
+        stats = self.history_journal.get_stats()
+        stats["loaded"] = len(self.conversation_history)
+        return stats
+    
+    def get_persistence_stats(self):
+        """Get write-behind queue depth, coalescing counters and flush latency"""
+        return self.persistence.get_stats()
+    
+    def flush_persistence(self):
+        """Write pending history/preference saves now (call before exit)"""
+        self.persistence.flush()
+        self.history_journal.close()
+    
+    def get_memory_budget(self):
+        """Get the memory governor's budget, per-pool bytes and eviction/GC counters"""
+        return self.governor.get_stats()
+    
+    def get_connection_stats(self):
+        """Get keep-alive pool hit/miss statistics for outbound HTTP calls"""
+        return self.http.get_pool_stats()
+    
+    def get_model_stats(self, model_name=None):
+        """
+        Get rolling per-model telemetry (TTFB, latency, tokens, tokens/sec, errors)
+        
+        Args:
+            model_name: Only this model's summary
+        
+        Returns:
+            dict: Model name -> summary with p50/p90/p99 and histograms, fastest first
+        """
+        return self.telemetry.get_stats(model_name)
+    
+    def get_warmup_stats(self):
+        """Get pre-warming/keep-alive counts and cold vs warm first-request latency"""
+        return self.warmer.get_stats()
+    
+    def toggle_hedging(self):
+        """Toggle hedged requests across providers"""
+        self.hedging_enabled = not self.hedging_enabled
+        return self.hedging_enabled
+    
+    def get_hedging_stats(self):
+        """Get hedge rate, win counts and current hedge delays"""
+        stats = self.hedging.get_stats()
+        stats["enabled"] = self.hedging_enabled
+        return stats
+    
+    def get_context_stats(self):
+        """Get the token budget report of the most recent chat request"""
+        return self.last_context_stats
+    
+    def get_schema_stats(self):
+        """Get learned response-schema paths with their hit/miss counts"""
+        return self.response_schemas.get_stats()
+    
+    def get_coalescing_stats(self):
+        """Get how many chat requests were served by an identical in-flight call"""
+        return self.single_flight.get_stats()
+    
+    def get_provider_health(self):
+        """Get circuit breaker state per provider/model and the current fallback chain"""
+        status = self.health.get_status()
+        status["fallback_chain"] = self._get_fallback_chain(self.current_model)
+        return status
+    
+    def get_scheduler_stats(self):
+        """Get rate-limit queue times per priority lane and learned per-model limits"""
+        return self.scheduler.get_stats()
+    
     def search_web(self, query, max_results=3):
         """
         Perform a web search using a compatible API
@@ -930,8 +1897,6 @@ class JarvisAI:
             dict: Fetched content with success status
         """
         try:
-            import requests
-            
             # Send request with browser-like headers
             headers = {
                 "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36",
@@ -942,7 +1907,7 @@ class JarvisAI:
             }
             
             # Timeout after 10 seconds
-            response = requests.get(url, headers=headers, timeout=10)
+            response = self.http.get("web", url, headers=headers, timeout=10)
             
             # Check if request was successful
             if response.status_code != 200:
@@ -1054,89 +2019,103 @@ class JarvisAI:
         Returns:
             dict: Search results with summaries
         """
+        start_time = time.time()
+        
         # Perform web search
         search_results = self.search_web(query, max_results=max_results)
         
         if not search_results.get("success", False):
             return search_results
         
-        # Process each result
-        processed_results = []
-        
-        for result in search_results.get("results", [])[:max_results]:
-            # Fetch content for each search result
-            content_result = self.fetch_web_content(result.get("link", ""))
-            
-            if content_result.get("success", False):
-                # Add content to result
-                result["content"] = content_result.get("content", "")
-                result["content_length"] = content_result.get("content_length", 0)
-                
-                # Generate summary using AI
-                summary_prompt = f"Please summarize this content about '{query}':\n\n{result['content'][:5000]}"
-                summary = self.generate_text(summary_prompt, max_tokens=200)
-                
-                result["summary"] = summary
-                
-            processed_results.append(result)
+        # Fetch and summarize concurrently, collecting in completion order
+        processed_results = list(self.iter_search_summaries(query, search_results, max_results))
         
         return {
             "success": True,
             "query": query,
             "results": processed_results,
-            "result_count": len(processed_results)
+            "result_count": len(processed_results),
+            "total_time": round(time.time() - start_time, 3)
         }
     
-    def generate_text(self, prompt, max_tokens=500):
+    def iter_search_summaries(self, query, search_results, max_results=3):
+        """
+        Fetch and summarize search results, yielding each as soon as it is done
+        
+        Page fetches run in parallel and each summary starts as soon as its
+        page text is ready (see SummarizePipeline for the concurrency caps).
+        
+        Args:
+            query (str): The search query the summaries should focus on
+            search_results (dict): Output of search_web
+            max_results (int): Maximum number of results to process
+        
+        Yields:
+            dict: Result with content, summary, rank and per-stage timings
+        """
+        def summarize(result):
+            summary_prompt = f"Please summarize this content about '{query}':\n\n{result['content'][:5000]}"
+            return self.generate_text(summary_prompt, max_tokens=200, priority=BACKGROUND)
+        
+        results = search_results.get("results", [])[:max_results]
+        for result in self.summarize_pipeline.run(results, summarize):
+            yield result
+    
+    def generate_text(self, prompt, max_tokens=500, priority=INTERACTIVE):
         """
         Generate text using the current AI model
         
         Args:
             prompt (str): Text prompt for generation
             max_tokens (int): Maximum tokens to generate
+            priority: Scheduler lane - BACKGROUND for work nobody is waiting on
             
         Returns:
             str: Generated text
         """
-        # Create a simple message structure
-        messages = [{"role": "user", "content": prompt}]
+        request = self._prepare_text_request(prompt, max_tokens, priority=priority)
+        if isinstance(request, str):
+            return request
+        
+        try:
+            return self._send_with_failover(
+                request, lambda model_name: self._prepare_text_request(prompt, max_tokens, model_name, priority),
+                timeout=30
+            )
+        except Exception as e:
+            return f"Error generating text: {str(e)}"
+    
+    def _prepare_text_request(self, prompt, max_tokens=500, model_name=None, priority=INTERACTIVE):
+        """
+        Build a history-free provider request for generate_text
+        
+        Returns:
+            dict: Request spec like _prepare_chat_request - or str error message
+        """
+        model_name = model_name or self.current_model
         
         # Get model configuration
-        model_config = self.available_models.get(self.current_model)
+        model_config = self.available_models.get(model_name)
         if not model_config:
             return "Error: Model configuration not found."
         
         # Generate API key
-        api_key = self._get_api_key_for_model(self.current_model)
+        api_key = self._get_api_key_for_model(model_name)
         if not api_key:
             return "Error: API key not found for the selected model."
         
-        # Prepare API call
-        endpoint = model_config["endpoint"]
-        headers = self._get_headers_for_provider(model_config["provider"], api_key)
+        # Create a simple message structure
+        messages = [{"role": "user", "content": prompt}]
         
-        payload = {
-            "model": model_config["model_id"],
-            "messages": messages,
-            "temperature": 0.7,
-            "max_tokens": max_tokens
+        return {
+            "model_name": model_name,
+            "endpoint": model_config["endpoint"],
+            "headers": self._get_headers_for_provider(model_config["provider"], api_key),
+            "payload": self._build_payload(model_config, messages, max_tokens=max_tokens),
+            "model_config": model_config,
+            "prompt_tokens": estimate_tokens(prompt) + MESSAGE_OVERHEAD,
+            "priority": priority
         }
-        
-        try:
-            response = requests.post(endpoint, json=payload, headers=headers, timeout=30)
-            response_json = response.json()
-            
-            # Extract response based on provider
-            if model_config["provider"] == "openai":
-                return response_json["choices"][0]["message"]["content"]
-            elif model_config["provider"] == "openrouter":
-                return response_json["choices"][0]["message"]["content"]
-            else:
-                # Generic extraction attempt
-                return response_json.get("choices", [{}])[0].get("message", {}).get("content", "")
-                
-        except Exception as e:
-            return f"Error generating text: {str(e)}"
 
     def get_models_by_provider(self):
         """Group available models by provider"""
@@ -1181,14 +2160,25 @@ class JarvisAI:
         return f"📊 Conversation Insights: {insights}"
 
     def search_conversation_history(self, query):
-        """Search through conversation history"""
-        if not query or not self.conversation_history:
+        """
+        Search through conversation history
+        
+        With the FTS5 store, results are BM25-ranked with snippets and the
+        query supports "phrases", prefix* terms and role:/after:/before:/page:
+        filters (dates as YYYY-MM-DD). Without it, a substring scan is used.
+        """
+        if not query:
             return "No search query provided or no conversation history."
         
+        if self.conversation_store:
+            # Index turns still waiting on the write-behind worker
+            self.persistence.flush()
+            return self.conversation_store.search_text(query)
+        
         matches = []
         query_lower = query.lower()
         
-        for i, msg in enumerate(self.conversation_history):
+        for i, msg in enumerate(self.iter_conversation_history()):
             content = msg.get("content", "").lower()
             if query_lower in content:
                 role = msg.get("role", "unknown")
@@ -1288,65 +2278,32 @@ class JarvisAI:
         """Detect code patterns - placeholder for future implementation"""
         return f"Pattern detection planned for future release. Would detect patterns in {language} code."
         
-    def _devil_parse_unknown_format(self, response_json):
+    def _devil_parse_unknown_format(self, response_json, model_config=None):
         """
         🔥 DEVIL PARSER - Find text content in ANY response format 🔥
-        Recursively searches a nested JSON structure for text content
+        Uses the extraction path learned for this provider+model, and only
+        falls back to a recursive search of the JSON tree when it misses
         
         Args:
             response_json: JSON response from any AI provider
+            model_config: Configuration of the model that produced it
             
         Returns:
-            str: Extracted text content or error message
+            str: Extracted text content, or None if no text was found
         """
-        # Keys that likely contain the response text
-        text_keys = ["content", "text", "message", "response", "output", "result", "generated_text", 
-                    "completion", "answer", "reply", "response_text", "assistant"]
-        
-        def search_dict(obj, depth=0, max_depth=10):
-            # Prevent infinite recursion
-            if depth > max_depth:
-                return None
-                
-            # Base case: string found
-            if isinstance(obj, str) and len(obj) > 20:
-                return obj
-                
-            # Recursive case: dictionary
-            if isinstance(obj, dict):
-                # First check keys most likely to contain the result
-                for key in text_keys:
-                    if key in obj and obj[key]:
-                        if isinstance(obj[key], str) and len(obj[key]) > 20:
-                            return obj[key]
-                        result = search_dict(obj[key], depth + 1, max_depth)
-                        if result:
-                            return result
-                            
-                # Then check all other keys
-                for key, value in obj.items():
-                    result = search_dict(value, depth + 1, max_depth)
-                    if result:
-                        return result
-            
-            # Recursive case: list
-            if isinstance(obj, list) and obj:
-                for item in obj:
-                    result = search_dict(item, depth + 1, max_depth)
-                    if result:
-                        return result
-            
-            return None
+        model_config = model_config or {}
+        schema_key = f"{model_config.get('provider', 'unknown')}:{model_config.get('model_id', 'unknown')}"
         
         # Try to find text content in the response
-        result = search_dict(response_json)
+        result = self.response_schemas.extract(schema_key, response_json)
         
         # If found, return it
         if result:
             return result
             
-        # Last resort: convert the raw response to string
-        return f"Extracted content from AI response: {str(response_json)[:300]}..."
+        # Never hand the raw payload back as a reply - it would be committed and cached
+        logger.debug("No reply text found in %s response: %.300s", schema_key, response_json)
+        return None
 
 
 class UserManager:
@@ -7,6 +7,8 @@ import re
 import hashlib
 from datetime import datetime
 
+from assistant.context_builder import make_message
+
 def integrate_performance_beast(ai_instance, use_aggressive_mode=False):
     """
     Integrate Performance Beast Mode components into an existing JarvisAI instance
@@ -36,12 +38,12 @@ def integrate_performance_beast(ai_instance, use_aggressive_mode=False):
         
         # Enhance methods with Beast Mode capabilities
         _enhance_chat_method(ai_instance)
-        _enhance_memory_system(ai_instance)
         _enhance_model_selection(ai_instance)
         
         # Add Beast Mode capabilities
         ai_instance.beast_mode_enabled = True
         ai_instance.get_memory_stats = integrator.memory_optimizer.get_memory_stats
+        ai_instance.get_cache_stats = integrator.get_cache_stats
         
         print("🔥 PERFORMANCE BEAST MODE ACTIVATED 🔥")
         return ai_instance
@@ -57,22 +59,37 @@ def _enhance_chat_method(ai_instance):
     """Enhance the chat method with response caching and optimization"""
     original_chat = ai_instance.chat
     
-    def enhanced_chat(message, system_prompt=None):
+    def cache_context(message, system_prompt):
+        if hasattr(ai_instance, 'get_cache_context'):
+            return ai_instance.get_cache_context(message, system_prompt)
+        return None
+    
+    def commit_cached_turn(message, cached_response):
+        # Same path as a live reply - the save runs on the persistence worker, never on the caller
+        if hasattr(ai_instance, '_commit_turn'):
+            ai_instance._commit_turn(message, cached_response)
+            return
+        ai_instance.conversation_history.append(make_message("user", message))
+        ai_instance.conversation_history.append(make_message("assistant", cached_response))
+        ai_instance._save_conversation_history()
+    
+    def enhanced_chat(message, system_prompt=None, cancel_token=None):
+        # Key on what would actually be sent - history changes once the turn is committed
+        context = cache_context(message, system_prompt)
+        
         # Get cached response if available
-        cached_response = ai_instance._integrator.get_cached_response(message)
+        cached_response = ai_instance._integrator.get_cached_response(message, context)
         if cached_response:
             # Add to conversation history but skip API call
-            ai_instance.conversation_history.append({"role": "user", "content": message})
-            ai_instance.conversation_history.append({"role": "assistant", "content": cached_response})
-            ai_instance._save_conversation_history()
+            commit_cached_turn(message, cached_response)
             return cached_response
         
         # No cache hit, use original method
-        response = original_chat(message, system_prompt)
+        response = original_chat(message, system_prompt, cancel_token=cancel_token)
         
         # Cache the response for future use
         if not response.startswith("Error:"):
-            ai_instance._integrator.cache_response(message, response)
+            ai_instance._integrator.cache_response(message, response, context)
         
         # Run memory cleanup periodically
         ai_instance._integrator.cleanup_memory()
@@ -82,48 +99,91 @@ def _enhance_chat_method(ai_instance):
     # Replace the method
     ai_instance.chat = enhanced_chat
 
-def _enhance_memory_system(ai_instance):
-    """Enhance the memory system with optimization"""
-    original_save_history = ai_instance._save_conversation_history
-    
-    def optimized_save_history():
-        # Optimize conversation before saving
-        if hasattr(ai_instance, '_integrator') and ai_instance._integrator.memory_optimizer:
-            ai_instance.conversation_history = ai_instance._integrator.optimize_conversation(
-                ai_instance.conversation_history
-            )
-        
-        # Call original method
-        original_save_history()
+    if hasattr(ai_instance, 'chat_stream'):
+        original_chat_stream = ai_instance.chat_stream
+        
+        def enhanced_chat_stream(message, system_prompt=None, cancel_token=None):
+            # Same cache tiers as chat() - a hit is yielded whole, a miss streams and is cached once committed
+            context = cache_context(message, system_prompt)
+            cached_response = ai_instance._integrator.get_cached_response(message, context)
+            if cached_response:
+                commit_cached_turn(message, cached_response)
+                yield cached_response
+                return
+            
+            history = ai_instance.conversation_history
+            tail = history[-1] if history else None
+            chunks = []
+            stream = original_chat_stream(message, system_prompt, cancel_token=cancel_token)
+            try:
+                for chunk in stream:
+                    chunks.append(chunk)
+                    yield chunk
+            finally:
+                stream.close()
+            
+            # Only a completed turn is committed - errors and cancelled streams are not cached
+            response = "".join(chunks)
+            history = ai_instance.conversation_history
+            if history and history[-1] is not tail and history[-1].get("content") == response:
+                ai_instance._integrator.cache_response(message, response, context)
+            ai_instance._integrator.cleanup_memory()
+        
+        ai_instance.chat_stream = enhanced_chat_stream
     
-    # Replace the method
-    ai_instance._save_conversation_history = optimized_save_history
+    if not hasattr(ai_instance, 'achat'):
+        return
+
+    original_achat = ai_instance.achat
+
+    async def enhanced_achat(message, system_prompt=None, timeout=60):
+        # Same cache as the sync path
+        context = cache_context(message, system_prompt)
+        cached_response = ai_instance._integrator.get_cached_response(message, context)
+        if cached_response:
+            commit_cached_turn(message, cached_response)
+            return cached_response
+
+        response = await original_achat(message, system_prompt, timeout)
+
+        if not response.startswith("Error"):
+            ai_instance._integrator.cache_response(message, response, context)
+
+        ai_instance._integrator.cleanup_memory()
+
+        return response
+
+    ai_instance.achat = enhanced_achat
 
 def _enhance_model_selection(ai_instance):
     """Enhance model selection with smart switching"""
     
     def smart_model_switch(message, user_preferences=None):
-        """Automatically select the best model based on query complexity"""
+        """Automatically select the fastest healthy model that fits the query's complexity"""
         if not hasattr(ai_instance, '_integrator'):
             return ai_instance.current_model
             
-        available_models = list(ai_instance.available_models.keys())
+        # Only models with an API key and a closed circuit breaker are candidates
+        available_models = [name for name in ai_instance.available_models
+                            if ai_instance._is_model_usable(name)]
         optimal_model = ai_instance._integrator.select_optimal_model(
             message, 
             available_models, 
-            user_preferences
+            user_preferences,
+            ai_instance.get_model_stats(),
+            ai_instance.current_model
         )
         
-        # Only switch if different from current
+        # Only switch if different from current - switch_model also pre-warms the new endpoint
         if optimal_model and optimal_model != ai_instance.current_model:
-            old_model = ai_instance.current_model
-            ai_instance.current_model = optimal_model
-            return optimal_model
+            ai_instance.switch_model(optimal_model)
+            return ai_instance.current_model
             
         return ai_instance.current_model
     
-    # Add new method
+    # Add new methods
     ai_instance.smart_model_switch = smart_model_switch
+    ai_instance.explain_model_choice = ai_instance._integrator.get_model_selection
 
 def integrate_voice_system(ai_instance):
     """
@@ -206,12 +266,12 @@ def _enhance_chat_with_gui(ai_instance):
     
     original_chat = ai_instance.chat
     
-    def chat_with_gui(message, system_prompt=None):
+    def chat_with_gui(message, system_prompt=None, cancel_token=None):
         # Display user message in GUI
         ai_instance.display_message(message, is_user=True)
         
         # Get response
-        response = original_chat(message, system_prompt)
+        response = original_chat(message, system_prompt, cancel_token=cancel_token)
         
         # Display AI response in GUI
         ai_instance.display_message(response, is_user=False)
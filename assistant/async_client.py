@@ -0,0 +1,92 @@
+# async_client.py - Non-blocking HTTP client for JarvisAI.achat
+
+import asyncio
+import weakref
+
+import requests
+
+# Native async transport - pip install httpx
+try:
+    import httpx
+except ImportError:
+    httpx = None
+
+
+class AsyncHTTPClient:
+    """
+    Async HTTP transport for the JARVIS voice engines and orchestrator
+
+    Uses one httpx.AsyncClient per event loop when httpx is installed, so
+    awaiting a provider call never blocks the loop. Without httpx it falls
+    back to the shared keep-alive pools, run on the loop's default executor
+    (a bounded, reused thread pool - not a new thread per turn).
+
+    Cancelling the awaiting task aborts the request; on the httpx path the
+    underlying connection is closed immediately.
+    """
+
+    def __init__(self, connection_pool):
+        self.connection_pool = connection_pool
+        self.native = httpx is not None
+        self._clients = weakref.WeakKeyDictionary()
+
+    def _get_client(self, loop):
+        """Get (or lazily create) the AsyncClient bound to an event loop"""
+        client = self._clients.get(loop)
+        if client is None:
+            client = httpx.AsyncClient(
+                follow_redirects=True,
+                limits=httpx.Limits(max_connections=10, max_keepalive_connections=10)
+            )
+            self._clients[loop] = client
+        return client
+
+    async def post_json(self, key, url, payload, headers, timeout=60, check_response=None):
+        """
+        POST a JSON payload and return the decoded JSON response
+
+        Args:
+            key: Provider key used for the pooled fallback transport
+            url: Target URL
+            payload: JSON request body
+            headers: Request headers
+            timeout: Overall timeout in seconds
+            check_response: Optional callable(response) run before decoding,
+                e.g. to raise on HTTP error statuses
+
+        Returns:
+            dict: Decoded JSON response
+
+        Raises:
+            requests.exceptions.RequestException: On transport errors
+            asyncio.TimeoutError: If the call exceeds the timeout
+        """
+        loop = asyncio.get_running_loop()
+
+        if self.native:
+            client = self._get_client(loop)
+            try:
+                response = await asyncio.wait_for(
+                    client.post(url, json=payload, headers=headers, timeout=timeout),
+                    timeout=timeout
+                )
+            except httpx.HTTPError as e:
+                # Surface transport errors the same way as the sync path
+                raise requests.exceptions.ConnectionError(str(e))
+            if check_response:
+                check_response(response)
+            return response.json()
+
+        def _blocking_post():
+            response = self.connection_pool.post(key, url, json=payload, headers=headers, timeout=timeout)
+            if check_response:
+                check_response(response)
+            return response.json()
+
+        return await asyncio.wait_for(loop.run_in_executor(None, _blocking_post), timeout=timeout)
+
+    async def aclose(self):
+        """Close the AsyncClient bound to the running event loop"""
+        client = self._clients.pop(asyncio.get_running_loop(), None)
+        if client is not None:
+            await client.aclose()
@@ -0,0 +1,102 @@
+# cache_keys.py - Normalized, context-aware response cache keys and cacheability rules
+
+import re
+import json
+import hashlib
+import unicodedata
+
+
+# Answers to these go stale immediately - never served from cache
+TIME_SENSITIVE_PATTERNS = [
+    r"\btime\b", r"\bdate\b", r"\btoday\b", r"\btonight\b", r"\btomorrow\b", r"\byesterday\b",
+    r"\bnow\b", r"\bcurrent(ly)?\b", r"\blatest\b", r"\brecent(ly)?\b", r"\bnews\b",
+    r"\bweather\b", r"\bforecast\b", r"\bprice\b", r"\bstock\b", r"\bscore\b", r"\bthis (week|month|year)\b"
+]
+
+# Answers depend on the file system or perform an action
+FILE_OPERATION_PATTERNS = [
+    r"\b(create|write|read|open|delete|remove|rename|move|copy|save|organi[sz]e|list)\b.*\b(file|folder|directory|project|path)s?\b",
+    r"\b(file|folder|directory)s?\b.*\b(in|at|under)\b",
+    r"[a-z]:\\", r"(^|\s)[~.]?/\w", r"\b\w+\.(py|js|ts|json|txt|md|csv|html|css|yaml|yml|toml|cfg|ini|log)\b"
+]
+
+# The user expects a different answer every time, or the answer comes from the web
+UNCACHEABLE_PATTERNS = [
+    r"\b(random|another|again|different|surprise)\b",
+    r"\b(search (for|the web|online)|web search|look (it )?up|google|browse)\b",
+    r"https?://"
+]
+
+_RULES = [
+    ("time-sensitive", [re.compile(p) for p in TIME_SENSITIVE_PATTERNS]),
+    ("file-operation", [re.compile(p) for p in FILE_OPERATION_PATTERNS]),
+    ("non-deterministic", [re.compile(p) for p in UNCACHEABLE_PATTERNS]),
+]
+
+_APOSTROPHES = str.maketrans({"‘": "'", "’": "'", "“": '"', "”": '"'})
+
+
+def normalize_query(text):
+    """
+    Normalize a message so trivially different phrasings share a key
+
+    Unicode NFKC, lower case, curly quotes straightened, whitespace
+    collapsed and surrounding punctuation stripped - so "What's the
+    weather?" and "  what's the weather " match.
+    """
+    text = unicodedata.normalize("NFKC", text or "").translate(_APOSTROPHES).lower()
+    text = re.sub(r"\s+", " ", text)
+    return text.strip(" \t\n?!.,;:")
+
+
+def cache_exclusion(text):
+    """
+    Check a message against the cacheability rules
+
+    Returns:
+        str: Name of the rule that forbids caching, or None if cacheable
+    """
+    normalized = normalize_query(text)
+    if not normalized:
+        return "empty"
+    for rule, patterns in _RULES:
+        if any(pattern.search(normalized) for pattern in patterns):
+            return rule
+    return None
+
+
+def is_cacheable(text):
+    """Check whether a response to this message may be cached"""
+    return cache_exclusion(text) is None
+
+
+def fingerprint(value):
+    """Short stable digest of a string or JSON-serializable value"""
+    if not isinstance(value, str):
+        value = json.dumps(value, sort_keys=True, ensure_ascii=False)
+    return hashlib.md5(value.encode("utf-8")).hexdigest()[:16]
+
+
+def cache_scope(model=None, system_prompt=None, context=None):
+    """Key part shared by every message sent with the same model, system prompt and history window"""
+    return "|".join([
+        model or "",
+        fingerprint(system_prompt or ""),
+        fingerprint([(m.get("role"), m.get("content")) for m in context or []])
+    ])
+
+
+def make_cache_key(message, model=None, system_prompt=None, context=None):
+    """
+    Build a response cache key
+
+    Args:
+        message: User message (normalized before hashing)
+        model: Model the request goes to
+        system_prompt: System prompt (personality) the request carries
+        context: History messages actually sent with the request
+
+    Returns:
+        str: model|prompt fingerprint|context digest|message digest
+    """
+    return cache_scope(model, system_prompt, context) + "|" + fingerprint(normalize_query(message))
@@ -0,0 +1,508 @@
+# connection_pool.py - Provider-keyed keep-alive HTTP connection pools for JARVIS
+
+import os
+import json
+import socket
+import threading
+
+import requests
+from requests.adapters import HTTPAdapter
+
+try:
+    from urllib3.util.retry import Retry
+except ImportError:
+    Retry = None
+
+try:
+    from urllib3 import HTTPConnectionPool, HTTPSConnectionPool
+    from urllib3.connection import HTTPConnection, HTTPSConnection
+except ImportError:
+    HTTPConnectionPool = None
+
+# Optional HTTP/2 transport - pip install "httpx[http2]"
+try:
+    import httpx
+except ImportError:
+    httpx = None
+
+
+class RequestCancelled(Exception):
+    """Raised when an in-flight request is abandoned through its cancel token"""
+    pass
+
+
+class CancelToken:
+    """
+    Cancellation handle for an in-flight request
+
+    cancel() runs the registered callbacks, which shut down the live
+    socket so a read blocked on a slow provider returns immediately.
+    """
+
+    def __init__(self):
+        self._event = threading.Event()
+        self._callbacks = []
+        self._lock = threading.Lock()
+
+    def cancel(self):
+        """Cancel the request and close its connection"""
+        with self._lock:
+            if self._event.is_set():
+                return
+            self._event.set()
+            callbacks = list(self._callbacks)
+        for callback in callbacks:
+            try:
+                callback()
+            except Exception:
+                pass
+
+    def is_cancelled(self):
+        """Check whether cancel() has been called"""
+        return self._event.is_set()
+
+    def wait(self, timeout):
+        """Sleep up to timeout seconds, waking early on cancel - returns True if cancelled"""
+        return self._event.wait(timeout)
+
+    def add_callback(self, callback):
+        """Register a callback - runs immediately if already cancelled"""
+        with self._lock:
+            if not self._event.is_set():
+                self._callbacks.append(callback)
+                return
+        callback()
+
+    def remove_callback(self, callback):
+        """Unregister a callback once its request has finished"""
+        with self._lock:
+            if callback in self._callbacks:
+                self._callbacks.remove(callback)
+
+
+def _find_response_socket(response):
+    """Locate the socket a streaming requests/urllib3 response is reading from"""
+    raw = getattr(response, "raw", None)
+    connection = getattr(raw, "connection", None) or getattr(raw, "_connection", None)
+    sock = getattr(connection, "sock", None)
+    if sock is not None:
+        return sock
+
+    # http.client detaches the socket from the connection for
+    # "Connection: close" responses - reach it through the body reader
+    fp = getattr(getattr(raw, "_fp", None), "fp", None)
+    return getattr(getattr(fp, "raw", None), "_sock", None)
+
+
+def _shutdown_socket(sock):
+    if sock is None:
+        return
+    try:
+        sock.shutdown(socket.SHUT_RDWR)
+    except OSError:
+        pass
+
+
+def abort_response(response):
+    """Shut down the socket behind a streaming response from any thread"""
+    _shutdown_socket(_find_response_socket(response))
+
+
+# Cancel token of the request open_cancellable is sending on this thread
+_sending = threading.local()
+
+
+class _CancellableConnectionMixin:
+    """
+    Ties a pooled connection's socket to the cancel token of the request being sent
+
+    Only active while open_cancellable's helper thread is sending: the
+    token's callback shuts the socket down, so a provider that holds back
+    its headers is disconnected at cancel time instead of finishing (and
+    billing) the completion.
+    """
+
+    def connect(self):
+        super().connect()
+        token = getattr(_sending, "cancel_token", None)
+        if token is not None and token.is_cancelled():
+            _shutdown_socket(self.sock)
+
+    def putrequest(self, *args, **kwargs):
+        token = getattr(_sending, "cancel_token", None)
+        if token is not None:
+            abort = lambda: _shutdown_socket(self.sock)
+            _sending.aborts.append(abort)
+            token.add_callback(abort)
+        return super().putrequest(*args, **kwargs)
+
+
+if HTTPConnectionPool is not None:
+    class _CancellableHTTPConnection(_CancellableConnectionMixin, HTTPConnection):
+        pass
+
+    class _CancellableHTTPSConnection(_CancellableConnectionMixin, HTTPSConnection):
+        pass
+
+    class _CancellableHTTPConnectionPool(HTTPConnectionPool):
+        ConnectionCls = _CancellableHTTPConnection
+
+    class _CancellableHTTPSConnectionPool(HTTPSConnectionPool):
+        ConnectionCls = _CancellableHTTPSConnection
+
+
+class CancellableHTTPAdapter(HTTPAdapter):
+    """HTTPAdapter whose pooled connections can be shut down by open_cancellable's cancel token"""
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        if HTTPConnectionPool is not None:
+            self.poolmanager.pool_classes_by_scheme = {
+                "http": _CancellableHTTPConnectionPool,
+                "https": _CancellableHTTPSConnectionPool
+            }
+
+
+class ConnectionPoolManager:
+    """
+    Keep-alive connection pools for every outbound JARVIS HTTP call
+
+    One requests.Session per provider key (openrouter, openai, google,
+    deepseek, web...) so TCP+TLS handshakes are paid once per endpoint
+    instead of once per message.
+
+    Features:
+    - Tuned pool sizes per provider
+    - Transport-level retries (connection errors, 502/503/504)
+    - Optional HTTP/2 via httpx when HTTP2_ENABLED=true
+    - Pool hit/miss counters to confirm connections are reused
+    """
+
+    # Max connections kept alive per provider (concurrent requests to one host)
+    POOL_SIZES = {
+        "openrouter": 10,
+        "openai": 4,
+        "google": 4,
+        "deepseek": 4,
+        "mock": 10,
+        "web": 8
+    }
+
+    def __init__(self, pool_connections=None, pool_maxsize=None, max_retries=None, http2=None):
+        self.pool_connections = pool_connections or int(os.environ.get("HTTP_POOL_CONNECTIONS", "4"))
+        self.pool_maxsize = pool_maxsize or int(os.environ.get("HTTP_POOL_MAXSIZE", "10"))
+        self.max_retries = max_retries if max_retries is not None else int(os.environ.get("HTTP_MAX_RETRIES", "2"))
+
+        if http2 is None:
+            http2 = os.environ.get("HTTP2_ENABLED", "false").lower() == "true"
+        self.http2_enabled = http2 and self._http2_available()
+
+        self.sessions = {}
+        self.http2_clients = {}
+        self.request_counts = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _http2_available():
+        """Check that httpx and the h2 package are both installed"""
+        if httpx is None:
+            return False
+        try:
+            import h2  # noqa: F401
+            return True
+        except ImportError:
+            return False
+
+    def _build_retry(self):
+        """
+        Transport-level retry policy
+
+        Connect errors are retried for every method - the request never
+        left, so a POST cannot be billed twice. Status retries (502/503/504)
+        only cover idempotent GET/HEAD: completion POSTs are paid, and their
+        retries belong to _send_with_failover, which already applies health
+        retries and the model failover chain.
+        """
+        if Retry is None:
+            return self.max_retries
+
+        return Retry(
+            total=self.max_retries,
+            connect=self.max_retries,
+            read=0,
+            status=self.max_retries,
+            backoff_factor=0.3,
+            status_forcelist=(502, 503, 504),
+            allowed_methods=frozenset(["GET", "HEAD"]),
+            respect_retry_after_header=True,
+            raise_on_status=False
+        )
+
+    def get_session(self, key):
+        """Get (or lazily create) the keep-alive session for a provider key"""
+        session = self.sessions.get(key)
+        if session is not None:
+            return session
+
+        with self._lock:
+            if key not in self.sessions:
+                pool_size = self.POOL_SIZES.get(key, self.pool_maxsize)
+                adapter = CancellableHTTPAdapter(
+                    pool_connections=self.pool_connections,
+                    pool_maxsize=pool_size,
+                    max_retries=self._build_retry()
+                )
+                session = requests.Session()
+                session.mount("https://", adapter)
+                session.mount("http://", adapter)
+                self.sessions[key] = session
+            return self.sessions[key]
+
+    def _get_http2_client(self, key):
+        """Get (or lazily create) the HTTP/2 client for a provider key"""
+        client = self.http2_clients.get(key)
+        if client is not None:
+            return client
+
+        with self._lock:
+            if key not in self.http2_clients:
+                pool_size = self.POOL_SIZES.get(key, self.pool_maxsize)
+                self.http2_clients[key] = httpx.Client(
+                    http2=True,
+                    follow_redirects=True,
+                    limits=httpx.Limits(
+                        max_connections=pool_size,
+                        max_keepalive_connections=pool_size
+                    ),
+                    transport=httpx.HTTPTransport(http2=True, retries=self.max_retries)
+                )
+            return self.http2_clients[key]
+
+    def request(self, key, method, url, **kwargs):
+        """
+        Send a request through the pool for the given provider key
+
+        Args:
+            key: Provider key (e.g. "openrouter", "google", "web")
+            method: HTTP method
+            url: Target URL
+            **kwargs: Passed through to requests (json, headers, timeout, stream...)
+
+        Returns:
+            Response object with .status_code, .json() and .text
+        """
+        self.request_counts[key] = self.request_counts.get(key, 0) + 1
+
+        # Streaming responses always use the requests transport
+        if self.http2_enabled and not kwargs.get("stream"):
+            kwargs.pop("stream", None)
+            try:
+                return self._get_http2_client(key).request(method, url, **kwargs)
+            except httpx.HTTPError as e:
+                # Surface transport errors the same way as the requests path
+                raise requests.exceptions.ConnectionError(str(e))
+
+        return self.get_session(key).request(method, url, **kwargs)
+
+    def post(self, key, url, **kwargs):
+        """POST through the pool for the given provider key"""
+        return self.request(key, "POST", url, **kwargs)
+
+    def get(self, key, url, **kwargs):
+        """GET through the pool for the given provider key"""
+        return self.request(key, "GET", url, **kwargs)
+
+    def open_cancellable(self, key, method, url, cancel_token, **kwargs):
+        """
+        Send a streaming request whose wait for response headers can be cancelled
+
+        Providers often send no headers until the whole completion is ready,
+        so the blocking send runs on a helper thread. While it sends, the
+        connection's socket is tied to the token: cancelling shuts it down,
+        which disconnects from the provider and unblocks the helper thread,
+        and the caller gets RequestCancelled at once.
+
+        Returns:
+            Streaming response - the caller must close it (use it in a with block)
+
+        Raises:
+            RequestCancelled: If the token fired before the headers arrived
+        """
+        if cancel_token.is_cancelled():
+            raise RequestCancelled("Request cancelled before sending")
+
+        kwargs["stream"] = True
+        done = threading.Event()
+        outcome = {}
+
+        def send():
+            _sending.cancel_token = cancel_token
+            _sending.aborts = []
+            try:
+                outcome["response"] = self.request(key, method, url, **kwargs)
+            except Exception as e:
+                outcome["error"] = e
+            finally:
+                # Headers are in - the connection goes back to the pool once the body is read
+                for abort in _sending.aborts:
+                    cancel_token.remove_callback(abort)
+                _sending.cancel_token = None
+                _sending.aborts = []
+                done.set()
+                if cancel_token.is_cancelled() and "response" in outcome:
+                    outcome["response"].close()
+
+        cancel_token.add_callback(done.set)
+        threading.Thread(target=send, daemon=True).start()
+        done.wait()
+        cancel_token.remove_callback(done.set)
+
+        if cancel_token.is_cancelled():
+            if "response" in outcome:
+                outcome["response"].close()
+            raise RequestCancelled("Request cancelled while waiting for the provider")
+        if "error" in outcome:
+            raise outcome["error"]
+        return outcome["response"]
+
+    def post_json_cancellable(self, key, url, cancel_token, chunk_size=4096, check_response=None, **kwargs):
+        """
+        POST and decode a JSON response, aborting as soon as cancel_token fires
+
+        Once response headers arrive the live socket is tied to the token, so
+        a cancelled request closes its connection instead of waiting out the
+        full provider timeout.
+
+        Args:
+            key: Provider key
+            url: Target URL
+            cancel_token: CancelToken for this request
+            chunk_size: Read size in bytes
+            check_response: Optional callable(response) run once headers arrive,
+                e.g. to raise on HTTP error statuses
+            **kwargs: Passed through to requests (json, headers, timeout...)
+
+        Returns:
+            dict: Decoded JSON response
+
+        Raises:
+            RequestCancelled: If the token was cancelled before the body completed
+        """
+        with self.open_cancellable(key, "POST", url, cancel_token, **kwargs) as response:
+            if check_response:
+                check_response(response)
+            abort = lambda: abort_response(response)
+            cancel_token.add_callback(abort)
+            try:
+                body = []
+                for chunk in response.iter_content(chunk_size=chunk_size):
+                    if cancel_token.is_cancelled():
+                        break
+                    body.append(chunk)
+            except (requests.exceptions.RequestException, OSError):
+                if not cancel_token.is_cancelled():
+                    raise
+            finally:
+                cancel_token.remove_callback(abort)
+
+        if cancel_token.is_cancelled():
+            raise RequestCancelled("Request cancelled while waiting for the provider")
+
+        return json.loads(b"".join(body))
+
+    def _count_pool(self, session):
+        """Sum (connections opened, requests sent) over a session's urllib3 pools"""
+        connections_opened = 0
+        requests_sent = 0
+        seen = set()
+
+        for adapter in session.adapters.values():
+            if id(adapter) in seen:
+                continue
+            seen.add(id(adapter))
+
+            pools = adapter.poolmanager.pools
+            for pool_key in list(pools.keys()):
+                try:
+                    pool = pools[pool_key]
+                except KeyError:
+                    continue
+                connections_opened += getattr(pool, "num_connections", 0)
+                requests_sent += getattr(pool, "num_requests", 0)
+
+        return connections_opened, requests_sent
+
+    def connections_opened(self, key):
+        """Connections opened so far for a provider key (None when HTTP/2 hides the count)"""
+        if self.http2_enabled:
+            return None
+        session = self.sessions.get(key)
+        if session is None:
+            return 0
+        return self._count_pool(session)[0]
+
+    def get_pool_stats(self):
+        """
+        Get connection reuse statistics per provider key
+
+        A miss is a freshly opened connection (full TCP+TLS handshake),
+        a hit is a request served on an already-open keep-alive connection.
+
+        Returns:
+            dict: Per-key hit/miss counts plus totals
+        """
+        stats = {}
+        total_hits = 0
+        total_misses = 0
+
+        for key, session in list(self.sessions.items()):
+            connections_opened, requests_sent = self._count_pool(session)
+
+            hits = max(requests_sent - connections_opened, 0)
+            stats[key] = {
+                "transport": "http/1.1",
+                "requests": self.request_counts.get(key, 0),
+                "hits": hits,
+                "misses": connections_opened,
+                "hit_rate": round(hits / requests_sent, 3) if requests_sent else 0.0
+            }
+            total_hits += hits
+            total_misses += connections_opened
+
+        for key in self.http2_clients:
+            stats.setdefault(key, {
+                "transport": "http/2",
+                "requests": self.request_counts.get(key, 0)
+            })
+
+        total = total_hits + total_misses
+        return {
+            "pools": stats,
+            "total_hits": total_hits,
+            "total_misses": total_misses,
+            "hit_rate": round(total_hits / total, 3) if total else 0.0,
+            "http2_enabled": self.http2_enabled
+        }
+
+    def close(self):
+        """Close all pooled connections"""
+        with self._lock:
+            for session in self.sessions.values():
+                session.close()
+            for client in self.http2_clients.values():
+                client.close()
+            self.sessions = {}
+            self.http2_clients = {}
+
+
+# Singleton instance shared by every JarvisAI in the process
+_connection_pool_instance = None
+
+def get_connection_pool():
+    """Get singleton instance of ConnectionPoolManager"""
+    global _connection_pool_instance
+
+    if _connection_pool_instance is None:
+        _connection_pool_instance = ConnectionPoolManager()
+
+    return _connection_pool_instance
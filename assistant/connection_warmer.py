@@ -0,0 +1,202 @@
+# connection_warmer.py - Background connection pre-warming and keep-alive pings for provider endpoints
+
+import os
+import time
+import threading
+from urllib.parse import urlsplit
+
+
+def endpoint_origin(url):
+    """Get scheme://host[:port]/ for an endpoint - never carries paths or query keys"""
+    parts = urlsplit(url)
+    return f"{parts.scheme}://{parts.netloc}/"
+
+
+class ConnectionWarmer:
+    """
+    Keeps the active model's endpoint connection open before it is needed
+
+    warm() sends a cheap HEAD to the endpoint's origin on a background
+    thread so DNS + TCP + TLS are paid before the first message. Warmed
+    targets that sit idle get a HEAD ping every KEEPALIVE_INTERVAL seconds
+    so the provider does not close the pooled connection.
+
+    The first request after start-up or a model switch is classified as
+    cold (opened a new connection) or warm (reused one) and its latency
+    recorded, so the effect of pre-warming is measurable.
+    """
+
+    def __init__(self, pool, interval=None, max_targets=None, enabled=None):
+        self.pool = pool
+        self.interval = interval or float(os.environ.get("KEEPALIVE_INTERVAL", "45"))
+        self.max_targets = max_targets or int(os.environ.get("PREWARM_MAX_TARGETS", "2"))
+        if enabled is None:
+            enabled = os.environ.get("PREWARM_ENABLED", "true").lower() == "true"
+        self.enabled = enabled
+
+        # origin -> {"key", "last_used", "warmed_at", "warm_time", "first_pending"}
+        self.targets = {}
+        self.warming = set()
+        self.first_request = {"cold": {"count": 0, "total": 0.0}, "warm": {"count": 0, "total": 0.0}}
+        self.warmups = 0
+        self.warm_failures = 0
+        self.pings = 0
+        self.ping_failures = 0
+
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _ping(self, key, origin, timeout=5):
+        """HEAD the origin through the provider's pool - any HTTP status keeps the connection"""
+        response = self.pool.request(key, "HEAD", origin, timeout=timeout)
+        response.close()
+
+    def warm(self, key, url, background=True):
+        """
+        Open a pooled connection to an endpoint ahead of the first request
+
+        With PREWARM_ENABLED=false the endpoint is only tracked, so the
+        first-request metric shows the cold baseline.
+
+        Args:
+            key: Provider pool key
+            url: Endpoint URL (only its origin is contacted)
+            background: Warm on a daemon thread instead of blocking
+        """
+        if not url:
+            return
+        origin = endpoint_origin(url)
+
+        with self._lock:
+            target = self.targets.pop(origin, None) or {"key": key, "warmed_at": None, "warm_time": None}
+            target["last_used"] = time.time()
+            target["first_pending"] = True
+            self.targets[origin] = target
+            # Only the most recently selected endpoints are kept alive
+            while len(self.targets) > self.max_targets:
+                self.targets.pop(next(iter(self.targets)))
+            if not self.enabled or origin in self.warming:
+                return
+            self.warming.add(origin)
+
+        self._ensure_keepalive()
+        if background:
+            threading.Thread(target=self._warm, args=(key, origin), daemon=True).start()
+        else:
+            self._warm(key, origin)
+
+    def _warm(self, key, origin):
+        start = time.time()
+        try:
+            self._ping(key, origin)
+        except Exception as e:
+            with self._lock:
+                self.warm_failures += 1
+            print(f"⚠️ Connection warm-up failed for {origin}: {str(e)}")
+            return
+        finally:
+            with self._lock:
+                self.warming.discard(origin)
+
+        with self._lock:
+            self.warmups += 1
+            target = self.targets.get(origin)
+            if target is not None:
+                target["warmed_at"] = time.time()
+                target["warm_time"] = round(time.time() - start, 3)
+
+    def begin_request(self, key, url):
+        """
+        Mark a real request to an endpoint
+
+        Returns:
+            tuple: Probe for end_request if this is the first request since
+            warm-up/switch, otherwise None
+        """
+        origin = endpoint_origin(url)
+        with self._lock:
+            target = self.targets.get(origin)
+            if target is None:
+                return None
+            target["last_used"] = time.time()
+            if not target.pop("first_pending", False):
+                return None
+        opened = self.pool.connections_opened(key)
+        return (key, opened) if opened is not None else None
+
+    def end_request(self, probe, latency):
+        """Record the first request's latency as cold or warm"""
+        if probe is None:
+            return
+        key, opened_before = probe
+        opened_after = self.pool.connections_opened(key)
+        kind = "cold" if opened_after is not None and opened_after > opened_before else "warm"
+        with self._lock:
+            self.first_request[kind]["count"] += 1
+            self.first_request[kind]["total"] += latency
+
+    def _ensure_keepalive(self):
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._keepalive_loop, daemon=True)
+            self._thread.start()
+
+    def _keepalive_loop(self):
+        while not self._stop.wait(self.interval / 3):
+            now = time.time()
+            with self._lock:
+                idle = [(target["key"], origin) for origin, target in self.targets.items()
+                        if now - target["last_used"] >= self.interval and origin not in self.warming]
+            for key, origin in idle:
+                try:
+                    self._ping(key, origin)
+                    with self._lock:
+                        self.pings += 1
+                except Exception:
+                    with self._lock:
+                        self.ping_failures += 1
+                with self._lock:
+                    if origin in self.targets:
+                        self.targets[origin]["last_used"] = time.time()
+
+    def stop(self):
+        """Stop the keep-alive thread"""
+        self._stop.set()
+
+    def get_stats(self):
+        """Get warm-up/ping counts and cold vs warm first-request latency"""
+        with self._lock:
+            first_request = {
+                kind: {
+                    "count": values["count"],
+                    "avg_latency": round(values["total"] / values["count"], 3) if values["count"] else None
+                }
+                for kind, values in self.first_request.items()
+            }
+            return {
+                "enabled": self.enabled,
+                "targets": {origin: {"key": target["key"], "warm_time": target["warm_time"]}
+                            for origin, target in self.targets.items()},
+                "warmups": self.warmups,
+                "warm_failures": self.warm_failures,
+                "pings": self.pings,
+                "ping_failures": self.ping_failures,
+                "first_request": first_request
+            }
+
+
+# Singleton instance shared by every JarvisAI in the process
+_connection_warmer_instance = None
+
+def get_connection_warmer(pool=None):
+    """Get singleton instance of ConnectionWarmer"""
+    global _connection_warmer_instance
+
+    if _connection_warmer_instance is None:
+        from .connection_pool import get_connection_pool
+        _connection_warmer_instance = ConnectionWarmer(pool or get_connection_pool())
+
+    return _connection_warmer_instance
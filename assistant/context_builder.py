@@ -0,0 +1,167 @@
+# context_builder.py - Token-budgeted conversation context for provider requests
+
+import os
+import time
+
+from .message import Message
+
+# Optional exact tokenizer - pip install tiktoken
+try:
+    import tiktoken
+    _encoding = tiktoken.get_encoding("cl100k_base")
+except Exception:
+    _encoding = None
+
+
+# Per-message framing overhead (role markers, separators)
+MESSAGE_OVERHEAD = 4
+
+# Default history+prompt budgets per provider, in tokens
+PROVIDER_BUDGETS = {
+    "openai": 6000,
+    "google": 8000,
+    "deepseek": 6000,
+    "openrouter": 4000
+}
+DEFAULT_BUDGET = 4000
+
+
+def estimate_tokens(text):
+    """Estimate the token count of a string (exact when tiktoken is installed)"""
+    if not text:
+        return 0
+    if _encoding is not None:
+        return len(_encoding.encode(text, disallowed_special=()))
+    # ~4 characters per token for English prose and code
+    return len(text) // 4 + 1
+
+
+def message_tokens(message):
+    """
+    Get the cached token estimate of a history message
+
+    The estimate is stored on the message under "tokens" the first time it
+    is needed (normally when the message is appended), so it is never
+    recomputed for every request.
+    """
+    tokens = message.get("tokens")
+    if tokens is None:
+        tokens = estimate_tokens(message.get("content", "")) + MESSAGE_OVERHEAD
+        message["tokens"] = tokens
+    return tokens
+
+
+def make_message(role, content):
+    """Create a compact history message with its timestamp and token estimate precomputed"""
+    message = Message(role, content, created=time.time())
+    message_tokens(message)
+    return message
+
+
+def trim_to_tokens(text, max_tokens):
+    """Cut text down to roughly max_tokens, keeping the beginning"""
+    if _encoding is not None:
+        tokens = _encoding.encode(text, disallowed_special=())
+        if len(tokens) <= max_tokens:
+            return text
+        return _encoding.decode(tokens[:max_tokens]) + " ... [trimmed]"
+
+    max_chars = max_tokens * 4
+    if len(text) <= max_chars:
+        return text
+    return text[:max_chars] + " ... [trimmed]"
+
+
+class ContextBuilder:
+    """
+    Packs the most recent conversation turns into a per-model token budget
+
+    Walks history newest-first and keeps whole messages while they fit.
+    Older assistant turns above max_old_assistant_tokens are trimmed
+    (long code dumps and file pastes rarely matter verbatim a few turns
+    later), and the window never starts with an orphaned assistant turn.
+    """
+
+    def __init__(self, budget=None, max_old_assistant_tokens=None, recent_turns=2):
+        """
+        Args:
+            budget: Fixed token budget for every model (CONTEXT_TOKEN_BUDGET)
+            max_old_assistant_tokens: Trim threshold for older assistant turns
+                (CONTEXT_MAX_OLD_ASSISTANT_TOKENS)
+            recent_turns: Number of newest messages never trimmed
+        """
+        env_budget = os.environ.get("CONTEXT_TOKEN_BUDGET")
+        self.budget = budget or (int(env_budget) if env_budget else None)
+        self.max_old_assistant_tokens = max_old_assistant_tokens or int(
+            os.environ.get("CONTEXT_MAX_OLD_ASSISTANT_TOKENS", "400")
+        )
+        self.recent_turns = recent_turns
+
+    def get_budget(self, model_config):
+        """Get the prompt token budget for a model (model config "context_budget" wins)"""
+        if model_config.get("context_budget"):
+            return model_config["context_budget"]
+        if self.budget:
+            return self.budget
+        return PROVIDER_BUDGETS.get(model_config.get("provider"), DEFAULT_BUDGET)
+
+    def build(self, history, model_config, reserved_tokens=0):
+        """
+        Select the history window for a request
+
+        Args:
+            history: Full conversation history (list of message dicts)
+            model_config: Configuration of the target model
+            reserved_tokens: Tokens already used by the system prompt and
+                the new user message
+
+        Returns:
+            tuple: (messages, report) - clean role/content dicts oldest-first,
+                and a report with budget, tokens carried, trimmed and dropped counts
+        """
+        budget = self.get_budget(model_config)
+        remaining = budget - reserved_tokens
+        selected = []
+        trimmed = 0
+
+        for position, message in enumerate(reversed(history)):
+            content = message.get("content", "")
+            tokens = message_tokens(message)
+
+            if (message.get("role") == "assistant" and position >= self.recent_turns
+                    and tokens - MESSAGE_OVERHEAD > self.max_old_assistant_tokens):
+                content = trim_to_tokens(content, self.max_old_assistant_tokens)
+                tokens = estimate_tokens(content) + MESSAGE_OVERHEAD
+                trimmed += 1
+
+            if tokens > remaining:
+                # Squeeze in the start of an assistant turn rather than stopping on it
+                if message.get("role") == "assistant" and remaining > MESSAGE_OVERHEAD + 50:
+                    content = trim_to_tokens(content, remaining - MESSAGE_OVERHEAD)
+                    tokens = estimate_tokens(content) + MESSAGE_OVERHEAD
+                    trimmed += 1
+                    if tokens <= remaining:
+                        selected.append({"role": message["role"], "content": content})
+                        remaining -= tokens
+                break
+
+            selected.append({"role": message["role"], "content": content})
+            remaining -= tokens
+
+        # Windows must open on a user turn (Gemini rejects a leading model turn)
+        while selected and selected[-1]["role"] == "assistant":
+            dropped_message = selected.pop()
+            remaining += estimate_tokens(dropped_message["content"]) + MESSAGE_OVERHEAD
+
+        selected.reverse()
+        history_tokens = budget - reserved_tokens - remaining
+
+        report = {
+            "budget": budget,
+            "history_messages": len(selected),
+            "history_tokens": history_tokens,
+            "prompt_tokens": history_tokens + reserved_tokens,
+            "trimmed": trimmed,
+            "dropped": len(history) - len(selected)
+        }
+        return selected, report
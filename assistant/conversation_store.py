@@ -0,0 +1,266 @@
+# conversation_store.py - SQLite FTS5 index of conversation messages for ranked history search
+
+import os
+import re
+import time
+import sqlite3
+import threading
+from datetime import datetime
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS messages (
+    id INTEGER PRIMARY KEY,
+    role TEXT NOT NULL,
+    content TEXT NOT NULL,
+    created REAL
+);
+CREATE INDEX IF NOT EXISTS messages_created ON messages (created);
+CREATE VIRTUAL TABLE IF NOT EXISTS messages_fts USING fts5(
+    content, role, content='messages', content_rowid='id', tokenize='porter unicode61'
+);
+CREATE TRIGGER IF NOT EXISTS messages_ai AFTER INSERT ON messages BEGIN
+    INSERT INTO messages_fts (rowid, content, role) VALUES (new.id, new.content, new.role);
+END;
+CREATE TRIGGER IF NOT EXISTS messages_ad AFTER DELETE ON messages BEGIN
+    INSERT INTO messages_fts (messages_fts, rowid, content, role) VALUES ('delete', old.id, old.content, old.role);
+END;
+"""
+
+# Matches counted exactly up to this many - beyond it totals show as "1000+"
+COUNT_LIMIT = 1000
+
+# Very broad queries rank only this many of their newest matches
+RANK_WINDOW = 5000
+
+# role:user  after:2026-01-31  before:2026-02-01  page:2
+FILTER_PATTERN = re.compile(r"\b(role|after|before|page):(\S+)", re.IGNORECASE)
+TERM_PATTERN = re.compile(r'"([^"]+)"|(\S+)')
+
+
+def parse_search_query(text):
+    """
+    Split a search command into an FTS5 MATCH expression and filters
+
+    Supports "exact phrases", prefix* terms and role:/after:/before:/page:
+    filters. Every other word is quoted, so punctuation and FTS5 keywords
+    in user text can never produce a syntax error.
+
+    Returns:
+        tuple: (match expression or None, filters dict)
+    """
+    filters = {}
+    for name, value in FILTER_PATTERN.findall(text):
+        filters[name.lower()] = value
+    text = FILTER_PATTERN.sub(" ", text)
+
+    terms = []
+    for phrase, word in TERM_PATTERN.findall(text):
+        if phrase:
+            terms.append('"' + phrase.replace('"', '""') + '"')
+            continue
+        prefix = word.endswith("*")
+        word = word.rstrip("*").replace('"', '""')
+        if word:
+            terms.append(f'"{word}"' + ("*" if prefix else ""))
+
+    return (" ".join(terms) or None), filters
+
+
+def _parse_date(value):
+    try:
+        return datetime.strptime(value, "%Y-%m-%d").timestamp()
+    except ValueError:
+        return None
+
+
+class ConversationStore:
+    """
+    Searchable archive of every conversation message
+
+    Messages are mirrored into a SQLite table with an external-content
+    FTS5 index (porter stemming), so search is a ranked index lookup
+    (BM25) instead of a scan of the history list. WAL mode lets the
+    terminal, GUI and voice processes share the file.
+
+    Queries stay inside the index: FTS5 sorts by its own rank and builds
+    snippets only for the returned page, the role filter is an FTS column
+    filter, and date filters become rowid bounds (ids grow with time)
+    found through the created index. Match counts stop at COUNT_LIMIT, and
+    a query matching more than RANK_WINDOW messages is ranked among its
+    newest RANK_WINDOW matches, so common words cannot force BM25 over
+    the whole archive.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._conn = sqlite3.connect(path, timeout=5, isolation_level=None, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("PRAGMA busy_timeout=5000")
+        self._conn.executescript(SCHEMA)
+
+    def add(self, messages, created=None):
+        """Index messages (role/content mappings) - a message's own "created" wins, else created (default now, 0 = unknown)"""
+        if not messages:
+            return
+        created = created if created is not None else time.time()
+        rows = [(m.get("role", "unknown"), m.get("content", ""), m.get("created") or created) for m in messages]
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._conn.executemany("INSERT INTO messages (role, content, created) VALUES (?, ?, ?)", rows)
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def clear(self):
+        """Remove every message and rebuild an empty index"""
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._conn.execute("DELETE FROM messages")
+                self._conn.execute("INSERT INTO messages_fts (messages_fts) VALUES ('delete-all')")
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def count(self):
+        """Number of stored messages"""
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM messages").fetchone()[0]
+
+    def search(self, query, role=None, after=None, before=None, limit=5, offset=0):
+        """
+        Ranked full-text search
+
+        Args:
+            query: FTS5 MATCH expression (see parse_search_query)
+            role: Only messages with this role
+            after: Only messages created at/after this timestamp
+            before: Only messages created before this timestamp
+            limit: Results per page
+            offset: Results to skip
+
+        Returns:
+            tuple: (total matches - capped at COUNT_LIMIT + 1, [{"id", "role", "created", "snippet", "rank"}])
+        """
+        match = "{content} : (" + query + ")"
+        if role:
+            match += ' AND role : "' + role.replace('"', '""') + '"'
+        where = ["messages_fts MATCH ?"]
+        params = [match]
+
+        with self._lock:
+            if after is not None:
+                first_id = self._conn.execute("SELECT MIN(id) FROM messages WHERE created >= ?", (after,)).fetchone()[0]
+                if first_id is None:
+                    return 0, []
+                where.append("rowid >= ?")
+                params.append(first_id)
+            if before is not None:
+                end_id = self._conn.execute("SELECT MIN(id) FROM messages WHERE created >= ?", (before,)).fetchone()[0]
+                if end_id is not None:
+                    where.append("rowid < ?")
+                    params.append(end_id)
+            condition = " AND ".join(where)
+
+            total = self._conn.execute(
+                f"SELECT COUNT(*) FROM (SELECT 1 FROM messages_fts WHERE {condition} LIMIT ?)",
+                params + [COUNT_LIMIT + 1]
+            ).fetchone()[0]
+            if total > COUNT_LIMIT:
+                window_start = self._conn.execute(
+                    f"SELECT rowid FROM messages_fts WHERE {condition} ORDER BY rowid DESC LIMIT 1 OFFSET ?",
+                    params + [RANK_WINDOW - 1]
+                ).fetchone()
+                if window_start:
+                    condition += " AND rowid >= ?"
+                    params.append(window_start[0])
+            rows = self._conn.execute(
+                "SELECT rowid, role, snippet(messages_fts, 0, '[', ']', '…', 16), rank "
+                f"FROM messages_fts WHERE {condition} ORDER BY rank LIMIT ? OFFSET ?",
+                params + [limit, offset]
+            ).fetchall()
+            created = dict(self._conn.execute(
+                f"SELECT id, created FROM messages WHERE id IN ({','.join('?' * len(rows))})",
+                [row[0] for row in rows]
+            ).fetchall()) if rows else {}
+
+        results = [
+            {"id": row[0], "role": row[1], "created": created.get(row[0]), "snippet": row[2], "rank": round(-row[3], 3)}
+            for row in rows
+        ]
+        return total, results
+
+    def search_text(self, text, page_size=5):
+        """
+        Run a user search command and format the results
+
+        Returns:
+            str: Ranked results with snippets, or a no-match message
+        """
+        match, filters = parse_search_query(text)
+        if not match:
+            return "Please provide words to search for."
+
+        try:
+            page = max(1, int(filters.get("page", 1)))
+        except ValueError:
+            page = 1
+        after = _parse_date(filters["after"]) if "after" in filters else None
+        before = _parse_date(filters["before"]) if "before" in filters else None
+
+        start = time.perf_counter()
+        try:
+            total, results = self.search(match, filters.get("role"), after, before,
+                                         limit=page_size, offset=(page - 1) * page_size)
+        except sqlite3.OperationalError as e:
+            return f"Error: Invalid search query - {str(e)}"
+        elapsed_ms = (time.perf_counter() - start) * 1000
+
+        if not results:
+            return f"No matches found for '{text}' in conversation history."
+
+        if total > COUNT_LIMIT:
+            lines = [f"Found {COUNT_LIMIT}+ matches (page {page}, {elapsed_ms:.1f}ms):"]
+            more = len(results) == page_size
+        else:
+            pages = (total + page_size - 1) // page_size
+            lines = [f"Found {total} matches (page {page}/{pages}, {elapsed_ms:.1f}ms):"]
+            more = page < pages
+        for result in results:
+            when = datetime.fromtimestamp(result["created"]).strftime("%Y-%m-%d %H:%M") if result["created"] else "earlier"
+            lines.append(f"[{when}] {result['role']}: {result['snippet']}")
+        if more:
+            lines.append(f"More: add page:{page + 1} to your search")
+        return "\n".join(lines)
+
+    def close(self):
+        """Close the database connection"""
+        with self._lock:
+            self._conn.close()
+
+
+def create_conversation_store():
+    """
+    Open the FTS5 conversation store
+
+    CONVERSATION_STORE=false disables it; CONVERSATION_STORE_PATH moves the
+    file (default memory/conversations.sqlite3).
+
+    Returns:
+        ConversationStore: or None when disabled or SQLite lacks FTS5
+    """
+    if os.environ.get("CONVERSATION_STORE", "true").lower() != "true":
+        return None
+    path = os.environ.get("CONVERSATION_STORE_PATH", os.path.join("memory", "conversations.sqlite3"))
+    try:
+        return ConversationStore(path)
+    except sqlite3.Error as e:
+        print(f"⚠️ Conversation search index unavailable ({str(e)}) - using simple search")
+        return None
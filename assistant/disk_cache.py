@@ -0,0 +1,216 @@
+# disk_cache.py - Byte-bounded SQLite response cache shared by every JARVIS process
+
+import os
+import time
+import sqlite3
+import threading
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    accessed REAL NOT NULL,
+    expires_at REAL
+);
+CREATE INDEX IF NOT EXISTS responses_accessed ON responses (accessed);
+CREATE INDEX IF NOT EXISTS responses_expires ON responses (expires_at) WHERE expires_at IS NOT NULL;
+CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value INTEGER NOT NULL);
+INSERT OR IGNORE INTO meta (name, value) VALUES ('total_bytes', 0);
+CREATE TRIGGER IF NOT EXISTS responses_insert AFTER INSERT ON responses BEGIN
+    UPDATE meta SET value = value + NEW.size WHERE name = 'total_bytes';
+END;
+CREATE TRIGGER IF NOT EXISTS responses_delete AFTER DELETE ON responses BEGIN
+    UPDATE meta SET value = value - OLD.size WHERE name = 'total_bytes';
+END;
+CREATE TRIGGER IF NOT EXISTS responses_update AFTER UPDATE OF size ON responses BEGIN
+    UPDATE meta SET value = value - OLD.size + NEW.size WHERE name = 'total_bytes';
+END;
+"""
+
+
+class DiskCache:
+    """
+    Persistent response cache behind the in-memory LRU
+
+    One SQLite file in WAL mode, so the terminal, GUI and voice processes
+    can read concurrently while one writes; writers wait up to
+    busy_timeout for each other instead of failing. A trigger-maintained
+    byte total keeps the size check O(1), and eviction removes the least
+    recently accessed rows through an index until the file is back under
+    max_bytes. Access times are only rewritten when older than
+    touch_interval, so hot reads stay read-only.
+
+    A database that cannot be opened disables the tier; later read/write
+    errors are reported and treated as misses - the memory cache keeps
+    working either way.
+    """
+
+    def __init__(self, path, max_bytes=None, ttl=None, touch_interval=60):
+        """
+        Args:
+            path: SQLite file path
+            max_bytes: Byte budget for stored keys + values (DISK_CACHE_MAX_MB, default 50)
+            ttl: Default seconds an entry stays valid (None = no expiry)
+            touch_interval: Minimum seconds between access-time updates of an entry
+        """
+        self.path = path
+        self.max_bytes = max_bytes or int(float(os.environ.get("DISK_CACHE_MAX_MB", "50")) * 1024 * 1024)
+        self.ttl = ttl
+        self.touch_interval = touch_interval
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.errors = 0
+        self._lock = threading.Lock()
+        self._conn = None
+
+        try:
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            self._conn = sqlite3.connect(path, timeout=5, isolation_level=None, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute("PRAGMA busy_timeout=5000")
+            self._conn.executescript(SCHEMA)
+        except sqlite3.Error as e:
+            self._disable(e)
+
+    def _disable(self, error):
+        print(f"⚠️ Disk response cache disabled: {str(error)}")
+        self.errors += 1
+        if self._conn is not None:
+            try:
+                self._conn.close()
+            except sqlite3.Error:
+                pass
+        self._conn = None
+
+    @property
+    def enabled(self):
+        return self._conn is not None
+
+    def get(self, key):
+        """Get a stored value (None if missing or expired)"""
+        if self._conn is None:
+            return None
+        now = time.time()
+        with self._lock:
+            try:
+                row = self._conn.execute(
+                    "SELECT value, accessed, expires_at FROM responses WHERE key = ?", (key,)
+                ).fetchone()
+                if row is None:
+                    self.misses += 1
+                    return None
+                value, accessed, expires_at = row
+                if expires_at is not None and expires_at <= now:
+                    self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                    self.misses += 1
+                    return None
+                if now - accessed >= self.touch_interval:
+                    self._conn.execute("UPDATE responses SET accessed = ? WHERE key = ?", (now, key))
+                self.hits += 1
+                return value
+            except sqlite3.Error as e:
+                self.errors += 1
+                print(f"⚠️ Disk cache read failed: {str(e)}")
+                return None
+
+    def put(self, key, value, ttl=None):
+        """Store a value, then evict least recently accessed rows beyond max_bytes"""
+        if self._conn is None:
+            return
+        ttl = self.ttl if ttl is None else ttl
+        now = time.time()
+        size = len(key.encode("utf-8")) + len(value.encode("utf-8"))
+        if size > self.max_bytes:
+            return
+
+        with self._lock:
+            try:
+                # IMMEDIATE takes the write lock up front so concurrent writers queue instead of deadlocking
+                self._conn.execute("BEGIN IMMEDIATE")
+                try:
+                    self._conn.execute(
+                        "INSERT INTO responses (key, value, size, accessed, expires_at) VALUES (?, ?, ?, ?, ?) "
+                        "ON CONFLICT(key) DO UPDATE SET value = excluded.value, size = excluded.size, "
+                        "accessed = excluded.accessed, expires_at = excluded.expires_at",
+                        (key, value, size, now, now + ttl if ttl else None)
+                    )
+                    self._evict_locked(now)
+                    self._conn.execute("COMMIT")
+                except Exception:
+                    self._conn.execute("ROLLBACK")
+                    raise
+            except sqlite3.Error as e:
+                self.errors += 1
+                print(f"⚠️ Disk cache write failed: {str(e)}")
+
+    def _total_bytes(self):
+        return self._conn.execute("SELECT value FROM meta WHERE name = 'total_bytes'").fetchone()[0]
+
+    def _evict_locked(self, now):
+        self._conn.execute("DELETE FROM responses WHERE expires_at IS NOT NULL AND expires_at <= ?", (now,))
+        while self._total_bytes() > self.max_bytes:
+            removed = self._conn.execute(
+                "DELETE FROM responses WHERE key IN "
+                "(SELECT key FROM responses ORDER BY accessed LIMIT 8)"
+            ).rowcount
+            if not removed:
+                break
+            self.evictions += removed
+
+    def clear(self):
+        """Remove every stored entry"""
+        if self._conn is None:
+            return
+        with self._lock:
+            try:
+                self._conn.execute("DELETE FROM responses")
+            except sqlite3.Error as e:
+                self.errors += 1
+                print(f"⚠️ Disk cache clear failed: {str(e)}")
+
+    def close(self):
+        """Close the database connection"""
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    def get_stats(self):
+        """Get entry count, stored bytes and hit/miss/eviction counters"""
+        stats = {
+            "enabled": self.enabled,
+            "path": self.path,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "errors": self.errors
+        }
+        if self._conn is not None:
+            with self._lock:
+                try:
+                    stats["entries"] = self._conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+                    stats["bytes"] = self._total_bytes()
+                except sqlite3.Error:
+                    pass
+        return stats
+
+
+def create_disk_cache(ttl=None):
+    """
+    Create the on-disk response cache tier
+
+    DISK_CACHE=false disables it; DISK_CACHE_PATH moves the file
+    (default memory/response_cache.sqlite3).
+
+    Returns:
+        DiskCache: or None when disabled or the database cannot be opened
+    """
+    if os.environ.get("DISK_CACHE", "true").lower() != "true":
+        return None
+    cache = DiskCache(os.environ.get("DISK_CACHE_PATH", os.path.join("memory", "response_cache.sqlite3")), ttl=ttl)
+    return cache if cache.enabled else None
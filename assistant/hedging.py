@@ -0,0 +1,138 @@
+# hedging.py - Hedged requests across providers for tail-latency control
+
+import os
+import threading
+from collections import deque
+
+
+# Model families considered equivalent for hedging (matched against model_id)
+MODEL_FAMILIES = ["deepseek", "gemini", "gpt", "claude", "llama", "mistral", "qwen"]
+
+
+def get_model_family(model_config):
+    """Get the family keyword of a model (e.g. 'deepseek', 'gemini')"""
+    model_id = model_config.get("model_id", "").lower()
+    for family in MODEL_FAMILIES:
+        if family in model_id:
+            return family
+    return None
+
+
+def find_hedge_model(model_name, available_models, has_api_key, preferred=None):
+    """
+    Pick an equivalent model on a different provider to hedge against
+
+    Only a model of the same family (e.g. another provider's DeepSeek) is
+    picked automatically, so hedging never switches a request to an
+    unrelated or costlier model; any other hedge target has to be named
+    in HEDGE_MODEL.
+
+    Args:
+        model_name: The primary model
+        available_models: JarvisAI.available_models
+        has_api_key: Callable(model_name) -> bool
+        preferred: Optional explicit hedge model (HEDGE_MODEL)
+
+    Returns:
+        str: Hedge model name or None if no same-family candidate is usable
+    """
+    primary = available_models.get(model_name)
+    if not primary:
+        return None
+
+    if preferred and preferred in available_models and preferred != model_name:
+        if available_models[preferred]["provider"] != primary["provider"] and has_api_key(preferred):
+            return preferred
+
+    family = get_model_family(primary)
+    if not family:
+        return None
+
+    for candidate, config in available_models.items():
+        if candidate == model_name or config["provider"] == primary["provider"]:
+            continue
+        if get_model_family(config) == family and has_api_key(candidate):
+            return candidate
+
+    return None
+
+
+class HedgingPolicy:
+    """
+    Decides when to fire a hedge request and tracks how hedging performs
+
+    The hedge delay is a percentile of the primary model's recently observed
+    latencies, clamped to [min_delay, max_delay]. Until enough samples exist
+    the default delay is used.
+    """
+
+    def __init__(self, percentile=None, min_delay=None, max_delay=None, default_delay=None,
+                 window=100, min_samples=10):
+        self.percentile = percentile or float(os.environ.get("HEDGE_PERCENTILE", "95"))
+        self.min_delay = min_delay or float(os.environ.get("HEDGE_MIN_DELAY", "1.5"))
+        self.max_delay = max_delay or float(os.environ.get("HEDGE_MAX_DELAY", "20"))
+        self.default_delay = default_delay or float(os.environ.get("HEDGE_DEFAULT_DELAY", "8"))
+        self.preferred_model = os.environ.get("HEDGE_MODEL") or None
+        self.window = window
+        self.min_samples = min_samples
+
+        self.latencies = {}
+        self.stats = {
+            "requests": 0,
+            "hedges_fired": 0,
+            "primary_wins": 0,
+            "hedge_wins": 0,
+            "all_failed": 0
+        }
+        self._lock = threading.Lock()
+
+    def record_latency(self, model_name, seconds):
+        """Record a completed (or censored) primary latency sample"""
+        with self._lock:
+            samples = self.latencies.get(model_name)
+            if samples is None:
+                samples = self.latencies[model_name] = deque(maxlen=self.window)
+            samples.append(seconds)
+
+    def get_delay(self, model_name):
+        """Get the hedge delay in seconds for a primary model"""
+        with self._lock:
+            samples = sorted(self.latencies.get(model_name, ()))
+
+        if len(samples) < self.min_samples:
+            return self.default_delay
+
+        index = min(int(len(samples) * self.percentile / 100.0), len(samples) - 1)
+        return max(self.min_delay, min(self.max_delay, samples[index]))
+
+    def record_outcome(self, hedged, winner):
+        """
+        Record the outcome of one hedged-mode request
+
+        Args:
+            hedged: Whether a hedge request was fired
+            winner: "primary", "hedge" or None if every attempt failed
+        """
+        with self._lock:
+            self.stats["requests"] += 1
+            if hedged:
+                self.stats["hedges_fired"] += 1
+            if winner == "primary":
+                self.stats["primary_wins"] += 1
+            elif winner == "hedge":
+                self.stats["hedge_wins"] += 1
+            else:
+                self.stats["all_failed"] += 1
+
+    def get_stats(self):
+        """Get hedge rate, win statistics and current delays"""
+        with self._lock:
+            stats = dict(self.stats)
+            models = list(self.latencies)
+
+        requests = stats["requests"]
+        hedges = stats["hedges_fired"]
+        stats["hedge_rate"] = round(hedges / requests, 3) if requests else 0.0
+        stats["hedge_win_rate"] = round(stats["hedge_wins"] / hedges, 3) if hedges else 0.0
+        stats["delays"] = {model: round(self.get_delay(model), 2) for model in models}
+        return stats
@@ -0,0 +1,390 @@
+# history_journal.py - Append-only JSONL journal for conversation history
+
+import os
+import json
+import time
+import threading
+
+
+# Bytes read per step when scanning the journal backwards for its tail
+TAIL_BLOCK = 64 * 1024
+
+
+def _is_clear(line):
+    """Check whether a raw journal line is a clear record"""
+    if b'"op"' not in line:
+        return False
+    try:
+        return json.loads(line).get("op") == "clear"
+    except ValueError:
+        return False
+
+
+class HistoryJournal:
+    """
+    Crash-safe conversation history persistence
+
+    Every message is one JSON line appended to the journal, so saving a
+    turn costs two short writes instead of re-serializing the whole
+    history. Clearing appends a {"op": "clear"} record. Loading replays
+    the lines; a torn last line from a crash is skipped.
+
+    fsync follows HISTORY_FSYNC:
+      always   - after every append (safest, slowest)
+      interval - at most every HISTORY_FSYNC_INTERVAL seconds (default)
+      never    - leave it to the OS
+
+    Records before the last clear are dead weight; once they outnumber
+    the live ones the journal is compacted into a temporary file that
+    atomically replaces it. HISTORY_MAX_MESSAGES (0 = unlimited) also
+    caps how many messages compaction keeps.
+
+    load(tail=N) reads only the last N live messages, scanning the file
+    backwards, so startup cost does not grow with the journal. Record
+    counts and the offset where live messages start come from a small
+    .idx sidecar written on close and compaction; only lines appended
+    after it are scanned. iter_messages() streams the full history on
+    demand.
+    """
+
+    def __init__(self, path, legacy_path=None, fsync=None, fsync_interval=None, max_messages=None):
+        """
+        Args:
+            path: Journal file (.jsonl)
+            legacy_path: Old full-rewrite JSON file migrated once if the journal does not exist
+            fsync: "always", "interval" or "never"
+            fsync_interval: Seconds between fsyncs in interval mode
+            max_messages: Messages kept by compaction (0 = all)
+        """
+        self.path = path
+        self.legacy_path = legacy_path
+        self.fsync = (fsync or os.environ.get("HISTORY_FSYNC", "interval")).lower()
+        self.fsync_interval = fsync_interval if fsync_interval is not None else float(
+            os.environ.get("HISTORY_FSYNC_INTERVAL", "1.0")
+        )
+        self.max_messages = max_messages if max_messages is not None else int(
+            os.environ.get("HISTORY_MAX_MESSAGES", "0")
+        )
+
+        self.live_records = 0     # messages after the last clear
+        self.dead_records = 0     # lines a compaction would drop
+        self.appends = 0
+        self.compactions = 0
+        self.fsyncs = 0
+        self.last_fsync = 0.0
+        self.live_offset = None   # byte offset of the first live message (None = unknown)
+        self.index_path = path + ".idx"
+        self._file = None
+        self._lock = threading.Lock()
+
+    def _open(self):
+        if self._file is None:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            self._file = open(self.path, "a", encoding="utf-8")
+            # Start on a fresh line after a torn write so the next record stays readable
+            if self._file.tell() and not self._ends_with_newline():
+                self._file.write("\n")
+        return self._file
+
+    def _ends_with_newline(self):
+        with open(self.path, "rb") as f:
+            f.seek(-1, os.SEEK_END)
+            return f.read(1) == b"\n"
+
+    def _sync(self, force=False):
+        self._file.flush()
+        if self.fsync == "never" and not force:
+            return
+        if force or self.fsync == "always" or time.time() - self.last_fsync >= self.fsync_interval:
+            os.fsync(self._file.fileno())
+            self.last_fsync = time.time()
+            self.fsyncs += 1
+
+    def load(self, tail=None):
+        """
+        Replay the journal into a message list (migrating the legacy JSON file first if needed)
+
+        Args:
+            tail: Only return the last `tail` live messages (None = all)
+
+        Returns:
+            list: History messages, oldest first
+        """
+        if not os.path.exists(self.path) and self.legacy_path and os.path.exists(self.legacy_path):
+            self._migrate()
+
+        if tail is None:
+            messages, dead, torn, live_offset = self._replay()
+            with self._lock:
+                self.live_records = len(messages)
+                self.dead_records = dead + torn
+                self.live_offset = live_offset
+        else:
+            self._scan_counts()
+            messages, torn = self._read_tail(tail)
+            with self._lock:
+                self.dead_records += torn
+        if torn:
+            print(f"⚠️ Skipped {torn} damaged conversation journal line(s)")
+
+        if torn or self._needs_compaction():
+            self.compact(messages if tail is None else None)
+            if self.max_messages:
+                messages = messages[-self.max_messages:]
+        return messages
+
+    def _replay(self):
+        """Read the journal - returns (live messages, dead records, damaged lines, live offset)"""
+        messages = []
+        dead = 0
+        torn = 0
+        offset = 0
+        live_offset = 0
+        if not os.path.exists(self.path):
+            return messages, dead, torn, live_offset
+
+        with open(self.path, "rb") as f:
+            for line in f:
+                offset += len(line)
+                if not line.strip():
+                    continue
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    torn += 1
+                    continue
+                if record.get("op") == "clear":
+                    dead += len(messages) + 1
+                    messages = []
+                    live_offset = offset
+                else:
+                    messages.append(record)
+        return messages, dead, torn, live_offset
+
+    def _read_tail(self, count):
+        """Read the last `count` live messages by scanning backwards - returns (messages, damaged lines)"""
+        messages = []
+        torn = 0
+        if not os.path.exists(self.path) or count <= 0:
+            return messages, torn
+
+        with open(self.path, "rb") as f:
+            f.seek(0, os.SEEK_END)
+            position = f.tell()
+            remainder = b""
+            while position > 0 and len(messages) < count:
+                step = min(TAIL_BLOCK, position)
+                position -= step
+                f.seek(position)
+                lines = (f.read(step) + remainder).split(b"\n")
+                # The first piece may be the end of a line that starts in an earlier block
+                remainder = lines.pop(0) if position > 0 else b""
+                for line in reversed(lines):
+                    if not line.strip():
+                        continue
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        torn += 1
+                        continue
+                    if record.get("op") == "clear":
+                        position = 0
+                        break
+                    messages.append(record)
+                    if len(messages) >= count:
+                        break
+
+        messages.reverse()
+        return messages, torn
+
+    def _scan_counts(self):
+        """Bring record counts up to date, reading only what was appended since the index was written"""
+        size = os.path.getsize(self.path) if os.path.exists(self.path) else 0
+        index = self._read_index()
+        if index and index["bytes"] <= size:
+            start = index["bytes"]
+            live, dead, live_offset = index["live_records"], index["dead_records"], index["live_offset"]
+        else:
+            start, live, dead, live_offset = 0, 0, 0, 0
+
+        if size > start:
+            with open(self.path, "rb") as f:
+                f.seek(start)
+                offset = start
+                for line in f:
+                    offset += len(line)
+                    if not line.strip():
+                        continue
+                    if _is_clear(line):
+                        dead += live + 1
+                        live = 0
+                        live_offset = offset
+                    else:
+                        live += 1
+
+        with self._lock:
+            self.live_records = live
+            self.dead_records = dead
+            self.live_offset = live_offset
+            if size > start:
+                self._write_index()
+
+    def _read_index(self):
+        try:
+            with open(self.index_path, "r", encoding="utf-8") as f:
+                index = json.load(f)
+            if all(key in index for key in ("bytes", "live_records", "dead_records", "live_offset")):
+                return index
+        except (OSError, ValueError):
+            pass
+        return None
+
+    def _write_index(self):
+        """Record counts and the live offset for the next tail load (caller holds the lock)"""
+        if self.live_offset is None or not os.path.exists(self.path):
+            return
+        try:
+            tmp_path = self.index_path + ".tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump({
+                    "bytes": os.path.getsize(self.path),
+                    "live_records": self.live_records,
+                    "dead_records": self.dead_records,
+                    "live_offset": self.live_offset
+                }, f)
+            os.replace(tmp_path, self.index_path)
+        except OSError as e:
+            print(f"⚠️ Could not write conversation journal index: {str(e)}")
+
+    def iter_messages(self):
+        """
+        Stream every live message, oldest first, without loading the journal into memory
+
+        Yields:
+            dict: History messages
+        """
+        with self._lock:
+            if self._file is not None:
+                self._file.flush()
+        if self.live_offset is None:
+            self._scan_counts()
+        if not os.path.exists(self.path):
+            return
+
+        with open(self.path, "rb") as f:
+            f.seek(self.live_offset or 0)
+            for line in f:
+                if not line.strip():
+                    continue
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue
+                if "op" not in record:
+                    yield record
+
+    def _migrate(self):
+        """Convert the old conversation_history.json into a journal (kept as .migrated)"""
+        try:
+            with open(self.legacy_path, "r", encoding="utf-8") as f:
+                messages = json.load(f)
+            self.compact(messages)
+            os.replace(self.legacy_path, self.legacy_path + ".migrated")
+            print(f"✅ Migrated {len(messages)} messages to the conversation journal")
+        except Exception as e:
+            print(f"Error migrating conversation history: {str(e)}")
+
+    def append(self, messages):
+        """Append messages to the journal"""
+        if not messages:
+            return
+        lines = "".join(json.dumps(dict(message), ensure_ascii=False) + "\n" for message in messages)
+        with self._lock:
+            f = self._open()
+            f.write(lines)
+            self._sync()
+            self.live_records += len(messages)
+            self.appends += len(messages)
+
+    def clear(self, compact=True):
+        """Record that the history was cleared"""
+        with self._lock:
+            f = self._open()
+            f.write(json.dumps({"op": "clear"}) + "\n")
+            self._sync(force=True)
+            self.dead_records += self.live_records + 1
+            self.live_records = 0
+            self.live_offset = f.tell()
+        if compact:
+            self.compact([])
+
+    def _needs_compaction(self):
+        if self.max_messages and self.live_records > self.max_messages * 1.5:
+            return True
+        return self.dead_records > 100 and self.dead_records > self.live_records
+
+    def maybe_compact(self):
+        """Compact if dead records outnumber live ones (or the message cap is exceeded)"""
+        if self._needs_compaction():
+            self.compact()
+
+    def compact(self, messages=None):
+        """
+        Rewrite the journal to hold only its live messages
+
+        The journal itself is replayed (not the in-memory history, which the
+        memory governor may have trimmed). The new file is written and
+        fsynced under a temporary name, then renamed over the old one, so a
+        crash leaves either file intact.
+
+        Args:
+            messages: Exact messages to write instead (migration and clear)
+        """
+        tmp_path = self.path + ".tmp"
+        with self._lock:
+            try:
+                if messages is None:
+                    if self._file is not None:
+                        self._file.flush()
+                    messages = self._replay()[0]
+                if self.max_messages:
+                    messages = messages[-self.max_messages:]
+                os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+                with open(tmp_path, "w", encoding="utf-8") as f:
+                    for message in messages:
+                        f.write(json.dumps(dict(message), ensure_ascii=False) + "\n")
+                    f.flush()
+                    os.fsync(f.fileno())
+                if self._file is not None:
+                    self._file.close()
+                    self._file = None
+                os.replace(tmp_path, self.path)
+                self.live_records = len(messages)
+                self.dead_records = 0
+                self.live_offset = 0
+                self.compactions += 1
+                self._write_index()
+            except Exception as e:
+                print(f"Error compacting conversation journal: {str(e)}")
+
+    def close(self):
+        """Flush, fsync and close the journal"""
+        with self._lock:
+            if self._file is not None:
+                self._sync(force=True)
+                self._file.close()
+                self._file = None
+            self._write_index()
+
+    def get_stats(self):
+        """Get record counts, fsync policy and journal size"""
+        return {
+            "path": self.path,
+            "fsync": self.fsync,
+            "live_records": self.live_records,
+            "dead_records": self.dead_records,
+            "appends": self.appends,
+            "fsyncs": self.fsyncs,
+            "compactions": self.compactions,
+            "bytes": os.path.getsize(self.path) if os.path.exists(self.path) else 0
+        }
@@ -4,10 +4,13 @@
 import os
 import time
 import importlib
-import hashlib
 import threading
 from datetime import datetime
 
+from .cache_keys import cache_scope, cache_exclusion, fingerprint, normalize_query
+from .semantic_cache import create_semantic_cache, is_standalone
+from .memory_governor import PRIORITY_SEMANTIC_CACHE
+
 class JarvisIntegrator:
     """
     Integration manager for connecting JARVIS components
@@ -26,6 +29,8 @@ class JarvisIntegrator:
         """Initialize the integrator with references to components"""
         self.main_engine = main_engine
         self.memory_optimizer = None
+        self.cache_exclusions = {}  # cacheability rule -> queries skipped
+        self.semantic_cache = None  # near-duplicate tier (needs NumPy)
         self.emotional_voice = None
         self.jesko_gui = None
         
@@ -71,6 +76,13 @@ class JarvisIntegrator:
                 aggressive_mode=self.config["aggressive_mode"]
             )
             
+            self.semantic_cache = create_semantic_cache()
+            if self.semantic_cache:
+                self.memory_optimizer.governor.register(
+                    "semantic_cache", lambda: self.semantic_cache.bytes,
+                    self.semantic_cache.evict_bytes, PRIORITY_SEMANTIC_CACHE, owner=self.semantic_cache
+                )
+            
             self.components_status["memory_optimizer"] = True
             
             if self.config["debug_mode"]:
@@ -164,23 +176,78 @@ class JarvisIntegrator:
             
         return self.memory_optimizer.optimize_conversation_history(conversation_history)
     
-    def cache_response(self, query, response):
-        """Cache a response for faster retrieval"""
+    def _cache_key(self, query, context=None, count_skip=False):
+        """
+        Key a query by its normalized text, model, system prompt and history window
+        
+        Returns:
+            tuple: (scope, key, disk_key) - scope (model + system prompt) is what the semantic
+                tier matches within; the exact key also carries the history window; the disk key
+                is scope + query only, so answers survive restarts, and is None unless the
+                query is standalone. (None, None, None) if uncacheable
+        """
+        exclusion = cache_exclusion(query)
+        if exclusion:
+            if count_skip:
+                self.cache_exclusions[exclusion] = self.cache_exclusions.get(exclusion, 0) + 1
+            return None, None, None
+        
+        context = context or {}
+        query_fingerprint = fingerprint(normalize_query(query))
+        scope = cache_scope(context.get("model"), context.get("system_prompt"))
+        key = cache_scope(context.get("model"), context.get("system_prompt"), context.get("context"))
+        disk_key = scope + "|" + query_fingerprint if is_standalone(query) else None
+        return scope, key + "|" + query_fingerprint, disk_key
+    
+    def cache_response(self, query, response, context=None):
+        """
+        Cache a response for faster retrieval
+        
+        Args:
+            query: User message
+            response: Response to cache
+            context: Request description from the engine's get_cache_context(), taken before the call
+        """
         if not self.memory_optimizer:
             return
             
-        # Create a hash of the query for caching
-        query_hash = hashlib.md5(query.encode()).hexdigest()
-        self.memory_optimizer.cache_response(query_hash, response)
+        scope, cache_key, disk_key = self._cache_key(query, context)
+        if cache_key:
+            self.memory_optimizer.cache_response(cache_key, response, disk_key)
+            if self.semantic_cache and self.semantic_cache.accepts(query):
+                self.semantic_cache.put(query, response, scope)
     
-    def get_cached_response(self, query):
-        """Get a cached response if available"""
+    def get_cached_response(self, query, context=None):
+        """
+        Get a cached response if available for this query under the same model, prompt and context
+        
+        Exact (normalized) matches are tried first, then near-duplicate
+        phrasings through the semantic tier.
+        """
         if not self.memory_optimizer:
             return None
             
-        # Create a hash of the query for cache lookup
-        query_hash = hashlib.md5(query.encode()).hexdigest()
-        return self.memory_optimizer.get_cached_response(query_hash)
+        scope, cache_key, disk_key = self._cache_key(query, context, count_skip=True)
+        if not cache_key:
+            return None
+        
+        response = self.memory_optimizer.get_cached_response(cache_key, disk_key)
+        if response is None and self.semantic_cache and self.semantic_cache.accepts(query):
+            response = self.semantic_cache.get(query, scope)
+            if response is not None and self.config["debug_mode"]:
+                hit = self.semantic_cache.recent_hits[-1]
+                print(f"🧠 Semantic cache hit ({hit['similarity']:.2f}): "
+                      f"\"{hit['query'][:80]}\" ~ \"{hit['matched'][:80]}\"")
+        return response
+    
+    def get_cache_stats(self):
+        """Get response cache counters plus how many queries each cacheability rule skipped"""
+        if not self.memory_optimizer:
+            return None
+        stats = self.memory_optimizer.get_cache_stats()
+        stats["skipped"] = dict(self.cache_exclusions)
+        stats["semantic"] = self.semantic_cache.get_stats() if self.semantic_cache else None
+        return stats
     
     def cleanup_memory(self):
         """Trigger memory cleanup"""
@@ -189,12 +256,20 @@ class JarvisIntegrator:
             
         return self.memory_optimizer.cleanup_memory()
     
-    def select_optimal_model(self, query, available_models, user_preferences=None):
-        """Select the optimal model for a query based on complexity and RAM"""
+    def select_optimal_model(self, query, available_models, user_preferences=None, model_stats=None,
+                             current_model=None):
+        """Select the optimal model for a query from measured latency, errors and complexity"""
         if not self.memory_optimizer:
             return available_models[0] if available_models else None
             
-        return self.memory_optimizer.smart_model_selector(query, available_models, user_preferences)
+        return self.memory_optimizer.smart_model_selector(query, available_models, user_preferences, model_stats,
+                                                          current_model)
+    
+    def get_model_selection(self):
+        """Get the last model selection with the reasoning behind it"""
+        if not self.memory_optimizer:
+            return None
+        return self.memory_optimizer.last_selection
     
     # =========== EMOTIONAL VOICE INTEGRATION ===========
     
@@ -0,0 +1,183 @@
+# lru_cache.py - O(1) LRU cache with per-entry TTL for JARVIS response caching
+
+import os
+import sys
+import time
+import threading
+from collections import OrderedDict, deque
+
+
+class LRUCache:
+    """
+    Size-bounded LRU cache with per-entry time-to-live
+
+    get/put/pop are O(1): entries live in an OrderedDict kept in recency
+    order, so the eviction victim is always the first item. Expired
+    entries are dropped lazily when read and by prune(), which walks an
+    insertion-ordered expiry queue a bounded number of steps at a time
+    (amortized O(1) per put - no full scans or sorts).
+
+    The approximate byte footprint of keys and values is tracked on every
+    insert/remove, so memory budgets can be checked and enforced in O(1)
+    per evicted entry (evict_bytes).
+
+    Thread-safe; hit/miss/eviction/expiration counters via get_stats().
+    """
+
+    def __init__(self, maxsize=300, ttl=None, sizeof=None):
+        """
+        Args:
+            maxsize: Maximum number of entries (LRU eviction beyond it)
+            ttl: Default seconds an entry stays valid (None = no expiry)
+            sizeof: Function giving an entry's bytes from (key, value) - sys.getsizeof of both by default
+        """
+        self.maxsize = max(1, int(maxsize))
+        self.ttl = ttl
+        self.sizeof = sizeof or (lambda key, value: sys.getsizeof(key) + sys.getsizeof(value))
+        self.bytes = 0
+        self._data = OrderedDict()       # key -> (value, expires_at, size)
+        self._expiry = deque()           # (expires_at, key) in insertion order
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def _is_expired(self, expires_at, now):
+        return expires_at is not None and now >= expires_at
+
+    def get(self, key, default=None):
+        """Get a value and mark it most recently used - default if missing or expired"""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return default
+            if self._is_expired(entry[1], time.time()):
+                self._remove_locked(key)
+                self.expirations += 1
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key, value, ttl=None):
+        """Insert or replace a value, evicting the least recently used entries beyond maxsize"""
+        ttl = self.ttl if ttl is None else ttl
+        expires_at = time.time() + ttl if ttl else None
+
+        size = self.sizeof(key, value)
+
+        with self._lock:
+            if key in self._data:
+                self._remove_locked(key)
+            self._data[key] = (value, expires_at, size)
+            self.bytes += size
+            if expires_at is not None:
+                self._expiry.append((expires_at, key))
+
+            while len(self._data) > self.maxsize:
+                self._pop_oldest_locked()
+                self.evictions += 1
+
+            # Keep the expiry queue from growing with replaced/evicted keys
+            if len(self._expiry) > 2 * self.maxsize + 16:
+                self._expiry = deque(record for record in self._expiry
+                                     if record[1] in self._data and self._data[record[1]][1] == record[0])
+            else:
+                self._prune_locked(2)
+
+    def _remove_locked(self, key):
+        entry = self._data.pop(key)
+        self.bytes -= entry[2]
+        return entry
+
+    def _pop_oldest_locked(self):
+        _, entry = self._data.popitem(last=False)
+        self.bytes -= entry[2]
+        return entry[2]
+
+    def pop(self, key, default=None):
+        """Remove an entry and return its value"""
+        with self._lock:
+            if key not in self._data:
+                return default
+            return self._remove_locked(key)[0]
+
+    def __contains__(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            return entry is not None and not self._is_expired(entry[1], time.time())
+
+    def __len__(self):
+        return len(self._data)
+
+    def _prune_locked(self, max_steps):
+        now = time.time()
+        removed = 0
+        steps = 0
+        while self._expiry and steps < max_steps:
+            expires_at, key = self._expiry[0]
+            if expires_at > now:
+                break
+            self._expiry.popleft()
+            steps += 1
+            entry = self._data.get(key)
+            # Skip queue records for keys replaced or already removed since
+            if entry is not None and entry[1] == expires_at:
+                self._remove_locked(key)
+                self.expirations += 1
+                removed += 1
+        return removed
+
+    def prune(self, max_steps=64):
+        """Drop up to max_steps expired entries from the front of the expiry queue"""
+        with self._lock:
+            return self._prune_locked(max_steps)
+
+    def shrink(self, fraction):
+        """Evict the least recently used fraction of entries (memory pressure)"""
+        with self._lock:
+            count = int(len(self._data) * fraction)
+            for _ in range(count):
+                self._pop_oldest_locked()
+            self.evictions += count
+            return count
+
+    def evict_bytes(self, nbytes):
+        """Evict least recently used entries until at least nbytes are freed (or the cache is empty)"""
+        with self._lock:
+            freed = 0
+            while self._data and freed < nbytes:
+                freed += self._pop_oldest_locked()
+                self.evictions += 1
+            return freed
+
+    def clear(self):
+        """Remove every entry (counters are kept)"""
+        with self._lock:
+            self._data.clear()
+            self._expiry.clear()
+            self.bytes = 0
+
+    def get_stats(self):
+        """Get size and hit/miss/eviction/expiration counters"""
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "bytes": self.bytes,
+            "ttl": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0
+        }
+
+
+def response_cache_ttl():
+    """Default response cache TTL in seconds (RESPONSE_CACHE_TTL, 0 disables expiry)"""
+    ttl = float(os.environ.get("RESPONSE_CACHE_TTL", "3600"))
+    return ttl or None
@@ -0,0 +1,276 @@
+# memory_governor.py - Global byte budget for engine state with pressure-driven garbage collection
+
+import gc
+import os
+import sys
+import time
+import threading
+
+from .message import Message, sizeof_record
+
+
+# Bytes of the list slot plus dict for one history message, beyond its strings
+_MESSAGE_BASE = sys.getsizeof({"role": "", "content": ""}) + 8
+
+
+def sizeof_message(message):
+    """Approximate bytes held by one history message (Message record or dict)"""
+    if isinstance(message, Message):
+        return sizeof_record(message)
+    size = _MESSAGE_BASE
+    for value in message.values():
+        size += sys.getsizeof(value)
+    return size
+
+
+def sizeof_messages(messages):
+    """Approximate bytes held by a list of history messages"""
+    return sys.getsizeof(messages) + sum(sizeof_message(message) for message in messages)
+
+
+class MemoryGovernor:
+    """
+    Enforces one byte budget across everything the engine keeps in RAM
+
+    Components register a pool with a measure() callback (bytes held now)
+    and an evict(nbytes) callback (free at least nbytes, return bytes
+    freed). When the total passes MEMORY_BUDGET_MB - or the process RSS
+    passes MEMORY_WARNING_PERCENT of system RAM - pools are evicted in
+    ascending priority until the total is back under the low-water mark:
+    cheap-to-rebuild caches first, conversation history last.
+
+    Pools are registered per owner (the engine, each cache tier), so two
+    instances registering the same name are tracked side by side instead
+    of replacing each other.
+
+    Pools registered with pressure_only=True (large models that are slow to
+    reload) are measured and reported but sit outside the byte budget:
+    they are only evicted under real memory pressure - process RSS over
+    the warning threshold or a forced enforce() - never just because the
+    caches add up to more than the budget.
+
+    Garbage collection follows pressure instead of a timer: a young
+    collection after evictions, a full one only while still over budget
+    (at most every MIN_FULL_GC_INTERVAL seconds). freeze() moves start-up
+    objects (modules, config, prompts) out of the collector's view so
+    later collections only walk objects created afterwards.
+    """
+
+    MIN_FULL_GC_INTERVAL = 30
+
+    def __init__(self, budget_bytes=None, low_water=0.85, warning_percent=None):
+        """
+        Args:
+            budget_bytes: Byte budget for registered pools (MEMORY_BUDGET_MB, default 256)
+            low_water: Fraction of the budget eviction brings the total down to
+            warning_percent: Process RSS share of system RAM treated as pressure (MEMORY_WARNING_PERCENT, default 85)
+        """
+        self.budget = budget_bytes or int(float(os.environ.get("MEMORY_BUDGET_MB", "256")) * 1024 * 1024)
+        self.low_water = low_water
+        self.warning_percent = warning_percent or float(os.environ.get("MEMORY_WARNING_PERCENT", "85"))
+
+        self.pools = {}   # name -> {"measure", "evict", "priority", "evicted_bytes", "evictions"}
+        self._owner_names = {}  # (name, id(owner)) -> pool name
+        self.enforcements = 0
+        self.gc_runs = {0: 0, 1: 0, 2: 0}
+        self.last_full_gc = 0.0
+        self.last_report = None
+        self.frozen = 0
+        self._lock = threading.RLock()
+
+    def _pool_name(self, name, owner):
+        """Per-owner pool name - the first owner keeps the plain name, later ones get "#2", "#3", ..."""
+        if owner is None:
+            return name
+        key = (name, id(owner))
+        if key not in self._owner_names:
+            taken = set(self._owner_names.values())
+            pool_name, number = name, 1
+            while pool_name in taken:
+                number += 1
+                pool_name = f"{name}#{number}"
+            self._owner_names[key] = pool_name
+        return self._owner_names[key]
+
+    def register(self, name, measure, evict=None, priority=50, pressure_only=False, owner=None):
+        """
+        Register (or replace) a memory pool
+
+        Args:
+            name: Pool name shown in stats
+            measure: Callable returning the pool's approximate bytes
+            evict: Callable(nbytes) freeing at least nbytes and returning bytes freed (None = measured only)
+            priority: Lower priorities are evicted first
+            pressure_only: Keep the pool out of the budget and evict it only under RSS pressure or force
+            owner: Object the pool belongs to - pools of different owners never replace each other
+
+        Returns:
+            str: The pool's name in stats (suffixed when another owner already uses name)
+        """
+        with self._lock:
+            name = self._pool_name(name, owner)
+            self.pools[name] = {
+                "measure": measure,
+                "evict": evict,
+                "priority": priority,
+                "pressure_only": pressure_only,
+                "evicted_bytes": 0,
+                "evictions": 0
+            }
+            return name
+
+    def unregister(self, name, owner=None):
+        """Stop tracking a pool"""
+        with self._lock:
+            self.pools.pop(self._owner_names.pop((name, id(owner)), name), None)
+
+    def _measure(self):
+        sizes = {}
+        for name, pool in self.pools.items():
+            try:
+                sizes[name] = int(pool["measure"]())
+            except Exception as e:
+                print(f"⚠️ Memory governor could not measure {name}: {str(e)}")
+                sizes[name] = 0
+        return sizes
+
+    def _budgeted_total(self, sizes):
+        """Bytes counted against the budget (pressure-only pools excluded)"""
+        return sum(size for name, size in sizes.items() if not self.pools[name]["pressure_only"])
+
+    def _rss_pressure(self):
+        """Check process RSS against the warning threshold (False without psutil)"""
+        try:
+            import psutil
+            return psutil.Process(os.getpid()).memory_percent() > self.warning_percent
+        except ImportError:
+            return False
+        except Exception:
+            return False
+
+    def enforce(self, force=False):
+        """
+        Measure every pool and evict down to the low-water mark if over budget
+
+        Args:
+            force: Treat the process as under memory pressure (e.g. from a monitor thread)
+
+        Returns:
+            dict: Total before/after, bytes freed per pool and the GC generation run (None if none)
+        """
+        with self._lock:
+            self.enforcements += 1
+            sizes = self._measure()
+            total = self._budgeted_total(sizes)
+            hard_pressure = force or self._rss_pressure()
+            pressure = hard_pressure or total > self.budget
+
+            freed = {}
+            if pressure:
+                target = int(min(total, self.budget) * self.low_water)
+                excess = total - target
+                if hard_pressure:
+                    # Pressure-only pools count towards what has to be released
+                    excess += sum(size for name, size in sizes.items() if self.pools[name]["pressure_only"])
+                for name, pool in sorted(self.pools.items(), key=lambda item: item[1]["priority"]):
+                    if excess <= 0:
+                        break
+                    if pool["evict"] is None or not sizes.get(name):
+                        continue
+                    if pool["pressure_only"] and not hard_pressure:
+                        continue
+                    try:
+                        released = int(pool["evict"](min(excess, sizes[name])) or 0)
+                    except Exception as e:
+                        print(f"⚠️ Memory governor could not evict {name}: {str(e)}")
+                        continue
+                    if released > 0:
+                        freed[name] = released
+                        pool["evicted_bytes"] += released
+                        pool["evictions"] += 1
+                        excess -= released
+
+            after = total - sum(size for name, size in freed.items() if not self.pools[name]["pressure_only"])
+            generation = self._collect(bool(freed), after > self.budget)
+
+            self.last_report = {
+                "time": time.time(),
+                "before": total,
+                "after": after,
+                "pressure": pressure,
+                "freed": freed,
+                "gc_generation": generation
+            }
+            return self.last_report
+
+    def _collect(self, evicted, over_budget):
+        """Run the cheapest collection the situation calls for"""
+        if over_budget and time.time() - self.last_full_gc >= self.MIN_FULL_GC_INTERVAL:
+            generation = 2
+            self.last_full_gc = time.time()
+        elif evicted:
+            generation = 1
+        else:
+            return None
+        gc.collect(generation)
+        self.gc_runs[generation] += 1
+        return generation
+
+    def freeze(self):
+        """
+        Collect once, then freeze all surviving objects (call after start-up)
+
+        Returns:
+            int: Objects moved to the permanent generation (0 before Python 3.7)
+        """
+        gc.collect(2)
+        self.gc_runs[2] += 1
+        self.last_full_gc = time.time()
+        if hasattr(gc, "freeze"):
+            gc.freeze()
+            self.frozen = gc.get_freeze_count()
+        return self.frozen
+
+    def get_stats(self):
+        """Get the budget, per-pool bytes and eviction/GC counters"""
+        with self._lock:
+            sizes = self._measure()
+            return {
+                "budget": self.budget,
+                "total": self._budgeted_total(sizes),
+                "pools": {
+                    name: {
+                        "bytes": sizes[name],
+                        "priority": pool["priority"],
+                        "pressure_only": pool["pressure_only"],
+                        "evicted_bytes": pool["evicted_bytes"],
+                        "evictions": pool["evictions"]
+                    }
+                    for name, pool in sorted(self.pools.items(), key=lambda item: item[1]["priority"])
+                },
+                "enforcements": self.enforcements,
+                "gc_runs": dict(self.gc_runs),
+                "frozen_objects": self.frozen,
+                "last_report": self.last_report
+            }
+
+
+# Eviction order - cheapest to rebuild first
+PRIORITY_SEMANTIC_CACHE = 10
+PRIORITY_RESPONSE_CACHE = 20
+PRIORITY_CONVERSATION_CHUNKS = 30
+PRIORITY_SPEECH_MODEL = 40
+PRIORITY_HISTORY = 90
+
+
+# Singleton instance shared by every component in the process
+_memory_governor_instance = None
+
+def get_memory_governor():
+    """Get singleton instance of MemoryGovernor"""
+    global _memory_governor_instance
+
+    if _memory_governor_instance is None:
+        _memory_governor_instance = MemoryGovernor()
+
+    return _memory_governor_instance
@@ -1,12 +1,30 @@
 # memory_optimizer.py - DEVIL MIND Memory Optimization for 4GB RAM
 
-import gc
 import time
 import os
 import json
 from collections import deque
+import random
 import threading
 
+from .lru_cache import LRUCache, response_cache_ttl
+from .disk_cache import create_disk_cache
+from .persistence import get_persistence_worker
+from .memory_governor import (get_memory_governor, sizeof_messages, PRIORITY_RESPONSE_CACHE,
+                              PRIORITY_CONVERSATION_CHUNKS)
+
+# Name fragments of models treated as capable enough for complex queries
+CAPABLE_MODEL_HINTS = ["70b", "72b", "405b", "gpt-4", "claude", "pro", "deepseek", "r1", "mixtral", "qwen"]
+
+
+def is_capable_model(model_name):
+    """Check whether a model name looks like a large/capable model"""
+    name = model_name.lower()
+    if "mini" in name or "flash" in name or "8b" in name:
+        return False
+    return any(hint in name for hint in CAPABLE_MODEL_HINTS)
+
+
 class MemoryOptimizer:
     """
     DEVIL MIND Memory Optimization for 4GB RAM
@@ -21,16 +39,29 @@ class MemoryOptimizer:
     """
     def __init__(self, max_conversation_size=800, cache_size=300, aggressive_mode=False):
         self.max_conversation_size = max_conversation_size
-        self.response_cache = {}
         self.cache_size = cache_size
+        self.response_cache = LRUCache(cache_size, ttl=response_cache_ttl())
+        self.disk_cache = create_disk_cache(ttl=response_cache_ttl())  # survives restarts, shared across processes
         self.memory_cleanup_interval = 50  # Clean every 50 interactions
         self.interaction_count = 0
         self.conversation_chunks = deque(maxlen=10)  # Keep last 10 chunks
         self.aggressive_mode = aggressive_mode  # Ultra performance mode
-        self.last_full_gc_time = time.time()
-        self.gc_full_interval = 300  # Full GC every 5 minutes
         self.memory_warning_threshold = 85  # Percentage
         
+        # Byte budget shared with history and speech models - caches are evicted first
+        self.governor = get_memory_governor()
+        self.governor.register("response_cache", lambda: self.response_cache.bytes,
+                               self.response_cache.evict_bytes, PRIORITY_RESPONSE_CACHE, owner=self)
+        self.governor.register("conversation_chunks", self._chunks_bytes,
+                               self._evict_chunks, PRIORITY_CONVERSATION_CHUNKS, owner=self)
+        
+        # Measurement-driven model selection
+        self.selector_min_samples = int(os.environ.get("SELECTOR_MIN_SAMPLES", "3"))
+        self.selector_explore_rate = float(os.environ.get("SELECTOR_EXPLORE_RATE", "0.1"))
+        self.selector_max_error_rate = float(os.environ.get("SELECTOR_MAX_ERROR_RATE", "0.5"))
+        self.selector_error_penalty = 3.0
+        self.last_selection = None
+        
         # Start memory monitor thread if in aggressive mode
         if aggressive_mode:
             self.monitor_thread = threading.Thread(target=self._memory_monitor, daemon=True)
@@ -69,80 +100,69 @@ class MemoryOptimizer:
         
         return optimized_history
     
-    def cache_response(self, query_hash, response):
-        """Cache responses for instant retrieval"""
-        if len(self.response_cache) >= self.cache_size:
-            # Remove oldest cached response
-            oldest_key = min(
-                self.response_cache.items(), 
-                key=lambda x: x[1]['timestamp']
-            )[0]
-            del self.response_cache[oldest_key]
-            
-        self.response_cache[query_hash] = {
-            'response': response,
-            'timestamp': time.time(),
-            'access_count': 1,
-            'last_accessed': time.time()
-        }
+    def _chunks_bytes(self):
+        return sum(sizeof_messages(chunk) for chunk in self.conversation_chunks)
+    
+    def _evict_chunks(self, nbytes):
+        """Drop the oldest archived chunks until nbytes are freed"""
+        freed = 0
+        while self.conversation_chunks and freed < nbytes:
+            freed += sizeof_messages(self.conversation_chunks.popleft())
+        return freed
+    
+    def cache_response(self, query_hash, response, disk_key=None):
+        """
+        Cache responses for instant retrieval (least recently used evicted when full)
+        
+        The disk tier is keyed separately (disk_key, without the conversation
+        context) so answers are reused across sessions; it is skipped when
+        disk_key is None. The disk write happens in the background.
+        """
+        self.response_cache.put(query_hash, response)
+        if self.disk_cache and disk_key:
+            disk_cache = self.disk_cache
+            get_persistence_worker().schedule(
+                lambda: disk_cache.put(disk_key, response), key=(id(disk_cache), disk_key)
+            )
+    
+    def get_cached_response(self, query_hash, disk_key=None):
+        """Get cached response if available and not expired - disk hits (by disk_key) are promoted into memory"""
+        response = self.response_cache.get(query_hash)
+        if response is None and self.disk_cache and disk_key:
+            response = self.disk_cache.get(disk_key)
+            if response is not None:
+                self.response_cache.put(query_hash, response)
+        return response
     
-    def get_cached_response(self, query_hash):
-        """Get cached response if available"""
-        if query_hash in self.response_cache:
-            cache_entry = self.response_cache[query_hash]
-            cache_entry['access_count'] += 1
-            cache_entry['last_accessed'] = time.time()
-            return cache_entry['response']
-        return None
+    def get_cache_stats(self):
+        """Get response cache size and hit/miss/eviction counters (disk tier under "disk")"""
+        stats = self.response_cache.get_stats()
+        stats["disk"] = self.disk_cache.get_stats() if self.disk_cache else None
+        return stats
     
     def cleanup_memory(self):
         """Aggressive memory cleanup for low-RAM systems"""
         self.interaction_count += 1
-        current_time = time.time()
         
         # Standard cleanup interval
         if self.interaction_count % self.memory_cleanup_interval == 0:
-            # Force garbage collection (generation 0 only for speed)
-            gc.collect(0)
-            
-            # Clean old cache entries
-            expired_keys = []
-            
-            for key, cache_entry in self.response_cache.items():
-                # Remove entries older than 1 hour with low access count
-                if (current_time - cache_entry['timestamp'] > 3600 and 
-                    cache_entry['access_count'] < 3):
-                    expired_keys.append(key)
+            # Drop expired cache entries (bounded walk of the expiry queue)
+            expired_removed = self.response_cache.prune()
             
-            # Actually remove the expired keys
-            for key in expired_keys:
-                del self.response_cache[key]
-                
-            # Check if full garbage collection is needed
-            if current_time - self.last_full_gc_time > self.gc_full_interval:
-                # Full system garbage collection (all generations)
-                gc.collect(2)
-                self.last_full_gc_time = current_time
+            # Evict/collect only if the byte budget is under pressure (off the caller's thread)
+            get_persistence_worker().schedule(self.governor.enforce)
                 
         # Aggressive mode for extremely low memory systems
         if self.aggressive_mode:
             # More aggressive cache pruning
             if len(self.response_cache) > self.cache_size * 0.8:  # 80% full
-                # Sort by access count and remove least used 20%
-                sorted_cache = sorted(
-                    self.response_cache.items(),
-                    key=lambda x: x[1]['access_count']
-                )
-                # Remove bottom 20%
-                items_to_remove = int(len(sorted_cache) * 0.2)
-                for i in range(items_to_remove):
-                    if i < len(sorted_cache):
-                        del self.response_cache[sorted_cache[i][0]]
+                # Evict the least recently used 20%
+                self.response_cache.shrink(0.2)
                         
         # Return stats about memory cleanup
         return {
             "cache_size": len(self.response_cache),
-            "expired_keys_removed": len(expired_keys) if 'expired_keys' in locals() else 0,
+            "expired_keys_removed": expired_removed if 'expired_removed' in locals() else 0,
             "aggressive_mode": self.aggressive_mode
         }
     
@@ -156,13 +176,17 @@ class MemoryOptimizer:
             return {
                 "ram_usage_mb": memory_info.rss / 1024 / 1024,
                 "cache_size": len(self.response_cache),
-                "conversation_chunks": len(self.conversation_chunks)
+                "cache": self.response_cache.get_stats(),
+                "conversation_chunks": len(self.conversation_chunks),
+                "memory_budget": self.governor.get_stats()
             }
         except ImportError:
             return {
                 "ram_usage": "psutil not installed",
                 "cache_size": len(self.response_cache),
-                "conversation_chunks": len(self.conversation_chunks)
+                "cache": self.response_cache.get_stats(),
+                "conversation_chunks": len(self.conversation_chunks),
+                "memory_budget": self.governor.get_stats()
             }
     
     def _memory_monitor(self):
@@ -177,51 +201,18 @@ class MemoryOptimizer:
                 process = psutil.Process(os.getpid())
                 memory_percent = process.memory_percent()
                 
-                # If memory usage is high, perform aggressive cleanup
+                # If memory usage is high, evict by priority until back under budget
                 if memory_percent > self.memory_warning_threshold:
                     print(f"Memory usage high ({memory_percent:.1f}%) - performing aggressive cleanup")
-                    # Full garbage collection
-                    gc.collect(2)
-                    
-                    # Clear as much cache as possible
-                    if len(self.response_cache) > self.cache_size * 0.5:
-                        # Sort by access time and remove oldest 50%
-                        sorted_cache = sorted(
-                            self.response_cache.items(),
-                            key=lambda x: x[1]['last_accessed']
-                        )
-                        # Remove oldest 50%
-                        items_to_remove = int(len(sorted_cache) * 0.5)
-                        for i in range(items_to_remove):
-                            if i < len(sorted_cache):
-                                del self.response_cache[sorted_cache[i][0]]
+                    self.governor.enforce(force=True)
         except ImportError:
             # If psutil not available, disable memory monitor
             pass
         except Exception as e:
             print(f"Memory monitor error: {e}")
     
-    def smart_model_selector(self, query, available_models, user_preferences=None):
-        """
-        DEVIL MIND Smart Model Selector - Choose the right model for each query
-        
-        Balances between speed and intelligence based on:
-        1. Query complexity
-        2. Available RAM 
-        3. Response time needs
-        4. User preferences
-        """
-        # Default models
-        fast_models = ["Llama-3.1 8B (OpenRouter)", "GPT-3.5 Turbo (OpenAI)", "Phi-3-mini (OpenRouter)"]
-        smart_models = ["Llama-3.1 70B (OpenRouter)", "Claude 3 Haiku (OpenRouter)", "GPT-4o Mini (OpenAI)"]
-        
-        # User preferred models take priority if specified
-        if user_preferences and 'preferred_models' in user_preferences:
-            preferred = user_preferences['preferred_models']
-            if preferred and preferred[0] in available_models:
-                return preferred[0]
-        
-        # Simple complexity estimation
+    def _query_complexity(self, query):
+        """Score how much reasoning a query needs - above 5 goes to a capable model"""
         query_lower = query.lower()
         
         # Check query length (longer queries may need smarter models)
@@ -252,31 +243,112 @@ class MemoryOptimizer:
         
         code_score = sum(2 for indicator in code_indicators 
                         if indicator in query_lower)
-        complexity_score += code_score
-        
-        # Check system resources - use fast model if memory is constrained
+        return complexity_score + code_score
+    
+    def _memory_pressure(self):
+        """True when system RAM is above 80% - forces the fastest model"""
         try:
             import psutil
-            memory_percent = psutil.virtual_memory().percent
-            if memory_percent > 80:  # High memory usage
-                # Force fast model
-                for model in fast_models:
-                    if model in available_models:
-                        return model
+            return psutil.virtual_memory().percent > 80
         except ImportError:
-            pass
+            return False
+    
+    def smart_model_selector(self, query, available_models, user_preferences=None, model_stats=None,
+                             current_model=None):
+        """
+        DEVIL MIND Smart Model Selector - Choose the right model for each query
+        
+        Ranks the candidate models by measured latency and error rate
+        (model_stats from JarvisAI telemetry, persisted across restarts):
+        simple queries go to the lowest p50, complex ones to the lowest p90
+        among capable models (error rate weighted in, unhealthy ones skipped). Models with fewer than SELECTOR_MIN_SAMPLES
+        calls are explored with probability SELECTOR_EXPLORE_RATE, and only
+        if they suit the query (capable models for complex queries, the
+        others for simple ones). Until some model is measured the current
+        model is kept, so a cold start never jumps to a random model.
+        The reasoning is kept in self.last_selection.
+        
+        Args:
+            query: The user message
+            available_models: Candidate model names (ideally only usable ones)
+            user_preferences: Optional {"preferred_models": [...]}
+            model_stats: JarvisAI.get_model_stats() output
+            current_model: Model in use - kept while nothing has been measured
             
-        # Make decision - higher complexity score means smarter model
-        if complexity_score > 5:
-            # Use smart model
-            for model in smart_models:
-                if model in available_models:
-                    return model
-        else:
-            # Use fast model
-            for model in fast_models:
-                if model in available_models:
-                    return model
-                    
-        # Fallback to any available model
-        return list(available_models)[0] if available_models else None
+        Returns:
+            str: Chosen model name or None if there are no candidates
+        """
+        candidates = list(available_models)
+        model_stats = model_stats or {}
+        complexity_score = self._query_complexity(query)
+        complex_query = complexity_score > 5
+        
+        def choose(model, reason, explored=False, ranking=None):
+            self.last_selection = {
+                "model": model,
+                "reason": reason,
+                "complexity": complexity_score,
+                "explored": explored,
+                "ranking": ranking or [],
+                "timestamp": time.time()
+            }
+            return model
+        
+        if not candidates:
+            return choose(None, "no usable models")
+        
+        # User preferred models take priority if specified
+        if user_preferences and 'preferred_models' in user_preferences:
+            preferred = user_preferences['preferred_models']
+            if preferred and preferred[0] in candidates:
+                return choose(preferred[0], "user preferred model")
+        
+        # High memory usage - only speed matters
+        memory_pressure = self._memory_pressure()
+        if memory_pressure:
+            complex_query = False
+        
+        measured = []
+        unexplored = []
+        for model in candidates:
+            stats = model_stats.get(model)
+            latency = stats["latency"] if stats else {"count": 0}
+            if latency["count"] < self.selector_min_samples:
+                unexplored.append(model)
+                continue
+            
+            error_rate = stats["error_rate"]
+            if error_rate > self.selector_max_error_rate:
+                continue
+            
+            observed = latency["p90"] if complex_query else latency["p50"]
+            cost = observed * (1 + self.selector_error_penalty * error_rate)
+            measured.append({"model": model, "cost": round(cost, 3), "latency": observed,
+                             "error_rate": error_rate, "samples": latency["count"],
+                             "capable": is_capable_model(model)})
+        
+        # Complex queries rank capable models first, then everything by cost
+        measured.sort(key=lambda item: (complex_query and not item["capable"], item["cost"]))
+        
+        # Occasionally try a model we know little about (that suits the query) so rankings stay fresh
+        pool = [m for m in unexplored if is_capable_model(m) == complex_query]
+        if pool and random.random() < self.selector_explore_rate:
+            model = random.choice(pool)
+            return choose(model, f"exploring {model} ({len(unexplored)} models with too few samples)",
+                          explored=True, ranking=measured)
+        
+        if not measured:
+            # Nothing to rank yet - stay put rather than guess
+            if current_model in candidates:
+                return choose(current_model, "no measured models yet - keeping the current model")
+            model = (pool or candidates)[0]
+            return choose(model, "no measured models yet - first usable model for this query")
+        
+        best = measured[0]
+        percentile_name = "p90" if complex_query else "p50"
+        reason = (f"{'complex' if complex_query else 'simple'} query (score {complexity_score}): "
+                  f"lowest {percentile_name} {best['latency']}s with {best['error_rate']:.0%} errors "
+                  f"over {best['samples']} calls{' among capable models' if complex_query and best['capable'] else ''}")
+        if memory_pressure:
+            reason += " - memory pressure, speed first"
+        return choose(best["model"], reason, ranking=measured)
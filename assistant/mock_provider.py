@@ -0,0 +1,377 @@
+# mock_provider.py - Local OpenAI/Gemini-compatible stand-in provider for offline benchmarking
+#
+# Run standalone:   python -m assistant.mock_provider --port 8765 --ttft 0.3 --tps 40
+# Or in-process:    MOCK_PROVIDER=true python main.py  (adds "Mock ... (Local)" models)
+
+import os
+import json
+import time
+import random
+import argparse
+import threading
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+CANNED_RESPONSE = ("Certainly, Sir. This is a canned response from the local mock provider, "
+                   "streamed token by token so latency and throughput can be measured offline.")
+
+
+class MockProviderConfig:
+    """Latency, throughput and failure settings for the mock provider"""
+
+    def __init__(self, ttft=None, tokens_per_sec=None, error_429_rate=None, error_500_rate=None,
+                 timeout_rate=None, timeout_seconds=None, response_mode=None, canned_response=None,
+                 rate_limit_rpm=None, seed=None):
+        env = os.environ.get
+        self.ttft = ttft if ttft is not None else float(env("MOCK_TTFT", "0.2"))
+        self.tokens_per_sec = tokens_per_sec or float(env("MOCK_TOKENS_PER_SEC", "50"))
+        self.error_429_rate = error_429_rate if error_429_rate is not None else float(env("MOCK_ERROR_429_RATE", "0"))
+        self.error_500_rate = error_500_rate if error_500_rate is not None else float(env("MOCK_ERROR_500_RATE", "0"))
+        self.timeout_rate = timeout_rate if timeout_rate is not None else float(env("MOCK_TIMEOUT_RATE", "0"))
+        self.timeout_seconds = timeout_seconds or float(env("MOCK_TIMEOUT_SECONDS", "120"))
+        self.response_mode = response_mode or env("MOCK_RESPONSE_MODE", "echo")
+        self.canned_response = canned_response or env("MOCK_CANNED_RESPONSE", CANNED_RESPONSE)
+        self.rate_limit_rpm = rate_limit_rpm if rate_limit_rpm is not None else int(env("MOCK_RATE_LIMIT_RPM", "0"))
+        seed = seed if seed is not None else env("MOCK_SEED")
+        self.random = random.Random(int(seed)) if seed is not None else random.Random()
+
+
+def _last_user_text(body, gemini):
+    """Get the newest user message text from an OpenAI or Gemini request body"""
+    if gemini:
+        for content in reversed(body.get("contents", [])):
+            if content.get("role", "user") == "user":
+                return "".join(part.get("text", "") for part in content.get("parts", []))
+        return ""
+    for message in reversed(body.get("messages", [])):
+        if message.get("role") == "user":
+            return message.get("content", "")
+    return ""
+
+
+class _MockHandler(BaseHTTPRequestHandler):
+    """Serves /v1/chat/completions and Gemini :generateContent/:streamGenerateContent"""
+
+    protocol_version = "HTTP/1.1"
+    server_version = "JarvisMockProvider/1.0"
+
+    def log_message(self, format, *args):
+        pass
+
+    @property
+    def mock(self):
+        return self.server.mock
+
+    def do_GET(self):
+        # Cheap endpoint for health checks and connection warm-up
+        self._send_json(200, {"status": "ok", "stats": self.mock.get_stats()})
+
+    def do_HEAD(self):
+        # Keep-alive ping from the connection warmer
+        self.send_response(200)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", "0") or 0)
+        try:
+            body = json.loads(self.rfile.read(length) or b"{}")
+        except ValueError:
+            self._send_json(400, {"error": {"message": "Invalid JSON body", "code": 400}})
+            return
+
+        gemini = ":generateContent" in self.path or ":streamGenerateContent" in self.path
+        stream = ":streamGenerateContent" in self.path or bool(body.get("stream"))
+
+        if self._inject_failure():
+            return
+
+        text = self.mock.build_response(_last_user_text(body, gemini))
+        tokens = [word + " " for word in text.split(" ")]
+        tokens[-1] = tokens[-1].rstrip(" ")
+        model = body.get("model") or self.path.rsplit("/", 1)[-1].split(":")[0]
+
+        if stream:
+            self._stream(tokens, model, gemini)
+        else:
+            time.sleep(self.mock.config.ttft + len(tokens) / self.mock.config.tokens_per_sec)
+            self._send_json(200, self._completion(text, len(tokens), model, gemini, body))
+
+    def _inject_failure(self):
+        """Apply rate limiting and random error injection - True if a failure was sent"""
+        config = self.mock.config
+        limited, remaining, reset = self.mock.check_rate_limit()
+        self.rate_headers = {
+            "x-ratelimit-limit-requests": str(config.rate_limit_rpm),
+            "x-ratelimit-remaining-requests": str(remaining),
+            "x-ratelimit-reset-requests": f"{reset:.1f}s"
+        } if config.rate_limit_rpm else {}
+
+        roll = config.random.random()
+        if limited or roll < config.error_429_rate:
+            self.mock.count("errors_429")
+            headers = dict(self.rate_headers, **{"Retry-After": str(max(int(reset), 1) if limited else 1)})
+            self._send_json(429, {"error": {"message": "Rate limit exceeded (mock)", "code": 429}}, headers)
+            return True
+        roll -= config.error_429_rate
+        if roll < config.error_500_rate:
+            self.mock.count("errors_500")
+            self._send_json(500, {"error": {"message": "Internal server error (mock)", "code": 500}})
+            return True
+        roll -= config.error_500_rate
+        if roll < config.timeout_rate:
+            self.mock.count("timeouts")
+            # Hold the connection open without answering, then drop it
+            time.sleep(config.timeout_seconds)
+            self.close_connection = True
+            return True
+        return False
+
+    def _completion(self, text, completion_tokens, model, gemini, body):
+        prompt_tokens = len(json.dumps(body)) // 4
+        self.mock.count("tokens", completion_tokens)
+        if gemini:
+            return {
+                "candidates": [{"content": {"role": "model", "parts": [{"text": text}]}, "finishReason": "STOP"}],
+                "usageMetadata": {"promptTokenCount": prompt_tokens, "candidatesTokenCount": completion_tokens,
+                                  "totalTokenCount": prompt_tokens + completion_tokens}
+            }
+        return {
+            "id": f"mock-{int(time.time() * 1000)}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": model,
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": text}, "finish_reason": "stop"}],
+            "usage": {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens,
+                      "total_tokens": prompt_tokens + completion_tokens}
+        }
+
+    def _write_chunk(self, data):
+        """Write one HTTP/1.1 chunk - real providers stream SSE with chunked encoding"""
+        self.wfile.write(f"{len(data):x}\r\n".encode("ascii") + data + b"\r\n")
+        self.wfile.flush()
+
+    def _stream(self, tokens, model, gemini):
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Transfer-Encoding", "chunked")
+        for name, value in self.rate_headers.items():
+            self.send_header(name, value)
+        self.end_headers()
+
+        try:
+            # OpenRouter-style keep-alive comment while "processing"
+            self._write_chunk(b": MOCK PROCESSING\n\n")
+            time.sleep(self.mock.config.ttft)
+
+            interval = 1.0 / self.mock.config.tokens_per_sec
+            for index, token in enumerate(tokens):
+                if index:
+                    time.sleep(interval)
+                if gemini:
+                    event = {"candidates": [{"content": {"role": "model", "parts": [{"text": token}]}}]}
+                else:
+                    event = {"id": "mock-stream", "object": "chat.completion.chunk", "model": model,
+                             "choices": [{"index": 0, "delta": {"content": token}, "finish_reason": None}]}
+                self._write_chunk(f"data: {json.dumps(event)}\n\n".encode("utf-8"))
+
+            if not gemini:
+                self._write_chunk(b"data: [DONE]\n\n")
+            self.wfile.write(b"0\r\n\r\n")
+            self.wfile.flush()
+            self.mock.count("tokens", len(tokens))
+        except (BrokenPipeError, ConnectionResetError):
+            # Client cancelled the stream
+            self.close_connection = True
+            self.mock.count("client_aborts")
+
+    def _send_json(self, status, payload, headers=None):
+        data = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for name, value in (headers or getattr(self, "rate_headers", {})).items():
+            self.send_header(name, value)
+        self.end_headers()
+        try:
+            self.wfile.write(data)
+        except (BrokenPipeError, ConnectionResetError):
+            self.mock.count("client_aborts")
+
+
+class MockProviderServer:
+    """
+    Bundled stand-in for OpenAI/OpenRouter and Gemini endpoints
+
+    Speaks chat completions (JSON and SSE with [DONE]), Gemini
+    generateContent and streamGenerateContent?alt=sse. Time-to-first-token,
+    tokens/sec, 429/500/timeout injection, a requests-per-minute limit and
+    echo or canned replies are all configurable.
+    """
+
+    def __init__(self, host="127.0.0.1", port=None, config=None):
+        self.host = host
+        self.port = port if port is not None else int(os.environ.get("MOCK_PROVIDER_PORT", "8765"))
+        self.config = config or MockProviderConfig()
+        self.stats = {"requests": 0, "tokens": 0, "errors_429": 0, "errors_500": 0,
+                      "timeouts": 0, "client_aborts": 0}
+        self._request_times = deque()
+        self._lock = threading.Lock()
+        self._server = None
+        self._thread = None
+
+    @property
+    def base_url(self):
+        return f"http://{self.host}:{self.port}"
+
+    @property
+    def chat_endpoint(self):
+        return f"{self.base_url}/v1/chat/completions"
+
+    def gemini_endpoint(self, model_id="gemini-mock"):
+        return f"{self.base_url}/v1beta/models/{model_id}:generateContent"
+
+    def build_response(self, user_text):
+        """Get the reply text - echo of the prompt or the canned response"""
+        if self.config.response_mode == "echo" and user_text:
+            return f"Echo: {user_text}"
+        return self.config.canned_response
+
+    def count(self, key, amount=1):
+        with self._lock:
+            self.stats[key] = self.stats.get(key, 0) + amount
+
+    def check_rate_limit(self):
+        """
+        Apply the requests-per-minute limit
+
+        Returns:
+            tuple: (limited, remaining, seconds_until_reset)
+        """
+        with self._lock:
+            self.stats["requests"] += 1
+            rpm = self.config.rate_limit_rpm
+            if not rpm:
+                return False, 0, 0.0
+            now = time.time()
+            while self._request_times and now - self._request_times[0] >= 60:
+                self._request_times.popleft()
+            reset = 60 - (now - self._request_times[0]) if self._request_times else 60.0
+            if len(self._request_times) >= rpm:
+                return True, 0, reset
+            self._request_times.append(now)
+            return False, rpm - len(self._request_times), reset
+
+    def get_stats(self):
+        with self._lock:
+            return dict(self.stats)
+
+    def start(self):
+        """Start serving on a background daemon thread (port 0 picks a free port)"""
+        self._server = ThreadingHTTPServer((self.host, self.port), _MockHandler)
+        self._server.daemon_threads = True
+        self._server.mock = self
+        self.port = self._server.server_address[1]
+        self._thread = threading.Thread(target=self._server.serve_forever, name="jarvis-mock-provider", daemon=True)
+        self._thread.start()
+        return self
+
+    def serve_forever(self):
+        """Serve on the calling thread (used by the command line entry point)"""
+        self._server = ThreadingHTTPServer((self.host, self.port), _MockHandler)
+        self._server.daemon_threads = True
+        self._server.mock = self
+        self.port = self._server.server_address[1]
+        self._server.serve_forever()
+
+    def stop(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+
+def get_mock_models(base_url):
+    """
+    Model entries for JarvisAI.available_models pointing at a mock provider
+
+    Args:
+        base_url: Mock server base URL, e.g. http://127.0.0.1:8765
+    """
+    return {
+        "Mock GPT (Local)": {
+            "provider": "mock",
+            "model_id": "mock-gpt",
+            "endpoint": f"{base_url}/v1/chat/completions",
+            "price": "Free (local mock)",
+            "free_tier": "Offline",
+            "specialty": "Offline latency/throughput benchmarking (OpenAI protocol)"
+        },
+        "Mock Gemini (Local)": {
+            "provider": "mock",
+            "api_format": "gemini",
+            "model_id": "mock-gemini",
+            "endpoint": f"{base_url}/v1beta/models/mock-gemini:generateContent",
+            "price": "Free (local mock)",
+            "free_tier": "Offline",
+            "specialty": "Offline latency/throughput benchmarking (Gemini protocol)"
+        }
+    }
+
+
+# Singleton in-process mock server
+_mock_server_instance = None
+
+def get_mock_provider():
+    """
+    Get the in-process mock provider, starting it on first use
+
+    If the port is already taken (e.g. a standalone mock server is
+    running) the existing server is used instead.
+    """
+    global _mock_server_instance
+
+    if _mock_server_instance is None:
+        server = MockProviderServer()
+        try:
+            server.start()
+        except OSError:
+            print(f"⚠️ Mock provider port {server.port} in use - using the server already running there")
+        _mock_server_instance = server
+
+    return _mock_server_instance
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local OpenAI/Gemini-compatible mock provider for JARVIS")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=int(os.environ.get("MOCK_PROVIDER_PORT", "8765")))
+    parser.add_argument("--ttft", type=float, help="Seconds before the first token")
+    parser.add_argument("--tps", type=float, help="Tokens per second after the first token")
+    parser.add_argument("--error-429", type=float, help="Probability of a 429 response")
+    parser.add_argument("--error-500", type=float, help="Probability of a 500 response")
+    parser.add_argument("--timeout-rate", type=float, help="Probability of hanging without a response")
+    parser.add_argument("--rpm", type=int, help="Requests-per-minute limit (0 = unlimited)")
+    parser.add_argument("--mode", choices=["echo", "canned"], help="Reply mode")
+    parser.add_argument("--seed", type=int, help="Seed for reproducible error injection")
+    args = parser.parse_args()
+
+    config = MockProviderConfig(
+        ttft=args.ttft, tokens_per_sec=args.tps, error_429_rate=args.error_429, error_500_rate=args.error_500,
+        timeout_rate=args.timeout_rate, response_mode=args.mode, rate_limit_rpm=args.rpm, seed=args.seed
+    )
+    server = MockProviderServer(host=args.host, port=args.port, config=config)
+    print(f"🧪 Mock provider on {server.base_url} "
+          f"(ttft {config.ttft}s, {config.tokens_per_sec} tok/s, mode {config.response_mode})")
+    print(f"   OpenAI: {server.chat_endpoint}")
+    print(f"   Gemini: {server.gemini_endpoint()}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("👋 Mock provider stopped")
+
+
+if __name__ == "__main__":
+    main()
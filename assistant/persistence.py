@@ -0,0 +1,176 @@
+# persistence.py - Debounced write-behind worker that moves state saves off the caller's thread
+
+import os
+import time
+import atexit
+import threading
+
+
+class PersistenceWorker:
+    """
+    Background thread that batches and coalesces disk writes
+
+    Callers schedule a save task instead of running it. Tasks are keyed
+    (by default the task itself, so a bound method like
+    engine._save_conversation_history is one key per engine); scheduling
+    a key that is already pending replaces it, so ten quick turns become
+    one save. A batch is written once no new task has arrived for
+    `debounce` seconds, or `max_delay` after its first task at the latest,
+    so steady traffic cannot postpone writes forever.
+
+    Tasks read their state when they run, not when scheduled, and must be
+    safe to call from the worker thread. flush() writes everything pending
+    before returning - used on clean shutdown (also registered with
+    atexit) and before anything that reads the files back.
+
+    WRITE_BEHIND=false runs every task immediately on the caller's thread.
+    """
+
+    def __init__(self, debounce=None, max_delay=None, enabled=None):
+        """
+        Args:
+            debounce: Quiet seconds before a batch is written (PERSIST_DEBOUNCE_MS, default 500)
+            max_delay: Longest a task may wait (PERSIST_MAX_DELAY_MS, default 3000)
+            enabled: Run tasks in the background (WRITE_BEHIND, default true)
+        """
+        self.debounce = debounce if debounce is not None else float(os.environ.get("PERSIST_DEBOUNCE_MS", "500")) / 1000
+        self.max_delay = max_delay if max_delay is not None else float(os.environ.get("PERSIST_MAX_DELAY_MS", "3000")) / 1000
+        self.enabled = enabled if enabled is not None else os.environ.get("WRITE_BEHIND", "true").lower() == "true"
+
+        self.pending = {}          # key -> task, in first-scheduled order
+        self.first_pending = None  # when the oldest pending task was scheduled
+        self.last_scheduled = None
+        self.scheduled = 0
+        self.coalesced = 0
+        self.tasks_run = 0
+        self.batches = 0
+        self.errors = 0
+        self.last_flush_latency = None
+        self.max_flush_latency = 0.0
+        self.total_flush_latency = 0.0
+        self.max_queue_depth = 0
+
+        self._cond = threading.Condition()
+        self._write_lock = threading.Lock()  # one batch at a time (worker or flush())
+        self._thread = None
+        self._stopped = False
+
+    def schedule(self, task, key=None):
+        """
+        Queue a save task (replacing a pending one with the same key)
+
+        Args:
+            task: Zero-argument callable that writes the current state
+            key: Coalescing key (default: the task itself)
+        """
+        if not self.enabled or self._stopped:
+            self._run_batch([task])
+            return
+
+        key = task if key is None else key
+        now = time.time()
+        with self._cond:
+            self.scheduled += 1
+            if key in self.pending:
+                self.coalesced += 1
+            self.pending[key] = task
+            self.max_queue_depth = max(self.max_queue_depth, len(self.pending))
+            if self.first_pending is None:
+                self.first_pending = now
+            self.last_scheduled = now
+            self._ensure_thread()
+            self._cond.notify()
+
+    def _ensure_thread(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, name="jarvis-persistence", daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self.pending and not self._stopped:
+                    self._cond.wait()
+                if self._stopped and not self.pending:
+                    return
+                # Debounce: wait for a quiet period, bounded by max_delay from the first task
+                while self.pending and not self._stopped:
+                    now = time.time()
+                    due = min(self.last_scheduled + self.debounce, self.first_pending + self.max_delay)
+                    if now >= due:
+                        break
+                    self._cond.wait(due - now)
+            self.flush()
+
+    def _take(self):
+        with self._cond:
+            tasks = list(self.pending.values())
+            self.pending.clear()
+            self.first_pending = None
+            return tasks
+
+    def _run_batch(self, tasks):
+        if not tasks:
+            return
+        start = time.perf_counter()
+        for task in tasks:
+            try:
+                task()
+            except Exception as e:
+                self.errors += 1
+                print(f"⚠️ Background save failed: {str(e)}")
+        latency = time.perf_counter() - start
+        self.tasks_run += len(tasks)
+        self.batches += 1
+        self.last_flush_latency = latency
+        self.max_flush_latency = max(self.max_flush_latency, latency)
+        self.total_flush_latency += latency
+
+    def flush(self):
+        """Write every pending task now (blocks until done)"""
+        with self._write_lock:
+            self._run_batch(self._take())
+
+    def shutdown(self):
+        """Flush pending writes and stop the worker thread"""
+        with self._cond:
+            self._stopped = True
+            self._cond.notify()
+        self.flush()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(timeout=5)
+
+    def get_stats(self):
+        """Get queue depth, coalescing counters and flush latency"""
+        with self._cond:
+            depth = len(self.pending)
+        return {
+            "enabled": self.enabled,
+            "queue_depth": depth,
+            "max_queue_depth": self.max_queue_depth,
+            "scheduled": self.scheduled,
+            "coalesced": self.coalesced,
+            "tasks_run": self.tasks_run,
+            "batches": self.batches,
+            "errors": self.errors,
+            "debounce_ms": round(self.debounce * 1000),
+            "last_flush_ms": round(self.last_flush_latency * 1000, 2) if self.last_flush_latency is not None else None,
+            "avg_flush_ms": round(self.total_flush_latency / self.batches * 1000, 2) if self.batches else None,
+            "max_flush_ms": round(self.max_flush_latency * 1000, 2)
+        }
+
+
+# Singleton instance shared by every component in the process
+_persistence_worker_instance = None
+_persistence_worker_lock = threading.Lock()
+
+def get_persistence_worker():
+    """Get singleton instance of PersistenceWorker (flushed at interpreter exit)"""
+    global _persistence_worker_instance
+
+    with _persistence_worker_lock:
+        if _persistence_worker_instance is None:
+            _persistence_worker_instance = PersistenceWorker()
+            atexit.register(_persistence_worker_instance.shutdown)
+
+    return _persistence_worker_instance
@@ -0,0 +1,337 @@
+# provider_health.py - Latency-aware provider circuit breakers and failover chains
+
+import os
+import time
+import random
+import threading
+from collections import deque
+
+import requests
+
+from .hedging import get_model_family
+
+
+# Breaker states
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+# HTTP statuses worth retrying or failing over on
+RETRYABLE_STATUS_CODES = (408, 425, 429, 500, 502, 503, 504)
+
+
+class ProviderError(Exception):
+    """Raised when a provider answers with an HTTP error status"""
+
+    def __init__(self, message, status_code=None, retry_after=None):
+        super().__init__(message)
+        self.status_code = status_code
+        self.retry_after = retry_after
+
+    @property
+    def retryable(self):
+        return self.status_code in RETRYABLE_STATUS_CODES
+
+
+def check_provider_response(response, provider):
+    """
+    Raise ProviderError if a provider response carries an HTTP error status
+
+    Args:
+        response: requests.Response from the provider
+        provider: Provider name for the error message
+    """
+    if response.status_code < 400:
+        return
+
+    detail = ""
+    try:
+        error = response.json().get("error", {})
+        detail = error.get("message", "") if isinstance(error, dict) else str(error)
+    except Exception:
+        detail = (response.text or "")[:200]
+
+    retry_after = None
+    try:
+        retry_after = float(response.headers.get("Retry-After", ""))
+    except (TypeError, ValueError):
+        pass
+
+    raise ProviderError(
+        f"{provider} returned HTTP {response.status_code}: {detail}".rstrip(": "),
+        status_code=response.status_code,
+        retry_after=retry_after
+    )
+
+
+def classify_error(error):
+    """Get a short error class name for health tracking and telemetry"""
+    if isinstance(error, ProviderError):
+        if error.status_code == 429:
+            return "rate_limited"
+        if error.status_code and error.status_code >= 500:
+            return "server_error"
+        return f"http_{error.status_code}"
+    if isinstance(error, requests.exceptions.Timeout):
+        return "timeout"
+    if isinstance(error, requests.exceptions.ConnectionError):
+        return "connection"
+    if isinstance(error, ValueError):
+        return "bad_response"
+    return type(error).__name__
+
+
+def is_retryable(error):
+    """Check whether an error is transient (rate limit, 5xx, timeout, connection)"""
+    if isinstance(error, ProviderError):
+        return error.retryable
+    return isinstance(error, (requests.exceptions.Timeout, requests.exceptions.ConnectionError))
+
+
+def backoff_delay(attempt, error=None, base=0.5, cap=8.0):
+    """Full-jitter exponential backoff, honouring Retry-After when present"""
+    retry_after = getattr(error, "retry_after", None)
+    if retry_after:
+        return min(retry_after, cap)
+    return random.uniform(0, min(cap, base * (2 ** attempt)))
+
+
+class CircuitBreaker:
+    """
+    Health state for one provider or model
+
+    Tracks a rolling window of outcomes, a latency EWMA and the breaker
+    state. Calls slower than slow_call_threshold count as failures so a
+    provider that only ever times out trips like one that returns 5xx.
+    """
+
+    def __init__(self, name, window=20, window_seconds=120, error_threshold=0.5, min_requests=5,
+                 consecutive_threshold=3, cooldown=30, max_cooldown=300, slow_call_threshold=45,
+                 ewma_alpha=0.3):
+        self.name = name
+        self.window_seconds = window_seconds
+        self.error_threshold = error_threshold
+        self.min_requests = min_requests
+        self.consecutive_threshold = consecutive_threshold
+        self.base_cooldown = cooldown
+        self.max_cooldown = max_cooldown
+        self.slow_call_threshold = slow_call_threshold
+        self.ewma_alpha = ewma_alpha
+
+        self.outcomes = deque(maxlen=window)
+        self.state = CLOSED
+        self.opened_at = None
+        self.cooldown = cooldown
+        self.consecutive_failures = 0
+        self.latency_ewma = None
+        self.last_error = None
+        self.probe_in_flight = False
+        self.trip_count = 0
+
+    def _prune(self, now):
+        while self.outcomes and now - self.outcomes[0][0] > self.window_seconds:
+            self.outcomes.popleft()
+
+    def error_rate(self, now=None):
+        """Failure ratio over the rolling window"""
+        self._prune(now or time.time())
+        if not self.outcomes:
+            return 0.0
+        failures = sum(1 for _, ok in self.outcomes if not ok)
+        return failures / len(self.outcomes)
+
+    def current_state(self, now=None):
+        """Get the state, moving OPEN to HALF_OPEN once the cooldown elapsed"""
+        now = now or time.time()
+        if self.state == OPEN and now - self.opened_at >= self.cooldown:
+            self.state = HALF_OPEN
+            self.probe_in_flight = False
+        return self.state
+
+    def is_available(self, now=None):
+        """Check whether a request may be sent (does not reserve a probe)"""
+        state = self.current_state(now)
+        if state == OPEN:
+            return False
+        if state == HALF_OPEN:
+            return not self.probe_in_flight
+        return True
+
+    def acquire(self, now=None):
+        """Reserve permission to send - half-open breakers allow a single probe"""
+        if not self.is_available(now):
+            return False
+        if self.state == HALF_OPEN:
+            self.probe_in_flight = True
+        return True
+
+    def _update_latency(self, latency):
+        if latency is None:
+            return
+        if self.latency_ewma is None:
+            self.latency_ewma = latency
+        else:
+            self.latency_ewma = self.ewma_alpha * latency + (1 - self.ewma_alpha) * self.latency_ewma
+
+    def _trip(self, now):
+        if self.state == HALF_OPEN:
+            # Failed probe - back off harder before the next one
+            self.cooldown = min(self.cooldown * 2, self.max_cooldown)
+        self.state = OPEN
+        self.opened_at = now
+        self.probe_in_flight = False
+        self.trip_count += 1
+
+    def record_success(self, latency=None):
+        now = time.time()
+        self._update_latency(latency)
+
+        if latency is not None and latency > self.slow_call_threshold:
+            self.record_failure("slow_call", latency=None)
+            return
+
+        self.outcomes.append((now, True))
+        self.consecutive_failures = 0
+        if self.state == HALF_OPEN:
+            self.state = CLOSED
+            self.cooldown = self.base_cooldown
+            self.probe_in_flight = False
+
+    def record_failure(self, error_class, latency=None):
+        now = time.time()
+        self._update_latency(latency)
+        self.outcomes.append((now, False))
+        self.consecutive_failures += 1
+        self.last_error = error_class
+
+        if self.state == HALF_OPEN:
+            self._trip(now)
+            return
+
+        self._prune(now)
+        if self.consecutive_failures >= self.consecutive_threshold:
+            self._trip(now)
+        elif len(self.outcomes) >= self.min_requests and self.error_rate(now) >= self.error_threshold:
+            self._trip(now)
+
+    def get_status(self):
+        state = self.current_state()
+        status = {
+            "state": state,
+            "error_rate": round(self.error_rate(), 3),
+            "latency_ewma": round(self.latency_ewma, 3) if self.latency_ewma is not None else None,
+            "consecutive_failures": self.consecutive_failures,
+            "trips": self.trip_count,
+            "last_error": self.last_error
+        }
+        if state == OPEN:
+            status["retry_in"] = round(max(self.cooldown - (time.time() - self.opened_at), 0), 1)
+        return status
+
+
+class ProviderHealthTracker:
+    """
+    Per-provider and per-model circuit breakers for JarvisAI
+
+    A request is allowed only if both the provider breaker and the model
+    breaker admit it, so one bad OpenRouter route trips just that model
+    while a provider-wide outage trips every model behind it.
+    """
+
+    def __init__(self):
+        self.max_retries = int(os.environ.get("PROVIDER_MAX_RETRIES", "1"))
+        self.max_failover_models = int(os.environ.get("FAILOVER_MAX_MODELS", "3"))
+        self.fallback_models = [m.strip() for m in os.environ.get("FALLBACK_MODELS", "").split(",") if m.strip()]
+        self.breaker_settings = {
+            "cooldown": float(os.environ.get("BREAKER_COOLDOWN", "30")),
+            "slow_call_threshold": float(os.environ.get("BREAKER_SLOW_CALL_SECONDS", "45")),
+        }
+        self.breakers = {}
+        self.failovers = 0
+        self._lock = threading.Lock()
+
+    def _get_breaker(self, key):
+        breaker = self.breakers.get(key)
+        if breaker is None:
+            breaker = self.breakers[key] = CircuitBreaker(key, **self.breaker_settings)
+        return breaker
+
+    def is_available(self, model_name, provider):
+        """Check (without reserving a probe) whether a model can be called"""
+        with self._lock:
+            return (self._get_breaker(f"provider:{provider}").is_available()
+                    and self._get_breaker(f"model:{model_name}").is_available())
+
+    def allow_request(self, model_name, provider):
+        """Reserve permission to call a model, consuming half-open probes"""
+        with self._lock:
+            provider_breaker = self._get_breaker(f"provider:{provider}")
+            model_breaker = self._get_breaker(f"model:{model_name}")
+            if not (provider_breaker.is_available() and model_breaker.is_available()):
+                return False
+            provider_breaker.acquire()
+            model_breaker.acquire()
+            return True
+
+    def release(self, model_name, provider):
+        """Give back a reserved probe when the request was never sent or was cancelled"""
+        with self._lock:
+            for key in (f"provider:{provider}", f"model:{model_name}"):
+                breaker = self._get_breaker(key)
+                if breaker.state == HALF_OPEN:
+                    breaker.probe_in_flight = False
+
+    def record_success(self, model_name, provider, latency=None):
+        with self._lock:
+            self._get_breaker(f"provider:{provider}").record_success(latency)
+            self._get_breaker(f"model:{model_name}").record_success(latency)
+
+    def record_failure(self, model_name, provider, error, latency=None):
+        error_class = classify_error(error) if isinstance(error, BaseException) else str(error)
+        with self._lock:
+            # Client errors (bad request, auth) say nothing about provider health
+            if not isinstance(error, ProviderError) or error.retryable:
+                self._get_breaker(f"provider:{provider}").record_failure(error_class, latency)
+            self._get_breaker(f"model:{model_name}").record_failure(error_class, latency)
+
+    def build_fallback_chain(self, primary_model, available_models, has_api_key):
+        """
+        Build the ordered list of models to try for a request
+
+        FALLBACK_MODELS overrides the automatic chain, which prefers the
+        same model family on other providers, then any other provider,
+        then siblings on the primary's provider.
+
+        Returns:
+            list: Model names, primary first
+        """
+        chain = [primary_model]
+        primary = available_models.get(primary_model, {})
+
+        if self.fallback_models:
+            candidates = [m for m in self.fallback_models if m in available_models]
+        else:
+            family = get_model_family(primary)
+            others = [m for m, c in available_models.items()
+                      if m != primary_model and c["provider"] != primary.get("provider")]
+            same_family = [m for m in others if family and get_model_family(available_models[m]) == family]
+            other_providers = [m for m in others if m not in same_family]
+            siblings = [m for m, c in available_models.items()
+                        if m != primary_model and c["provider"] == primary.get("provider")]
+            candidates = same_family + other_providers + siblings
+
+        for model in candidates:
+            if len(chain) >= self.max_failover_models:
+                break
+            if model not in chain and has_api_key(model):
+                chain.append(model)
+
+        return chain
+
+    def get_status(self):
+        """Get breaker states for the orchestrator's status output"""
+        with self._lock:
+            return {
+                "breakers": {key: breaker.get_status() for key, breaker in self.breakers.items()},
+                "failovers": self.failovers
+            }
@@ -0,0 +1,293 @@
+# rate_scheduler.py - Per-provider token buckets with priority lanes in front of every LLM call
+
+import os
+import re
+import time
+import asyncio
+import threading
+
+
+# Priority lanes, highest first
+VOICE = "voice"
+INTERACTIVE = "interactive"
+BACKGROUND = "background"
+LANE_ORDER = {VOICE: 0, INTERACTIVE: 1, BACKGROUND: 2}
+
+# Longest a caller in each lane is allowed to queue before backpressure kicks in
+MAX_WAIT = {VOICE: 10.0, INTERACTIVE: 30.0, BACKGROUND: 120.0}
+
+_DURATION_PART = re.compile(r"(\d+(?:\.\d+)?)(ms|s|m|h)")
+
+
+class SchedulerBusy(Exception):
+    """Raised instead of sending a request that would queue too long or overflow the queue"""
+
+    def __init__(self, message, retry_after=None, lane=None):
+        super().__init__(message)
+        self.retry_after = retry_after
+        self.lane = lane
+
+
+def parse_reset(value, now=None):
+    """
+    Parse a rate-limit reset header into seconds from now
+
+    Handles OpenAI-style durations ("1s", "6m0s", "20ms"), plain seconds
+    and epoch timestamps in seconds or milliseconds (OpenRouter).
+    """
+    if value is None:
+        return None
+    value = str(value).strip()
+    now = now or time.time()
+
+    try:
+        number = float(value)
+    except ValueError:
+        parts = _DURATION_PART.findall(value)
+        if not parts:
+            return None
+        scale = {"ms": 0.001, "s": 1, "m": 60, "h": 3600}
+        return sum(float(amount) * scale[unit] for amount, unit in parts)
+
+    if number > 1e12:
+        return max(number / 1000.0 - now, 0.0)
+    if number > 1e9:
+        return max(number - now, 0.0)
+    return number
+
+
+def _header(headers, *names):
+    for name in names:
+        value = headers.get(name)
+        if value is not None:
+            return value
+    return None
+
+
+class TokenBucket:
+    """Request token bucket for one provider account (or model) - unlimited until a limit is configured or learned"""
+
+    def __init__(self, rpm=0):
+        self.set_rate(rpm)
+        self.tokens = self.capacity
+        self.updated = time.time()
+        self.paused_until = 0.0
+        self.learned = False
+
+    def set_rate(self, rpm):
+        self.rpm = rpm
+        self.rate = rpm / 60.0 if rpm else None
+        # Allow short bursts of ~10s worth of requests
+        self.capacity = max(2.0, rpm / 6.0) if rpm else float("inf")
+        if hasattr(self, "tokens"):
+            self.tokens = min(self.tokens, self.capacity)
+
+    def _refill(self, now):
+        if self.rate is not None:
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def available(self, now):
+        self._refill(now)
+        if now < self.paused_until:
+            return 0.0
+        return self.tokens
+
+    def wait_time(self, need, now):
+        """Seconds until `need` tokens are available"""
+        self._refill(now)
+        pause = max(self.paused_until - now, 0.0)
+        if self.rate is None or self.tokens >= need:
+            return pause
+        return max(pause, (need - self.tokens) / self.rate)
+
+    def take(self, now):
+        self._refill(now)
+        if self.rate is not None:
+            self.tokens -= 1
+
+    def pause(self, seconds, now):
+        self.paused_until = max(self.paused_until, now + seconds)
+
+
+class RateLimitScheduler:
+    """
+    Admission control for LLM calls: token bucket per key + priority lanes
+
+    Keys are chosen by the caller - JarvisAI uses the provider, since rate
+    limits apply to the account, so all OpenRouter models share one bucket
+    (a model can opt into its own bucket with "rate_limit_bucket").
+
+    Every provider call acquires a slot first. Voice turns go ahead of
+    interactive text, which goes ahead of background work; background work
+    also leaves a reserve of the bucket for the other lanes. Limits are
+    learned from x-ratelimit-* / Retry-After headers, and a 429 without
+    headers halves the bucket's assumed rate.
+
+    When the queue is full or the estimated wait exceeds the lane's limit
+    the caller gets SchedulerBusy (with a retry_after estimate) instead of
+    an uncontrolled 429.
+    """
+
+    def __init__(self, max_queue=None, background_reserve=None):
+        self.max_queue = max_queue or int(os.environ.get("SCHEDULER_MAX_QUEUE", "32"))
+        self.background_reserve = background_reserve if background_reserve is not None else float(
+            os.environ.get("SCHEDULER_BACKGROUND_RESERVE", "0.25")
+        )
+        self.buckets = {}
+        self.waiters = []
+        self._seq = 0
+        self._cond = threading.Condition()
+        self.lane_stats = {lane: {"requests": 0, "rejected": 0, "total_wait": 0.0, "max_wait": 0.0}
+                           for lane in LANE_ORDER}
+
+    def _default_rpm(self, provider):
+        value = os.environ.get(f"RATE_LIMIT_RPM_{(provider or '').upper()}") or os.environ.get("RATE_LIMIT_RPM")
+        return int(value) if value else 0
+
+    def _get_bucket(self, key, provider=None):
+        bucket = self.buckets.get(key)
+        if bucket is None:
+            bucket = self.buckets[key] = TokenBucket(self._default_rpm(provider))
+        return bucket
+
+    def _need(self, bucket, lane):
+        if lane == BACKGROUND and bucket.rate is not None:
+            return 1.0 + self.background_reserve * bucket.capacity
+        return 1.0
+
+    def _is_next(self, waiter):
+        order, seq, key = waiter
+        return not any(w[2] == key and (w[0], w[1]) < (order, seq) for w in self.waiters)
+
+    def _reject(self, lane, message, retry_after):
+        self.lane_stats[lane]["rejected"] += 1
+        raise SchedulerBusy(message, retry_after=round(retry_after, 1) if retry_after else None, lane=lane)
+
+    def acquire(self, key, lane=INTERACTIVE, provider=None, blocking=True):
+        """
+        Wait for a request slot in a bucket
+
+        Args:
+            key: Bucket key - the provider, or a model with its own limit
+            lane: VOICE, INTERACTIVE or BACKGROUND
+            provider: Provider name, used for the default RATE_LIMIT_RPM_<PROVIDER>
+            blocking: If False return None instead of waiting
+
+        Returns:
+            float: Seconds spent queued (None if non-blocking and a wait was needed)
+
+        Raises:
+            SchedulerBusy: Queue full or estimated wait beyond the lane's limit
+        """
+        lane = lane if lane in LANE_ORDER else INTERACTIVE
+        start = time.time()
+
+        with self._cond:
+            bucket = self._get_bucket(key, provider)
+            need = self._need(bucket, lane)
+
+            if len(self.waiters) >= self.max_queue or (
+                    lane == BACKGROUND and len(self.waiters) >= self.max_queue // 2):
+                self._reject(lane, f"Request queue full ({len(self.waiters)} waiting)", bucket.wait_time(need, start))
+
+            ahead = sum(1 for w in self.waiters if w[2] == key and w[0] <= LANE_ORDER[lane])
+            estimate = bucket.wait_time(need + ahead, start)
+            if estimate > MAX_WAIT[lane]:
+                self._reject(lane, f"Rate limit reached for {key}, estimated wait {estimate:.0f}s", estimate)
+
+            self._seq += 1
+            waiter = (LANE_ORDER[lane], self._seq, key)
+            self.waiters.append(waiter)
+            try:
+                while True:
+                    now = time.time()
+                    if self._is_next(waiter) and bucket.available(now) >= need:
+                        bucket.take(now)
+                        break
+                    if not blocking:
+                        return None
+                    if now - start > MAX_WAIT[lane]:
+                        self._reject(lane, f"Timed out waiting for a {key} slot", bucket.wait_time(need, now))
+                    timeout = bucket.wait_time(need, now) if self._is_next(waiter) else 0.5
+                    self._cond.wait(min(max(timeout, 0.01), 0.5))
+            finally:
+                self.waiters.remove(waiter)
+                self._cond.notify_all()
+
+            queue_time = time.time() - start
+            stats = self.lane_stats[lane]
+            stats["requests"] += 1
+            stats["total_wait"] += queue_time
+            stats["max_wait"] = max(stats["max_wait"], queue_time)
+            return queue_time
+
+    async def acquire_async(self, key, lane=VOICE, provider=None):
+        """Async acquire - only falls back to a worker thread when it actually has to wait"""
+        queue_time = self.acquire(key, lane, provider, blocking=False)
+        if queue_time is not None:
+            return queue_time
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, self.acquire, key, lane, provider)
+
+    def observe(self, key, headers, status_code, provider=None):
+        """
+        Learn from a provider response's rate-limit headers and status
+
+        Args:
+            key: Bucket key the request was admitted under
+            headers: Response headers (case-insensitive mapping)
+            status_code: HTTP status
+        """
+        now = time.time()
+        limit = _header(headers, "x-ratelimit-limit-requests", "x-ratelimit-limit")
+        remaining = _header(headers, "x-ratelimit-remaining-requests", "x-ratelimit-remaining")
+        reset = parse_reset(_header(headers, "x-ratelimit-reset-requests", "x-ratelimit-reset"), now)
+        retry_after = parse_reset(headers.get("Retry-After"), now)
+
+        with self._cond:
+            bucket = self._get_bucket(key, provider)
+            try:
+                if limit is not None and int(float(limit)) > 0:
+                    if int(float(limit)) != bucket.rpm:
+                        bucket.set_rate(int(float(limit)))
+                    bucket.learned = True
+                if remaining is not None:
+                    bucket.tokens = min(bucket.tokens, float(remaining))
+                    if float(remaining) <= 0 and reset:
+                        bucket.pause(reset, now)
+            except ValueError:
+                pass
+
+            if status_code == 429:
+                bucket.pause(retry_after or reset or 1.0, now)
+                if limit is None:
+                    # No headers to learn from - back off multiplicatively
+                    bucket.set_rate(max(1, bucket.rpm // 2) if bucket.rpm else 30)
+                    bucket.tokens = min(bucket.tokens, 0.0)
+                    bucket.learned = True
+
+            self._cond.notify_all()
+
+    def get_stats(self):
+        """Get per-lane queue-time metrics, queue depth and bucket states"""
+        now = time.time()
+        with self._cond:
+            lanes = {}
+            for lane, stats in self.lane_stats.items():
+                lanes[lane] = dict(stats)
+                lanes[lane]["avg_wait"] = round(stats["total_wait"] / stats["requests"], 3) if stats["requests"] else 0.0
+                lanes[lane]["total_wait"] = round(stats["total_wait"], 3)
+                lanes[lane]["max_wait"] = round(stats["max_wait"], 3)
+                lanes[lane]["queued"] = sum(1 for w in self.waiters if w[0] == LANE_ORDER[lane])
+
+            buckets = {}
+            for key, bucket in self.buckets.items():
+                buckets[key] = {
+                    "rpm": bucket.rpm or None,
+                    "tokens": round(bucket.available(now), 2) if bucket.rate is not None else None,
+                    "paused_for": round(max(bucket.paused_until - now, 0.0), 1),
+                    "learned": bucket.learned
+                }
+
+            return {"lanes": lanes, "buckets": buckets, "queue_depth": len(self.waiters), "max_queue": self.max_queue}
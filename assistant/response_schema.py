@@ -0,0 +1,158 @@
+# response_schema.py - Learned text-extraction paths for unknown provider response formats
+
+import os
+import json
+import threading
+
+
+# Keys that likely contain the response text
+TEXT_KEYS = ["content", "text", "message", "response", "output", "result", "generated_text",
+             "completion", "answer", "reply", "response_text", "assistant"]
+
+
+def find_text_path(obj, max_depth=10):
+    """
+    Recursively search a JSON structure for response text
+
+    Same search order as the devil parser: likely text keys first, then
+    every other key, then list items.
+
+    Returns:
+        tuple: (text, path) where path is the key/index sequence, or (None, None)
+    """
+    def search(node, path, depth):
+        # Prevent infinite recursion
+        if depth > max_depth:
+            return None, None
+
+        # Base case: string found
+        if isinstance(node, str) and len(node) > 20:
+            return node, path
+
+        if isinstance(node, dict):
+            # First check keys most likely to contain the result
+            for key in TEXT_KEYS:
+                if key in node and node[key]:
+                    value = node[key]
+                    if isinstance(value, str) and len(value) > 20:
+                        return value, path + [key]
+                    text, found = search(value, path + [key], depth + 1)
+                    if text:
+                        return text, found
+
+            # Then check all other keys
+            for key, value in node.items():
+                text, found = search(value, path + [key], depth + 1)
+                if text:
+                    return text, found
+
+        if isinstance(node, list):
+            for index, item in enumerate(node):
+                text, found = search(item, path + [index], depth + 1)
+                if text:
+                    return text, found
+
+        return None, None
+
+    return search(obj, [], 0)
+
+
+def follow_path(obj, path):
+    """Follow a key/index path - returns the string found there or None"""
+    node = obj
+    for step in path:
+        try:
+            node = node[step]
+        except (KeyError, IndexError, TypeError):
+            return None
+    return node if isinstance(node, str) and node else None
+
+
+class ResponseSchemaCache:
+    """
+    Remembers where the reply text lives for each provider+model
+
+    The first successful recursive search records its key/index path;
+    later responses are read with a direct O(depth) lookup. Paths are
+    persisted so they survive restarts.
+    """
+
+    def __init__(self, path=None):
+        self.path = path or os.path.join("memory", "response_schemas.json")
+        self.schemas = {}
+        self.stats = {}
+        self._lock = threading.Lock()
+        self._load()
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                self.schemas = json.load(f)
+        except Exception as e:
+            print(f"Error loading response schemas: {str(e)}")
+            self.schemas = {}
+
+    def _save(self):
+        try:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            tmp_path = self.path + ".tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(self.schemas, f, ensure_ascii=False, indent=2)
+            os.replace(tmp_path, self.path)
+        except Exception as e:
+            print(f"Error saving response schemas: {str(e)}")
+
+    def _count(self, key, outcome):
+        counts = self.stats.setdefault(key, {"hits": 0, "misses": 0, "learned": 0})
+        counts[outcome] += 1
+
+    def extract(self, key, response_json):
+        """
+        Extract the reply text using the learned path, learning one if needed
+
+        Args:
+            key: Schema key, e.g. "provider:model_id"
+            response_json: Decoded provider response
+
+        Returns:
+            str: Extracted text or None if nothing was found
+        """
+        with self._lock:
+            learned = self.schemas.get(key)
+
+        if learned is not None:
+            text = follow_path(response_json, learned)
+            if text is not None:
+                with self._lock:
+                    self._count(key, "hits")
+                return text
+
+        text, path = find_text_path(response_json)
+
+        with self._lock:
+            if learned is not None:
+                self._count(key, "misses")
+            if text is not None and path != learned:
+                self.schemas[key] = path
+                self._count(key, "learned")
+                self._save()
+
+        return text
+
+    def get_stats(self):
+        """Get learned paths with their hit/miss counts"""
+        with self._lock:
+            per_key = {
+                key: dict(self.stats.get(key, {"hits": 0, "misses": 0, "learned": 0}), path=path)
+                for key, path in self.schemas.items()
+            }
+        hits = sum(s["hits"] for s in per_key.values())
+        misses = sum(s["misses"] for s in per_key.values())
+        return {
+            "schemas": per_key,
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": round(hits / (hits + misses), 3) if hits + misses else 0.0
+        }
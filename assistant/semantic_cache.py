@@ -0,0 +1,430 @@
+# semantic_cache.py - Near-duplicate response cache over hashed n-gram vectors
+
+import os
+import re
+import sys
+import time
+import zlib
+import threading
+from collections import deque
+
+from .cache_keys import normalize_query
+
+# Filler and request words that carry no meaning for matching. Question words
+# that change the intent (how, why, when, where, who, which) are kept.
+STOPWORDS = set(
+    "a an the i you we me my your us our do does did can could would should will shall may might must "
+    "please kindly just some any to of in on for at by with about from as is are am was were be been "
+    "it its this that these those there what tell show give let know explain want need like "
+    "hey hi jarvis so really quick quickly".split()
+)
+
+# Words that point back into the conversation ("why?", "tell me more", "fix it") -
+# a message using them means something different in every conversation
+CONTEXT_WORDS = set(
+    "it its this that these those they them their he him his she her more else again also above "
+    "previous same instead continue elaborate then one ones".split()
+)
+
+# Question words kept as content words, but not enough on their own to stand alone
+QUESTION_WORDS = {"how", "why", "who", "when", "where", "which"}
+
+# Contractions expanded before matching, so "what's" and "what is" are the same words
+CONTRACTIONS = [
+    (re.compile(r"\bcan't\b"), "can not"), (re.compile(r"\bwon't\b"), "will not"),
+    (re.compile(r"n't\b"), " not"), (re.compile(r"'re\b"), " are"), (re.compile(r"'ll\b"), " will"),
+    (re.compile(r"'ve\b"), " have"), (re.compile(r"'m\b"), " am"), (re.compile(r"'d\b"), " would"),
+    (re.compile(r"'s\b"), " is")
+]
+
+try:
+    import numpy as np
+    HAS_NUMPY = True
+except ImportError:
+    np = None
+    HAS_NUMPY = False
+
+
+def _words(text):
+    text = normalize_query(text)
+    for pattern, replacement in CONTRACTIONS:
+        text = pattern.sub(replacement, text)
+    return re.findall(r"[^\W_]+", text)
+
+
+def content_words(text):
+    """Normalized content words of a message: contractions expanded, punctuation, filler words and plural -s removed"""
+    words = _words(text)
+    content = [word for word in words if word not in STOPWORDS] or words
+    return [word[:-1] if len(word) > 3 and word.endswith("s") and not word.endswith("ss") else word
+            for word in content]
+
+
+def is_standalone(text, min_words=None):
+    """
+    Check whether a message means the same thing in any conversation
+
+    False for follow-ups that refer back to the conversation ("tell me
+    more", "why is that", "fix it") and for messages with fewer than
+    min_words content words, not counting question words ("why?", "how so").
+    Only standalone messages may be served by tiers keyed without the
+    conversation context (semantic and disk).
+
+    Args:
+        text: User message
+        min_words: Content words required (SEMANTIC_CACHE_MIN_WORDS, default 2)
+    """
+    min_words = min_words if min_words is not None else int(os.environ.get("SEMANTIC_CACHE_MIN_WORDS", "2"))
+    words = _words(text)
+    if any(word in CONTEXT_WORDS for word in words):
+        return False
+    standalone = [word for word in words if word not in STOPWORDS and word not in QUESTION_WORDS]
+    return len(standalone) >= min_words
+
+
+def embed(text, dim=256):
+    """
+    Cheap local embedding of a message
+
+    Content words (weight 2), adjacent content-word pairs (1) and character
+    trigrams of the content words (0.5) are hashed into `dim` buckets with
+    a sign bit, then L2-normalized. Rephrasings that only change filler
+    words, contractions, punctuation or plurals keep the same content
+    words and score 1.0 ("what's the capital of france" / "tell me the
+    capital of france"); swapping one content word scores 0.55-0.75
+    ("sort" for "reverse" a list in python: 0.72, "germany" for
+    "france": 0.56), well below the 0.9 threshold. check_embedding()
+    verifies this on a fixed set of pairs.
+
+    Returns:
+        numpy.ndarray: float32 vector of length dim (all zeros for empty text)
+    """
+    return _embed_words(content_words(text), dim)
+
+
+def _embed_words(content, dim):
+    vector = np.zeros(dim, dtype=np.float32)
+    features = [(word, 2.0) for word in content]
+    features.extend((f"{a} {b}", 1.0) for a, b in zip(content, content[1:]))
+    for word in content:
+        padded = f" {word} "
+        features.extend((padded[i:i + 3], 0.5) for i in range(len(padded) - 2))
+
+    for feature, weight in features:
+        h = zlib.crc32(feature.encode("utf-8"))
+        vector[h % dim] += weight if h & 0x80000000 else -weight
+
+    norm = np.linalg.norm(vector)
+    if norm:
+        vector /= norm
+    return vector
+
+
+class SemanticCache:
+    """
+    Response cache that also answers rephrased questions
+
+    Every cached prompt's embedding is a row of one contiguous float32
+    matrix. An inverted index from content words to rows limits a lookup
+    to rows sharing a content word with the query (no other row can reach
+    the threshold), so it is one small matrix-vector product. The best
+    match above the similarity threshold is served, but only within the
+    same scope (model and system prompt) so a near-duplicate never
+    crosses models or personalities. The conversation context is left
+    out on purpose: a rephrasing is usually asked on a later turn.
+
+    Full caches evict the least recently used row. Each hit keeps the
+    query, the matched prompt and the similarity so the threshold can be
+    tuned from real traffic.
+    """
+
+    def __init__(self, maxsize=None, threshold=None, dim=None, ttl=None):
+        """
+        Args:
+            maxsize: Rows in the matrix (SEMANTIC_CACHE_SIZE, default 2000)
+            threshold: Cosine similarity needed for a hit (SEMANTIC_CACHE_THRESHOLD, default 0.9)
+            dim: Embedding width (SEMANTIC_CACHE_DIM, default 256)
+            ttl: Seconds a row stays valid (RESPONSE_CACHE_TTL, 0 = no expiry)
+        """
+        self.maxsize = maxsize or int(os.environ.get("SEMANTIC_CACHE_SIZE", "2000"))
+        self.threshold = threshold or float(os.environ.get("SEMANTIC_CACHE_THRESHOLD", "0.9"))
+        self.dim = dim or int(os.environ.get("SEMANTIC_CACHE_DIM", "256"))
+        self.ttl = ttl if ttl is not None else float(os.environ.get("RESPONSE_CACHE_TTL", "3600"))
+        self.max_chars = int(os.environ.get("SEMANTIC_CACHE_MAX_CHARS", "300"))
+        self.min_words = int(os.environ.get("SEMANTIC_CACHE_MIN_WORDS", "2"))
+
+        self.vectors = np.zeros((self.maxsize, self.dim), dtype=np.float32)
+        self.scopes = np.full(self.maxsize, -1, dtype=np.int64)      # -1 marks a free row
+        self.last_used = np.zeros(self.maxsize, dtype=np.float64)
+        self.expires_at = np.full(self.maxsize, np.inf, dtype=np.float64)
+        self.prompts = [None] * self.maxsize
+        self.responses = [None] * self.maxsize
+        self.text_bytes = 0         # prompts + responses held by live rows
+        self.count = 0              # rows ever filled (live rows are [:count] with scope >= 0)
+        self.scope_ids = {}         # scope string -> small int
+        self.next_scope_id = 0
+        self.postings = {}          # content word -> set of rows containing it
+        self.row_words = [()] * self.maxsize
+
+        self.hits = 0
+        self.misses = 0
+        self.near_misses = 0        # best match within 0.1 below the threshold
+        self.evictions = 0
+        self.hit_similarity_total = 0.0
+        self.lookup_time_total = 0.0
+        self.lookups = 0
+        self.recent_hits = deque(maxlen=50)
+        self._lock = threading.Lock()
+
+    def _scope_id(self, scope, create=False):
+        scope_id = self.scope_ids.get(scope)
+        if scope_id is None and create:
+            # Forget scopes (retired prompts/models) that no live row uses
+            if len(self.scope_ids) >= 2 * self.maxsize:
+                live = set(self.scopes[:self.count].tolist())
+                self.scope_ids = {s: i for s, i in self.scope_ids.items() if i in live}
+            scope_id = self.scope_ids[scope] = self.next_scope_id
+            self.next_scope_id += 1
+        return scope_id
+
+    def _best_match(self, vector, words, scope_id, now):
+        """Most similar live row in a scope sharing a content word, as (row, similarity) - (-1, 0.0) if none"""
+        postings = [self.postings[word] for word in set(words) if word in self.postings]
+        if not postings:
+            return -1, 0.0
+
+        if sum(len(rows) for rows in postings) * 4 < self.count:
+            rows = np.fromiter(set().union(*postings), dtype=np.int64)
+            rows = rows[(self.scopes[rows] == scope_id) & (self.expires_at[rows] > now)]
+            if not len(rows):
+                return -1, 0.0
+            similarities = self.vectors[rows] @ vector
+            best = int(np.argmax(similarities))
+            return int(rows[best]), float(similarities[best])
+
+        # Common words cover most rows - one contiguous scan is cheaper than gathering them
+        live = self.scopes[:self.count] == scope_id
+        live &= self.expires_at[:self.count] > now
+        if not live.any():
+            return -1, 0.0
+        similarities = self.vectors[:self.count] @ vector
+        similarities[~live] = -1.0
+        best = int(np.argmax(similarities))
+        return best, float(similarities[best])
+
+    def accepts(self, query):
+        """
+        Check whether a message can be answered by similarity matching
+
+        The semantic tier is scoped by model and system prompt only, not by
+        the conversation, so it may only serve messages that stand on their
+        own (is_standalone). Long messages (pasted files, code) differ in
+        details the embedding cannot see, so only the exact tier serves them.
+        """
+        return len(query) <= self.max_chars and is_standalone(query, self.min_words)
+
+    def get(self, query, scope=""):
+        """
+        Get the response cached for the most similar prompt in a scope
+
+        Returns:
+            str: Cached response, or None below the threshold
+        """
+        start = time.perf_counter()
+        words = content_words(query)
+        vector = _embed_words(words, self.dim)
+
+        with self._lock:
+            scope_id = self._scope_id(scope)
+            best = -1
+            similarity = 0.0
+            if scope_id is not None:
+                best, similarity = self._best_match(vector, words, scope_id, time.time())
+
+            self.lookups += 1
+            self.lookup_time_total += time.perf_counter() - start
+
+            if best < 0 or similarity < self.threshold:
+                self.misses += 1
+                if similarity >= self.threshold - 0.1:
+                    self.near_misses += 1
+                return None
+
+            self.last_used[best] = time.time()
+            self.hits += 1
+            self.hit_similarity_total += similarity
+            self.recent_hits.append({
+                "query": query,
+                "matched": self.prompts[best],
+                "similarity": round(similarity, 3)
+            })
+            return self.responses[best]
+
+    def put(self, query, response, scope=""):
+        """Cache a response under its prompt's embedding, replacing a near-identical row in the same scope"""
+        words = content_words(query)
+        vector = _embed_words(words, self.dim)
+        now = time.time()
+
+        with self._lock:
+            scope_id = self._scope_id(scope, create=True)
+            best, similarity = self._best_match(vector, words, scope_id, now)
+            row = best if best >= 0 and similarity >= 0.999 else None
+
+            if row is None and self.count < self.maxsize:
+                row = self.count
+                self.count += 1
+            elif row is None:
+                # Free rows first (expired or cleared), then the least recently used
+                free = np.flatnonzero((self.scopes < 0) | (self.expires_at <= now))
+                row = int(free[0]) if len(free) else int(np.argmin(self.last_used))
+                if self.scopes[row] >= 0:
+                    self.evictions += 1
+
+            self._release_row(row)
+            self.text_bytes += sys.getsizeof(query) + sys.getsizeof(response)
+            self.vectors[row] = vector
+            self.scopes[row] = scope_id
+            self.last_used[row] = now
+            self.expires_at[row] = now + self.ttl if self.ttl else np.inf
+            self.prompts[row] = query
+            self.responses[row] = response
+            self.row_words[row] = tuple(set(words))
+            for word in self.row_words[row]:
+                self.postings.setdefault(word, set()).add(row)
+
+    def _release_row(self, row):
+        """Free a row's texts - returns the bytes released"""
+        if self.prompts[row] is None:
+            return 0
+        released = sys.getsizeof(self.prompts[row]) + sys.getsizeof(self.responses[row])
+        self.text_bytes -= released
+        self.prompts[row] = None
+        self.responses[row] = None
+        self.scopes[row] = -1
+        for word in self.row_words[row]:
+            rows = self.postings.get(word)
+            if rows is not None:
+                rows.discard(row)
+                if not rows:
+                    del self.postings[word]
+        self.row_words[row] = ()
+        return released
+
+    @property
+    def bytes(self):
+        """Approximate footprint: the preallocated matrices plus cached texts"""
+        return (self.vectors.nbytes + self.scopes.nbytes + self.last_used.nbytes
+                + self.expires_at.nbytes + self.text_bytes)
+
+    def evict_bytes(self, nbytes):
+        """Free least recently used rows until nbytes of text are released (the matrix stays allocated)"""
+        with self._lock:
+            freed = 0
+            live = np.flatnonzero(self.scopes[:self.count] >= 0)
+            for row in live[np.argsort(self.last_used[live])]:
+                if freed >= nbytes:
+                    break
+                freed += self._release_row(int(row))
+                self.evictions += 1
+            return freed
+
+    def clear(self):
+        """Drop every row (counters are kept)"""
+        with self._lock:
+            self.scopes[:] = -1
+            self.prompts = [None] * self.maxsize
+            self.responses = [None] * self.maxsize
+            self.text_bytes = 0
+            self.count = 0
+            self.scope_ids = {}
+            self.postings = {}
+            self.row_words = [()] * self.maxsize
+
+    def get_stats(self):
+        """Get hit/miss/eviction counters, lookup time and hit similarity"""
+        lookups = self.hits + self.misses
+        return {
+            "size": int(np.count_nonzero(self.scopes[:self.count] >= 0)),
+            "maxsize": self.maxsize,
+            "bytes": self.bytes,
+            "threshold": self.threshold,
+            "hits": self.hits,
+            "misses": self.misses,
+            "near_misses": self.near_misses,
+            "evictions": self.evictions,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+            "avg_hit_similarity": round(self.hit_similarity_total / self.hits, 3) if self.hits else None,
+            "avg_lookup_ms": round(self.lookup_time_total / self.lookups * 1000, 3) if self.lookups else None,
+            "recent_hits": list(self.recent_hits)[-5:]
+        }
+
+
+# Rephrasings that must match, and different questions that must not
+PARAPHRASE_PAIRS = [
+    ("what's the capital of france", "what is the capital of france"),
+    ("tell me the capital of france", "what's the capital of france"),
+    ("play some music", "play music please"),
+    ("how do I reverse a list in python", "How can I reverse a list in Python?"),
+    ("how does a hash map work", "how do hash maps work"),
+]
+NEAR_MISS_PAIRS = [
+    ("how do I reverse a list in python", "how do I sort a list in python"),
+    ("what's the capital of france", "what's the capital of germany"),
+    ("convert 10 miles to km", "convert 20 miles to km"),
+    ("who wrote hamlet", "who wrote macbeth"),
+    ("what is recursion", "why is recursion used"),
+]
+
+# Follow-ups that only make sense inside their conversation - accepts() must reject them
+FOLLOW_UP_QUERIES = ["why?", "Tell me more.", "tell me more", "why is that", "how so", "explain it again",
+                     "what about the second one", "can you make it shorter", "and then?"]
+
+
+def check_embedding(threshold=0.9, dim=256):
+    """
+    Score the paraphrase and near-miss pairs against a threshold
+
+    Returns:
+        list: (pair, similarity, expected) for every pair on the wrong side of the threshold
+    """
+    failures = []
+    for pairs, expected in ((PARAPHRASE_PAIRS, True), (NEAR_MISS_PAIRS, False)):
+        for a, b in pairs:
+            similarity = float(embed(a, dim) @ embed(b, dim))
+            if (similarity >= threshold) != expected:
+                failures.append(((a, b), round(similarity, 3), expected))
+    return failures
+
+
+def create_semantic_cache():
+    """
+    Create the semantic cache tier if enabled and NumPy is installed
+
+    Returns:
+        SemanticCache: or None (SEMANTIC_CACHE=false or NumPy missing)
+    """
+    if os.environ.get("SEMANTIC_CACHE", "true").lower() != "true":
+        return None
+    if not HAS_NUMPY:
+        print("⚠️ NumPy not installed - semantic response cache disabled (pip install numpy)")
+        return None
+    return SemanticCache()
+
+
+if __name__ == "__main__":
+    failures = check_embedding()
+    for (a, b), similarity, expected in failures:
+        print(f"❌ {similarity:.3f} \"{a}\" ~ \"{b}\" (should {'match' if expected else 'not match'})")
+    print(f"{'✅' if not failures else '❌'} {len(PARAPHRASE_PAIRS) + len(NEAR_MISS_PAIRS) - len(failures)}/"
+          f"{len(PARAPHRASE_PAIRS) + len(NEAR_MISS_PAIRS)} embedding pairs on the right side of the threshold")
+
+    if HAS_NUMPY:
+        cache = SemanticCache(maxsize=16)
+        served = [query for query in FOLLOW_UP_QUERIES if cache.accepts(query)]
+        standalone = [query for pair in PARAPHRASE_PAIRS for query in pair if not cache.accepts(query)]
+        for query in served:
+            print(f"❌ follow-up \"{query}\" would be served from the semantic tier")
+        for query in standalone:
+            print(f"❌ standalone \"{query}\" is kept out of the semantic tier")
+        print(f"{'✅' if not served and not standalone else '❌'} follow-ups kept out of the semantic tier")
@@ -0,0 +1,177 @@
+# single_flight.py - Coalesce identical in-flight provider requests
+
+import json
+import asyncio
+import hashlib
+import threading
+
+from .connection_pool import RequestCancelled
+
+
+def request_key(request):
+    """
+    Build the coalescing key for a prepared chat request
+
+    The payload already carries the model id, system prompt, context
+    window and user message, so hashing it with the model name covers the
+    full request.
+    """
+    raw = json.dumps([request["model_name"], request["payload"]], sort_keys=True, default=str)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class _Call:
+    """One in-flight request shared by a leader and its followers"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.waiters = []  # (loop, future) pairs for async followers
+        self.followers = 0
+        self.finished = False
+        self.loop = None  # Event loop of an async leader
+
+
+def _follower_error(error):
+    """A cancelled leader must not look like the follower itself was cancelled"""
+    if isinstance(error, asyncio.CancelledError):
+        return RequestCancelled("Coalesced request was cancelled")
+    return error
+
+
+def _leader_cancelled(call):
+    """Check whether a finished call ended because its leader cancelled (not a provider failure)"""
+    return isinstance(call.error, (RequestCancelled, asyncio.CancelledError))
+
+
+def _running_loop():
+    try:
+        return asyncio.get_running_loop()
+    except RuntimeError:
+        return None
+
+
+def _resolve(future, call):
+    if future.done():
+        return
+    if call.error is not None:
+        future.set_exception(_follower_error(call.error))
+    else:
+        future.set_result(call.result)
+
+
+class SingleFlight:
+    """
+    Single-flight execution for duplicate requests
+
+    The first caller for a key runs the request; callers arriving with the
+    same key while it is in flight wait for that result instead of issuing
+    their own. Works across threads (GUI) and event loops (voice engines).
+
+    Followers never cancelled anything themselves, so if the leader is
+    cancelled they join the key again: the first one back becomes the new
+    leader and re-issues the request, the rest follow it.
+    """
+
+    def __init__(self):
+        self._calls = {}
+        self._lock = threading.Lock()
+        self.stats = {"leaders": 0, "coalesced": 0}
+
+    def _join(self, key, loop=None):
+        """Get (call, is_leader) for a key, registering a new call if none is in flight"""
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None:
+                call.followers += 1
+                self.stats["coalesced"] += 1
+                return call, False
+            call = self._calls[key] = _Call()
+            call.loop = loop
+            self.stats["leaders"] += 1
+            return call, True
+
+    def _finish(self, key, call, result=None, error=None):
+        with self._lock:
+            self._calls.pop(key, None)
+            call.result = result
+            call.error = error
+            call.finished = True
+            waiters = list(call.waiters)
+        call.done.set()
+        for loop, future in waiters:
+            try:
+                loop.call_soon_threadsafe(_resolve, future, call)
+            except RuntimeError:
+                # Follower's loop already closed
+                pass
+
+    def do(self, key, fn):
+        """
+        Run fn() once for all concurrent callers with the same key
+
+        Returns:
+            tuple: (result, shared) - shared is True for followers that
+                reused another caller's in-flight result
+        """
+        call, leader = self._join(key)
+        while not leader:
+            if call.loop is not None and call.loop is _running_loop():
+                # Blocking here would stall the loop the leader needs - run independently
+                return fn(), False
+
+            call.done.wait()
+            if call.error is None:
+                return call.result, True
+            if not _leader_cancelled(call):
+                raise _follower_error(call.error)
+            call, leader = self._join(key)
+
+        try:
+            result = fn()
+        except BaseException as e:
+            self._finish(key, call, error=e)
+            raise
+        self._finish(key, call, result=result)
+        return result, False
+
+    async def do_async(self, key, coro_fn):
+        """
+        Async variant of do() - coro_fn() returns the awaitable to run
+
+        Returns:
+            tuple: (result, shared)
+        """
+        loop = asyncio.get_running_loop()
+        call, leader = self._join(key, loop)
+        while not leader:
+            future = loop.create_future()
+            with self._lock:
+                if call.finished:
+                    _resolve(future, call)
+                else:
+                    call.waiters.append((loop, future))
+            try:
+                return await future, True
+            except RequestCancelled:
+                if not _leader_cancelled(call):
+                    raise
+            call, leader = self._join(key, loop)
+
+        try:
+            result = await coro_fn()
+        except BaseException as e:
+            self._finish(key, call, error=e)
+            raise
+        self._finish(key, call, result=result)
+        return result, False
+
+    def get_stats(self):
+        """Get leader/coalesced counts and the number of requests in flight"""
+        with self._lock:
+            stats = dict(self.stats)
+            stats["in_flight"] = len(self._calls)
+        total = stats["leaders"] + stats["coalesced"]
+        stats["coalesce_rate"] = round(stats["coalesced"] / total, 3) if total else 0.0
+        return stats
@@ -0,0 +1,118 @@
+# streaming.py - Server-Sent Events helpers for token-streaming chat responses
+
+import json
+
+
+def uses_gemini_api(model_config):
+    """Check whether a model speaks the Gemini generateContent protocol"""
+    return model_config.get("provider") == "google" or model_config.get("api_format") == "gemini"
+
+
+def get_stream_request(model_config, endpoint, payload):
+    """
+    Turn a regular chat request into its streaming equivalent
+
+    Args:
+        model_config: Model configuration from JarvisAI.available_models
+        endpoint: Regular (non-streaming) endpoint URL
+        payload: Request payload already formatted for the provider
+
+    Returns:
+        tuple: (stream_endpoint, stream_payload)
+    """
+    if uses_gemini_api(model_config):
+        # Gemini uses a separate method; alt=sse switches it to SSE framing
+        stream_endpoint = endpoint.replace(":generateContent", ":streamGenerateContent")
+        separator = "&" if "?" in stream_endpoint else "?"
+        return f"{stream_endpoint}{separator}alt=sse", payload
+
+    # OpenAI-compatible providers (OpenRouter, OpenAI, DeepSeek)
+    stream_payload = dict(payload)
+    stream_payload["stream"] = True
+    return endpoint, stream_payload
+
+
+def is_event_stream(response):
+    """Check whether a response is an SSE stream rather than a plain JSON body"""
+    content_type = response.headers.get("Content-Type", "")
+    return "text/event-stream" in content_type
+
+
+def iter_sse_events(response):
+    """
+    Iterate decoded SSE events from a streaming HTTP response
+
+    Comment lines (": OPENROUTER PROCESSING" keep-alives) are skipped and
+    multi-line data fields are joined. Stops at the OpenAI "[DONE]" marker.
+
+    Args:
+        response: requests.Response opened with stream=True
+
+    Yields:
+        dict: Decoded JSON payload of each event
+    """
+    data_lines = []
+
+    for raw_line in response.iter_lines(decode_unicode=True):
+        if raw_line is None:
+            continue
+        line = raw_line.rstrip("\r")
+
+        # Blank line terminates an event
+        if not line:
+            if data_lines:
+                data = "\n".join(data_lines)
+                data_lines = []
+                if data.strip() == "[DONE]":
+                    return
+                try:
+                    yield json.loads(data)
+                except ValueError:
+                    continue
+            continue
+
+        if line.startswith(":"):
+            continue
+
+        if line.startswith("data:"):
+            data_lines.append(line[5:].lstrip(" "))
+
+    # Flush a trailing event without a terminating blank line
+    if data_lines:
+        data = "\n".join(data_lines)
+        if data.strip() != "[DONE]":
+            try:
+                yield json.loads(data)
+            except ValueError:
+                pass
+
+
+def extract_stream_delta(event, provider):
+    """
+    Extract the text delta carried by one streaming event
+
+    Args:
+        event: Decoded SSE event payload
+        provider: Provider name of the model being streamed
+
+    Returns:
+        str: Text delta (empty string if the event carries no text)
+    """
+    if not isinstance(event, dict):
+        return ""
+
+    # Gemini streamGenerateContent chunks
+    if provider == "google" or "candidates" in event:
+        candidates = event.get("candidates") or []
+        if not candidates:
+            return ""
+        parts = (candidates[0].get("content") or {}).get("parts") or []
+        return "".join(part.get("text", "") for part in parts)
+
+    # OpenAI-compatible chat.completion.chunk
+    choices = event.get("choices") or []
+    if not choices:
+        return ""
+    choice = choices[0]
+    delta = choice.get("delta") or {}
+    return delta.get("content") or choice.get("text") or ""
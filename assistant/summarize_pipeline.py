@@ -0,0 +1,122 @@
+# summarize_pipeline.py - Concurrent fetch-and-summarize pipeline for web research
+
+import os
+import time
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+
+class SummarizePipeline:
+    """
+    Bounded-concurrency fetch -> summarize pipeline
+
+    Page fetches run in parallel on one pool; each page is handed to the
+    summary pool as soon as its text is ready, so LLM calls overlap with
+    the remaining downloads. Results are yielded in completion order.
+
+    Concurrency limits:
+    - fetch_concurrency: parallel page downloads (PIPELINE_FETCH_CONCURRENCY)
+    - summary_concurrency: parallel LLM calls, keep this within the
+      provider's rate limit (PIPELINE_SUMMARY_CONCURRENCY)
+    - max_concurrency: total in-flight work across both stages
+      (PIPELINE_MAX_CONCURRENCY)
+    """
+
+    def __init__(self, fetch, summarize=None, fetch_concurrency=None, summary_concurrency=None, max_concurrency=None):
+        """
+        Args:
+            fetch: Callable(url) -> dict like JarvisAI.fetch_web_content
+            summarize: Default Callable(result) -> str summary for a fetched result
+        """
+        self.fetch = fetch
+        self.summarize = summarize
+        self.fetch_concurrency = fetch_concurrency or int(os.environ.get("PIPELINE_FETCH_CONCURRENCY", "4"))
+        self.summary_concurrency = summary_concurrency or int(os.environ.get("PIPELINE_SUMMARY_CONCURRENCY", "2"))
+        self.max_concurrency = max_concurrency or int(os.environ.get("PIPELINE_MAX_CONCURRENCY", "4"))
+
+        self._slots = threading.BoundedSemaphore(self.max_concurrency)
+        self._fetch_executor = None
+        self._summary_executor = None
+        self._lock = threading.Lock()
+
+    def _get_executors(self):
+        """Lazily create the stage pools (reused across runs)"""
+        with self._lock:
+            if self._fetch_executor is None:
+                self._fetch_executor = ThreadPoolExecutor(
+                    max_workers=self.fetch_concurrency, thread_name_prefix="jarvis-fetch"
+                )
+                self._summary_executor = ThreadPoolExecutor(
+                    max_workers=self.summary_concurrency, thread_name_prefix="jarvis-summary"
+                )
+        return self._fetch_executor, self._summary_executor
+
+    def run(self, results, summarize=None):
+        """
+        Fetch and summarize search results concurrently
+
+        Args:
+            results: Search results, each with a "link"
+            summarize: Optional summarizer for this run (overrides the default)
+
+        Yields:
+            dict: Each result with content, summary, its original "rank" and
+                per-stage "timings" (queued, fetch, summarize, total seconds),
+                in completion order
+        """
+        fetch_executor, summary_executor = self._get_executors()
+        summarize = summarize or self.summarize
+        completed = queue.Queue()
+        start_time = time.time()
+
+        def summarize_stage(result, timings):
+            with self._slots:
+                stage_start = time.time()
+                try:
+                    result["summary"] = summarize(result)
+                except Exception as e:
+                    result["summary"] = f"Error generating text: {str(e)}"
+                timings["summarize"] = round(time.time() - stage_start, 3)
+            timings["total"] = round(time.time() - start_time, 3)
+            completed.put(result)
+
+        def fetch_stage(result):
+            timings = result["timings"]
+            with self._slots:
+                stage_start = time.time()
+                timings["queued"] = round(stage_start - start_time, 3)
+                try:
+                    content_result = self.fetch(result.get("link", ""))
+                except Exception as e:
+                    content_result = {"success": False, "error": f"Error fetching web content: {str(e)}"}
+                timings["fetch"] = round(time.time() - stage_start, 3)
+
+            if not content_result.get("success", False):
+                result["error"] = content_result.get("error")
+                timings["total"] = round(time.time() - start_time, 3)
+                completed.put(result)
+                return
+
+            result["content"] = content_result.get("content", "")
+            result["content_length"] = content_result.get("content_length", 0)
+            summary_executor.submit(summarize_stage, result, timings)
+
+        pending = 0
+        for rank, result in enumerate(results):
+            result = dict(result, rank=rank, timings={})
+            fetch_executor.submit(fetch_stage, result)
+            pending += 1
+
+        while pending:
+            yield completed.get()
+            pending -= 1
+
+    def shutdown(self):
+        """Stop the stage pools"""
+        with self._lock:
+            for executor in (self._fetch_executor, self._summary_executor):
+                if executor is not None:
+                    executor.shutdown(wait=False)
+            self._fetch_executor = None
+            self._summary_executor = None
@@ -0,0 +1,271 @@
+# telemetry.py - Per-model rolling latency, throughput and token telemetry
+
+import os
+import json
+import math
+import time
+import tempfile
+import threading
+from collections import deque
+
+from .persistence import get_persistence_worker
+
+
+# Histogram bucket upper bounds in seconds (last bucket is open-ended)
+LATENCY_BUCKETS = [0.25, 0.5, 1.0, 2.0, 4.0, 8.0, 16.0, 32.0]
+
+
+def extract_usage(response_json):
+    """
+    Read token usage from a provider response
+
+    Handles OpenAI-compatible "usage" and Gemini "usageMetadata" blocks.
+
+    Returns:
+        tuple: (prompt_tokens, completion_tokens) - None where not reported
+    """
+    if not isinstance(response_json, dict):
+        return None, None
+
+    usage = response_json.get("usage")
+    if isinstance(usage, dict):
+        return usage.get("prompt_tokens"), usage.get("completion_tokens")
+
+    usage = response_json.get("usageMetadata")
+    if isinstance(usage, dict):
+        return usage.get("promptTokenCount"), usage.get("candidatesTokenCount")
+
+    return None, None
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, max(0, math.ceil(pct / 100.0 * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+def summarize(values, buckets=None):
+    """Count, average, p50/p90/p99 and optional bucket histogram of a sample list"""
+    values = [v for v in values if v is not None]
+    if not values:
+        return {"count": 0}
+    ordered = sorted(values)
+    summary = {
+        "count": len(ordered),
+        "avg": round(sum(ordered) / len(ordered), 3),
+        "p50": round(percentile(ordered, 50), 3),
+        "p90": round(percentile(ordered, 90), 3),
+        "p99": round(percentile(ordered, 99), 3),
+        "max": round(ordered[-1], 3)
+    }
+    if buckets:
+        histogram = {}
+        lower = 0.0
+        for upper in buckets:
+            histogram[f"<{upper}s"] = sum(1 for v in ordered if lower <= v < upper)
+            lower = upper
+        histogram[f">={buckets[-1]}s"] = sum(1 for v in ordered if v >= buckets[-1])
+        summary["histogram"] = histogram
+    return summary
+
+
+class ModelTelemetry:
+    """Rolling window of call samples for one model"""
+
+    def __init__(self, model_name, provider, window):
+        self.model_name = model_name
+        self.provider = provider
+        self.samples = deque(maxlen=window)
+        self.total_calls = 0
+        self.total_errors = 0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.last_call = None
+
+    def to_dict(self):
+        return {
+            "provider": self.provider,
+            "samples": list(self.samples),
+            "total_calls": self.total_calls,
+            "total_errors": self.total_errors,
+            "prompt_tokens": self.prompt_tokens,
+            "completion_tokens": self.completion_tokens,
+            "last_call": self.last_call
+        }
+
+    @classmethod
+    def from_dict(cls, model_name, data, window):
+        telemetry = cls(model_name, data.get("provider"), window)
+        telemetry.samples.extend(data.get("samples", []))
+        telemetry.total_calls = data.get("total_calls", len(telemetry.samples))
+        telemetry.total_errors = data.get("total_errors", 0)
+        telemetry.prompt_tokens = data.get("prompt_tokens", 0)
+        telemetry.completion_tokens = data.get("completion_tokens", 0)
+        telemetry.last_call = data.get("last_call")
+        return telemetry
+
+    def add(self, sample):
+        self.samples.append(sample)
+        self.total_calls += 1
+        self.last_call = sample["time"]
+        if sample["error"]:
+            self.total_errors += 1
+        else:
+            self.prompt_tokens += sample["prompt_tokens"] or 0
+            self.completion_tokens += sample["completion_tokens"] or 0
+
+    def get_stats(self):
+        ok = [s for s in self.samples if not s["error"]]
+        errors = {}
+        for sample in self.samples:
+            if sample["error"]:
+                errors[sample["error"]] = errors.get(sample["error"], 0) + 1
+
+        return {
+            "provider": self.provider,
+            "calls": self.total_calls,
+            "errors": self.total_errors,
+            "window": len(self.samples),
+            "error_rate": round(1 - len(ok) / len(self.samples), 3) if self.samples else 0.0,
+            "error_classes": errors,
+            "ttfb": summarize([s["ttfb"] for s in ok], LATENCY_BUCKETS),
+            "latency": summarize([s["latency"] for s in ok], LATENCY_BUCKETS),
+            "tokens_per_sec": summarize([s["tokens_per_sec"] for s in ok]),
+            "prompt_tokens": self.prompt_tokens,
+            "completion_tokens": self.completion_tokens,
+            "estimated_tokens": sum(1 for s in ok if s["estimated"]),
+            "last_call": self.last_call
+        }
+
+
+class TelemetryRecorder:
+    """
+    Records every provider call per model
+
+    Each call stores time-to-first-byte, total latency, prompt/completion
+    tokens (from the provider's usage block, estimated otherwise), tokens
+    per second and the error class. Summaries and histograms cover the
+    last TELEMETRY_WINDOW calls per model.
+
+    With a path the windows are saved (at most every TELEMETRY_SAVE_INTERVAL
+    seconds, on the persistence worker rather than the calling thread) and
+    reloaded on start, so model rankings survive restarts.
+    """
+
+    def __init__(self, window=None, path=None, save_interval=None):
+        self.window = window or int(os.environ.get("TELEMETRY_WINDOW", "200"))
+        self.path = path
+        self.save_interval = save_interval if save_interval is not None else float(
+            os.environ.get("TELEMETRY_SAVE_INTERVAL", "30")
+        )
+        self.models = {}
+        self.last_save = 0.0
+        self._lock = threading.Lock()
+        self._load()
+
+    def _load(self):
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            self.models = {name: ModelTelemetry.from_dict(name, values, self.window)
+                           for name, values in data.items()}
+        except Exception as e:
+            print(f"Error loading model telemetry: {str(e)}")
+            self.models = {}
+
+    def save(self):
+        """Write the per-model windows to disk"""
+        if not self.path:
+            return
+        with self._lock:
+            data = {name: telemetry.to_dict() for name, telemetry in self.models.items()}
+            self.last_save = time.time()
+        try:
+            directory = os.path.dirname(self.path) or "."
+            os.makedirs(directory, exist_ok=True)
+            # Unique temp file per write, so overlapping saves never share one
+            fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".model_telemetry.", suffix=".tmp")
+            try:
+                with os.fdopen(fd, "w", encoding="utf-8") as f:
+                    json.dump(data, f)
+                os.replace(tmp_path, self.path)
+            except BaseException:
+                os.unlink(tmp_path)
+                raise
+        except Exception as e:
+            print(f"Error saving model telemetry: {str(e)}")
+
+    def record(self, model_name, provider, latency, ttfb=None, prompt_tokens=None, completion_tokens=None,
+               error=None, estimated=False, streamed=False):
+        """
+        Record one provider call
+
+        Args:
+            model_name: Model the call went to
+            provider: Provider name
+            latency: Total seconds from send to last byte
+            ttfb: Seconds until response headers arrived
+            prompt_tokens: Prompt token count
+            completion_tokens: Completion token count
+            error: Error class name (None on success)
+            estimated: True if token counts were estimated locally
+            streamed: True for SSE streaming calls
+        """
+        # Streams send headers before generating; buffered replies only arrive when done
+        generation_time = latency - (ttfb or 0.0) if streamed else latency
+        tokens_per_sec = None
+        if not error and completion_tokens and generation_time > 0:
+            tokens_per_sec = round(completion_tokens / generation_time, 1)
+
+        sample = {
+            "time": time.time(),
+            "ttfb": ttfb,
+            "latency": latency,
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "tokens_per_sec": tokens_per_sec,
+            "error": error,
+            "estimated": estimated,
+            "streamed": streamed
+        }
+
+        with self._lock:
+            telemetry = self.models.get(model_name)
+            if telemetry is None:
+                telemetry = self.models[model_name] = ModelTelemetry(model_name, provider, self.window)
+            telemetry.add(sample)
+            due = self.path and sample["time"] - self.last_save >= self.save_interval
+            if due:
+                self.last_save = sample["time"]
+
+        if due:
+            get_persistence_worker().schedule(self.save)
+
+    def get_stats(self, model_name=None):
+        """
+        Get per-model telemetry summaries
+
+        Args:
+            model_name: Only this model (returns its summary or None)
+
+        Returns:
+            dict: model name -> summary, fastest (by p50 latency) first
+        """
+        with self._lock:
+            if model_name is not None:
+                telemetry = self.models.get(model_name)
+                return telemetry.get_stats() if telemetry else None
+            stats = {name: telemetry.get_stats() for name, telemetry in self.models.items()}
+
+        return dict(sorted(stats.items(), key=lambda item: item[1]["latency"].get("p50", float("inf"))))
+
+    def reset(self):
+        """Drop all recorded samples"""
+        with self._lock:
+            self.models = {}
+        if self.path:
+            get_persistence_worker().schedule(self.save)
@@ -16,6 +16,8 @@ import os
 import asyncio
 import json
 
+from .memory_governor import get_memory_governor, PRIORITY_SPEECH_MODEL
+
 # Free libraries for voice processing
 try:
     import whisper
@@ -111,14 +113,40 @@ class FreeSpeechProcessor:
         self.current_personality = 'standard'
         
         # Initialize Whisper model if available
-        if WHISPER_AVAILABLE:
-            try:
-                print("🧠 Loading Whisper model (this may take a moment)...")
-                self.whisper_model = whisper.load_model("base")
-                print("✅ Whisper model loaded successfully")
-            except Exception as e:
-                print(f"❌ Error loading Whisper model: {e}")
-                self.whisper_model = None
+        self._load_whisper_model()
+        
+        # Reported but outside the cache budget - only real RSS pressure unloads it (reloading takes seconds)
+        get_memory_governor().register(
+            "speech_model", self._whisper_model_bytes, self._unload_whisper_model, PRIORITY_SPEECH_MODEL,
+            pressure_only=True, owner=self
+        )
+    
+    def _load_whisper_model(self):
+        """Load the Whisper model if available"""
+        if not WHISPER_AVAILABLE:
+            return
+        try:
+            print("🧠 Loading Whisper model (this may take a moment)...")
+            self.whisper_model = whisper.load_model("base")
+            print("✅ Whisper model loaded successfully")
+        except Exception as e:
+            print(f"❌ Error loading Whisper model: {e}")
+            self.whisper_model = None
+    
+    def _whisper_model_bytes(self):
+        """Bytes held by the loaded model's parameters and buffers"""
+        if self.whisper_model is None:
+            return 0
+        tensors = list(self.whisper_model.parameters()) + list(self.whisper_model.buffers())
+        return sum(t.numel() * t.element_size() for t in tensors)
+    
+    def _unload_whisper_model(self, nbytes):
+        """Drop the model (memory governor eviction) - returns bytes released"""
+        freed = self._whisper_model_bytes()
+        if freed:
+            self.whisper_model = None
+            print("⚠️ Memory pressure - Whisper model unloaded until next use")
+        return freed
     
     def _setup_personality_voices(self):
         """Map JARVIS personalities to free Edge TTS voices"""
@@ -132,6 +160,8 @@ class FreeSpeechProcessor:
     
     def speech_to_text(self, audio_file_path):
         """Convert speech to text using free Whisper"""
+        if not self.whisper_model:
+            self._load_whisper_model()
         if not self.whisper_model:
             return {"success": False, "error": "Whisper model not available"}
         
@@ -597,13 +597,9 @@ class EnhancedVoiceEngine:
             # Get appropriate personality based on user emotion
             personality = self.get_personality_for_emotion(self.user_emotion)
             
-            # Add context about current conversation
-            context = ""
-            if len(self.conversation_buffer) > 0:
-                context = "Previous conversation: " + " ".join(self.conversation_buffer[-3:])
-            
-            # Get AI response
-            ai_response = self.ai.chat(command, context=context)
+            # Get AI response without freezing the audio loop
+            # (recent turns are already sent from the engine's conversation history)
+            ai_response = await self.ai.achat(command)
             
             # Store in conversation buffer
             self.conversation_buffer.append(command)
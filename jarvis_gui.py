@@ -14,7 +14,8 @@ from datetime import datetime
 # Add the project path for imports
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
-from assistant.ai_engine import JarvisAI
+from assistant.ai_engine import JarvisAI, CANCELLED_RESPONSE
+from assistant.connection_pool import CancelToken
 
 class JarvisGUI:
     def __init__(self):
@@ -25,6 +26,7 @@ class JarvisGUI:
         # GUI State
         self.is_processing = False
         self.voice_enabled = False
+        self.cancel_token = None
         
         self.setup_window()
         self.create_widgets()
@@ -237,6 +239,14 @@ class JarvisGUI:
                                      command=self.send_message)
         self.send_button.pack(fill=tk.X, pady=(0, 2))
         
+        # Stop button - abandons the reply being generated
+        self.stop_button = ttk.Button(button_frame,
+                                     text="Stop",
+                                     style='Jarvis.TButton',
+                                     command=self.stop_generation,
+                                     state=tk.DISABLED)
+        self.stop_button.pack(fill=tk.X, pady=(0, 2))
+        
         # Clear button
         clear_button = ttk.Button(button_frame,
                                  text="Clear",
@@ -371,6 +381,9 @@ class JarvisGUI:
         self.input_field.bind('<Return>', self.on_enter_key)
         self.input_field.bind('<Control-Return>', self.insert_newline)
         
+        # Escape stops the reply being generated
+        self.root.bind('<Escape>', lambda event: self.stop_generation())
+        
         # Focus on input field by default
         self.input_field.focus_set()
         
@@ -428,15 +441,23 @@ class JarvisGUI:
         
         # Process message in background thread
         self.is_processing = True
+        self.cancel_token = CancelToken()
         self.update_status("Processing...")
         self.send_button.configure(state=tk.DISABLED)
+        self.stop_button.configure(state=tk.NORMAL)
         
         # Start processing thread
-        thread = threading.Thread(target=self.process_message, args=(user_message,))
+        thread = threading.Thread(target=self.process_message, args=(user_message, self.cancel_token))
         thread.daemon = True
         thread.start()
         
-    def process_message(self, message):
+    def stop_generation(self):
+        """Abort the reply in progress - closes its connection, history stays unchanged"""
+        if self.is_processing and self.cancel_token:
+            self.cancel_token.cancel()
+            self.update_status("Stopping...")
+            
+    def process_message(self, message, cancel_token=None):
         """Process user message in background thread"""
         try:
             # Check if it's a command or chat
@@ -444,10 +465,13 @@ class JarvisGUI:
                 response = self.handle_command(message)
             else:
                 # Regular AI chat
-                response = self.ai.chat(message)
+                response = self.ai.chat(message, cancel_token=cancel_token)
                 
-            # Send response back to main thread
-            self.message_queue.put(('response', response))
+            # Send response back to main thread - a reply that finished before Stop was committed, so show it
+            if response == CANCELLED_RESPONSE:
+                self.message_queue.put(('cancelled', "⏹️ Generation stopped"))
+            else:
+                self.message_queue.put(('response', response))
             
         except Exception as e:
             self.message_queue.put(('error', f"Error processing message: {str(e)}"))
@@ -491,10 +515,14 @@ class JarvisGUI:
                         self.add_chat_message("JARVIS", data)
                     elif msg_type == 'error':
                         self.add_chat_message("SYSTEM", data, "error")
+                    elif msg_type == 'cancelled':
+                        self.add_chat_message("SYSTEM", data)
                     elif msg_type == 'done':
                         self.is_processing = False
+                        self.cancel_token = None
                         self.update_status("Ready")
                         self.send_button.configure(state=tk.NORMAL)
+                        self.stop_button.configure(state=tk.DISABLED)
                         
             except queue.Empty:
                 pass
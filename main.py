@@ -369,6 +369,8 @@ class JarvisXOrchestrator:
             if module_info.last_error:
                 print(f"   └─ Error: {module_info.last_error}")
         
+        self.show_provider_health()
+        
         print("="*50)
         print("  - 'search web <query>' - Search the internet")
         print("  - 'research <topic>' - Comprehensive research")
@@ -513,6 +515,93 @@ class JarvisXOrchestrator:
             print("🎭 Automatic personality switching: OFF")
             print("💡 Personality will remain fixed until manually changed.")
     
+    def toggle_hedging(self):
+        """Toggle hedged requests across providers"""
+        if not hasattr(self.ai, 'toggle_hedging'):
+            print("⚠️ Hedged requests not supported by this AI engine")
+            return
+        if self.ai.toggle_hedging():
+            print("⚡ Hedged requests: ON")
+            print("💡 Slow replies will be raced against an equivalent model on another provider.")
+        else:
+            print("⚡ Hedged requests: OFF")
+    
+    def show_hedging_stats(self):
+        """Show hedge rate and win statistics"""
+        if not hasattr(self.ai, 'get_hedging_stats'):
+            print("⚠️ Hedged requests not supported by this AI engine")
+            return
+        stats = self.ai.get_hedging_stats()
+        print(f"\n⚡ Hedging: {'ON' if stats['enabled'] else 'OFF'}")
+        print(f"  Requests: {stats['requests']} | Hedges fired: {stats['hedges_fired']} ({stats['hedge_rate']:.0%})")
+        print(f"  Primary wins: {stats['primary_wins']} | Hedge wins: {stats['hedge_wins']} | All failed: {stats['all_failed']}")
+        for model, delay in stats['delays'].items():
+            print(f"  ⏱️ {model}: hedge after {delay}s")
+    
+    def show_model_stats(self):
+        """Show rolling per-model latency, throughput and token telemetry"""
+        if not hasattr(self.ai, 'get_model_stats'):
+            print("⚠️ Model telemetry not supported by this AI engine")
+            return
+        stats = self.ai.get_model_stats()
+        print("\n📈 Model Telemetry (fastest first):")
+        selection = self.ai.explain_model_choice() if hasattr(self.ai, 'explain_model_choice') else None
+        if selection:
+            print(f"  🧭 Last auto-selection: {selection['model']} - {selection['reason']}")
+        if not stats:
+            print("  No provider calls yet")
+            return
+        for name, model in stats.items():
+            latency = model['latency']
+            ttfb = model['ttfb']
+            speed = model['tokens_per_sec']
+            print(f"  🤖 {name} ({model['provider']}): {model['calls']} calls | errors {model['error_rate']:.0%}")
+            if latency['count']:
+                print(f"     latency p50 {latency['p50']}s / p90 {latency['p90']}s / p99 {latency['p99']}s")
+            if ttfb['count']:
+                print(f"     first byte p50 {ttfb['p50']}s / p90 {ttfb['p90']}s")
+            if speed['count']:
+                print(f"     throughput ~{speed['p50']} tok/s")
+            print(f"     tokens: {model['prompt_tokens']} prompt / {model['completion_tokens']} completion"
+                  f"{' (partly estimated)' if model['estimated_tokens'] else ''}")
+            if model['error_classes']:
+                errors = ", ".join(f"{error} x{count}" for error, count in model['error_classes'].items())
+                print(f"     errors: {errors}")
+    
+    def show_provider_health(self):
+        """Show circuit breaker state for AI providers and models"""
+        if not hasattr(self.ai, 'get_provider_health'):
+            return
+        health = self.ai.get_provider_health()
+        state_icons = {"closed": "🟢", "half_open": "🟡", "open": "🔴"}
+        print(f"\n🩺 Provider Health (failovers: {health['failovers']}):")
+        print(f"  Fallback chain: {' → '.join(health['fallback_chain'])}")
+        if not health['breakers']:
+            print("  No provider calls yet")
+        for name, breaker in health['breakers'].items():
+            latency = f"{breaker['latency_ewma']}s" if breaker['latency_ewma'] is not None else "n/a"
+            line = (f"  {state_icons.get(breaker['state'], '❓')} {name}: {breaker['state']} | "
+                    f"errors {breaker['error_rate']:.0%} | latency {latency}")
+            if breaker.get('retry_in') is not None:
+                line += f" | retry in {breaker['retry_in']}s"
+            if breaker['last_error']:
+                line += f" | last error: {breaker['last_error']}"
+            print(line)
+        
+        if hasattr(self.ai, 'get_scheduler_stats'):
+            scheduler = self.ai.get_scheduler_stats()
+            print(f"\n🚦 Rate Limits (queue {scheduler['queue_depth']}/{scheduler['max_queue']}):")
+            for lane, stats in scheduler['lanes'].items():
+                print(f"  {lane}: {stats['requests']} sent | {stats['rejected']} rejected | "
+                      f"avg wait {stats['avg_wait']}s | max wait {stats['max_wait']}s")
+            for name, bucket in scheduler['buckets'].items():
+                if bucket['rpm'] is None:
+                    continue
+                line = f"  {name}: {bucket['rpm']} rpm ({'learned' if bucket['learned'] else 'configured'})"
+                if bucket['paused_for']:
+                    line += f" | paused {bucket['paused_for']}s"
+                print(line)
+
     def chat_loop(self):
         while self.running:
             try:
@@ -523,6 +612,8 @@ class JarvisXOrchestrator:
                     
                 if user_input.lower() in ['exit', 'quit']:
                     print("👋 Goodbye, boss! Jarvis-X shutting down...")
+                    if hasattr(self.ai, 'flush_persistence'):
+                        self.ai.flush_persistence()
                     self.running = False
                 elif user_input.lower() == 'clear':
                     os.system('clear' if os.name == 'posix' else 'cls')
@@ -538,6 +629,73 @@ class JarvisXOrchestrator:
                     print(f"📊 {self.ai.get_conversation_summary()}")
                     print(f"\n🕐 Recent Context:")
                     print(self.ai.get_recent_context(3))
+                    if hasattr(self.ai, 'get_connection_stats'):
+                        pool_stats = self.ai.get_connection_stats()
+                        print(f"\n🔌 Connection Pools: {pool_stats['total_hits']} reused / "
+                              f"{pool_stats['total_misses']} new (hit rate {pool_stats['hit_rate']:.0%})")
+                    if hasattr(self.ai, 'get_warmup_stats'):
+                        warm_stats = self.ai.get_warmup_stats()
+                        first = warm_stats['first_request']
+                        describe = lambda s: f"{s['count']} @ {s['avg_latency']}s" if s['count'] else "none"
+                        print(f"🔥 Pre-warming: {warm_stats['warmups']} warm-ups, {warm_stats['pings']} keep-alive pings | "
+                              f"first request cold {describe(first['cold'])}, warm {describe(first['warm'])}")
+                    if hasattr(self.ai, 'get_journal_stats'):
+                        journal = self.ai.get_journal_stats()
+                        print(f"📝 History Journal: {journal['live_records']} messages ({journal.get('loaded', journal['live_records'])} loaded), {journal['bytes'] / 1024:.0f} KB "
+                              f"(fsync {journal['fsync']}, {journal['compactions']} compactions)")
+                    if hasattr(self.ai, 'get_persistence_stats'):
+                        persist = self.ai.get_persistence_stats()
+                        latency = f"{persist['avg_flush_ms']} ms avg / {persist['max_flush_ms']} ms max" if persist['batches'] else "no flushes yet"
+                        print(f"💽 Write-Behind: {persist['queue_depth']} pending, {persist['tasks_run']} saves in "
+                              f"{persist['batches']} batches ({persist['coalesced']} coalesced) | {latency}")
+                    if hasattr(self.ai, 'get_memory_budget'):
+                        budget = self.ai.get_memory_budget()
+                        pools = ", ".join(f"{name} {pool['bytes'] / 1024:.0f} KB" + (" (outside budget)" if pool.get('pressure_only') else "")
+                                          for name, pool in budget['pools'].items())
+                        print(f"🧠 Memory Budget: {budget['total'] / 1024 / 1024:.1f}/{budget['budget'] / 1024 / 1024:.0f} MB "
+                              f"({pools}) | GC runs {budget['gc_runs']}, {budget['frozen_objects']} objects frozen")
+                    if hasattr(self.ai, 'get_cache_stats'):
+                        cache_stats = self.ai.get_cache_stats()
+                        print(f"🗃️ Response Cache: {cache_stats['size']}/{cache_stats['maxsize']} entries | "
+                              f"{cache_stats['hits']} hits / {cache_stats['misses']} misses "
+                              f"(hit rate {cache_stats['hit_rate']:.0%}), {cache_stats['evictions']} evicted, "
+                              f"{cache_stats['expirations']} expired")
+                        if cache_stats.get('skipped'):
+                            skipped = ", ".join(f"{count} {rule}" for rule, count in cache_stats['skipped'].items())
+                            print(f"   Not cached: {skipped}")
+                        disk = cache_stats.get('disk')
+                        if disk and 'entries' in disk:
+                            print(f"💾 Disk Cache: {disk['entries']} entries, {disk['bytes'] / 1024:.0f}/"
+                                  f"{disk['max_bytes'] / 1024:.0f} KB | {disk['hits']} hits / {disk['misses']} misses, "
+                                  f"{disk['evictions']} evicted")
+                        semantic = cache_stats.get('semantic')
+                        if semantic:
+                            print(f"🧠 Semantic Cache: {semantic['size']}/{semantic['maxsize']} prompts | "
+                                  f"{semantic['hits']} hits / {semantic['misses']} misses "
+                                  f"({semantic['near_misses']} near misses), threshold {semantic['threshold']}, "
+                                  f"avg hit similarity {semantic['avg_hit_similarity']}, "
+                                  f"lookup {semantic['avg_lookup_ms']}ms")
+                    if hasattr(self.ai, 'get_coalescing_stats'):
+                        flight_stats = self.ai.get_coalescing_stats()
+                        print(f"🔗 Coalesced Requests: {flight_stats['coalesced']} duplicates served by "
+                              f"{flight_stats['leaders']} provider calls")
+                    if hasattr(self.ai, 'get_context_stats') and self.ai.get_context_stats():
+                        context = self.ai.get_context_stats()
+                        print(f"🧮 Last Request Context: ~{context['prompt_tokens']}/{context['budget']} tokens "
+                              f"({context['history_messages']} history messages, {context['trimmed']} trimmed, "
+                              f"{context['dropped']} left out)")
+                    if hasattr(self.ai, 'get_schema_stats') and self.ai.get_schema_stats()['schemas']:
+                        schema_stats = self.ai.get_schema_stats()
+                        print(f"🧬 Learned Response Schemas: {len(schema_stats['schemas'])} | "
+                              f"{schema_stats['hits']} hits / {schema_stats['misses']} misses")
+                elif user_input.lower() == 'hedge':
+                    self.toggle_hedging()
+                elif user_input.lower() == 'hedge stats':
+                    self.show_hedging_stats()
+                elif user_input.lower() == 'health':
+                    self.show_provider_health()
+                elif user_input.lower() == 'stats':
+                    self.show_model_stats()
                 elif user_input.lower() == 'clear memory':
                     result = self.ai.clear_conversation_history()
                     print(f"🧹 {result}")
@@ -545,7 +703,7 @@ class JarvisXOrchestrator:
                     self.show_identity_menu()
                 elif user_input.lower() == 'insights':
                     self.show_conversation_insights()
-                elif user_input.lower().startswith('search '):
+                elif user_input.lower().startswith('search ') and not user_input.lower().startswith('search web '):
                     query = user_input[len('search '):].strip()
                     self.search_conversations(query)
                 elif user_input.lower() == 'suggestions':
@@ -595,14 +753,36 @@ class JarvisXOrchestrator:
                     old_personality = self.ai.get_current_personality()
                     
                     print("🤖 JARVIS: ", end="", flush=True)
-                    response = self.ai.chat(user_input)
-                    
+                    if hasattr(self.ai, 'chat_stream'):
+                        # Print tokens as they arrive instead of waiting for the full reply
+                        # (with Beast Mode integrated, chat_stream answers from the response cache tiers first)
+                        try:
+                            for chunk in self.ai.chat_stream(user_input):
+                                print(chunk, end="", flush=True)
+                            print()
+                        except KeyboardInterrupt:
+                            # Ctrl-C stops this reply only - the stream is closed and nothing is kept
+                            if hasattr(self.ai, 'cancel_current'):
+                                self.ai.cancel_current()
+                            print("\n⏹️ Generation stopped (press Ctrl-C at the prompt to exit)")
+                            continue
+
+                        # Check if personality auto-switched
+                        new_personality = self.ai.get_current_personality()
+                        if old_personality != new_personality and self.ai.is_auto_personality_enabled():
+                            print(f"🎭 [Auto-switched to {new_personality.title()} mode]")
+                        continue
+
+                    response = self._run_cancellable(lambda: self.ai.chat(user_input))
+                    if response is None:
+                        continue
+
                     # Check if personality auto-switched
                     new_personality = self.ai.get_current_personality()
                     if old_personality != new_personality and self.ai.is_auto_personality_enabled():
                         print(f"\n🎭 [Auto-switched to {new_personality.title()} mode]")
                         print("🤖 JARVIS: ", end="", flush=True)
-                    
+
                     print(response)
                     
             except KeyboardInterrupt:
@@ -611,6 +791,37 @@ class JarvisXOrchestrator:
             except Exception as e:
                 print(f"❌ Error: {str(e)}")
     
+    def _run_cancellable(self, call):
+        """
+        Run a blocking AI call on a worker thread so Ctrl-C aborts just that call
+        
+        Returns:
+            The call's result, or None if it was cancelled
+        """
+        result = {}
+        
+        def run():
+            try:
+                result["value"] = call()
+            except Exception as e:
+                result["error"] = e
+        
+        worker = threading.Thread(target=run, daemon=True)
+        worker.start()
+        try:
+            while worker.is_alive():
+                worker.join(0.1)
+        except KeyboardInterrupt:
+            if hasattr(self.ai, 'cancel_current'):
+                self.ai.cancel_current()
+                # The cancelled call closes its connection and returns promptly
+                worker.join(5)
+            print("\n⏹️ Generation stopped (press Ctrl-C at the prompt to exit)")
+            return None
+        if "error" in result:
+            raise result["error"]
+        return result.get("value")
+    
     def print_header(self):
         """Print the JARVIS-X header"""
         print(f"""
@@ -633,10 +844,13 @@ class JarvisXOrchestrator:
         print("  - 'models' - Switch AI models")
         print("  - 'personality' - Switch personality modes")
         print("  - 'auto' - Toggle auto personality switching")
+        print("  - 'hedge' / 'hedge stats' - Toggle hedged requests / view hedge statistics")
+        print("  - 'health' - View provider circuit breakers and failover chain")
+        print("  - 'stats' - View per-model latency, throughput and token telemetry")
         print("  - 'memory' - View conversation memory")
         print("  - 'insights' - View conversation insights")
         print("  - 'suggestions' - Get smart suggestions")
-        print("  - 'search <query>' - Search conversation history")
+        print("  - 'search <query>' - Search conversation history (\"phrase\", prefix*, role:user, after:YYYY-MM-DD, page:2)")
         print("  📁 FILE OPERATIONS:")
         print("  - 'create project <name> [type]' - Create new project")
         print("  - 'create file <path>' - Create new file")
@@ -681,7 +895,7 @@ class JarvisXOrchestrator:
         print(f"  Title: {master_info['title']}")
         print(f"  Status: {'Established' if master_info['established'] else 'Not Set'}")
         print(f"\n📍 Memory Storage Directory: /workspaces/Jarves/memory/")
-        print("  - conversation_history.json (persistent chat memory)")
+        print("  - conversation_history.jsonl (persistent chat memory journal)")
         print("  - user_preferences.json (master identity & settings)")
         
         print("\n🎯 Master Commands:")
@@ -718,7 +932,7 @@ class JarvisXOrchestrator:
         """Show detailed storage information"""
         print(f"\n💾 DEVIL MIND - Persistent Memory System:")
         print(f"📂 Directory: /workspaces/Jarves/memory/")
-        print(f"🗃️  conversation_history.json - ALL chat messages saved locally")
+        print(f"🗃️  conversation_history.jsonl - ALL chat messages saved locally")
         print(f"⚙️  user_preferences.json - Master identity & AI settings")
         print(f"\n🧠 Memory Features:")
         print(f"  ✓ Every conversation is permanently stored")
@@ -728,7 +942,7 @@ class JarvisXOrchestrator:
         print(f"  ✓ Survives restarts and system reboots")
         
         # Show file sizes if they exist
-        conv_file = "/workspaces/Jarves/memory/conversation_history.json"
+        conv_file = "/workspaces/Jarves/memory/conversation_history.jsonl"
         pref_file = "/workspaces/Jarves/memory/user_preferences.json"
         
         try:
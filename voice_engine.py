@@ -308,52 +308,32 @@ class JarvisVoiceEngine:
                 "status": "Thinking..."
             })
             
-            # Get AI response in background thread
-            def get_ai_response():
-                try:
-                    response = self.ai.chat(command)
-                    self.response_queue.put(("success", response))
-                except Exception as e:
-                    self.response_queue.put(("error", str(e)))
-            
-            # Run in thread to avoid blocking
-            thread = threading.Thread(target=get_ai_response, daemon=True)
-            thread.start()
-            
-            # Wait for response with timeout
-            start_time = datetime.now()
-            while thread.is_alive():
-                if (datetime.now() - start_time).seconds > 10:  # 10 second timeout
-                    self.response_queue.put(("error", "Response timeout"))
-                    break
-                await asyncio.sleep(0.1)
-            
-            # Get response from queue
-            if not self.response_queue.empty():
-                status, response = self.response_queue.get()
+            # Await the AI response without blocking the audio loop
+            response = await self.ai.achat(command, timeout=10)
+            status = "error" if response.startswith("Error") else "success"
+            
+            if status == "success":
+                # Speak the response
+                await self.speak_response(response)
+                
+                # Add to conversation buffer
+                self.conversation_buffer.append({
+                    "user": command,
+                    "jarvis": response,
+                    "timestamp": datetime.now().isoformat()
+                })
+                
+                # Send response data
+                await self.send_data_message({
+                    "type": "ai_response",
+                    "response": response,
+                    "timestamp": datetime.now().isoformat()
+                })
+                
+            else:
+                error_msg = f"I'm sorry, Sir. I encountered an error: {response}"
+                await self.speak_response(error_msg)
                 
-                if status == "success":
-                    # Speak the response
-                    await self.speak_response(response)
-                    
-                    # Add to conversation buffer
-                    self.conversation_buffer.append({
-                        "user": command,
-                        "jarvis": response,
-                        "timestamp": datetime.now().isoformat()
-                    })
-                    
-                    # Send response data
-                    await self.send_data_message({
-                        "type": "ai_response",
-                        "response": response,
-                        "timestamp": datetime.now().isoformat()
-                    })
-                    
-                else:
-                    error_msg = f"I'm sorry, Sir. I encountered an error: {response}"
-                    await self.speak_response(error_msg)
-                    
         except Exception as e:
             error_msg = f"I apologize, Sir. There was a system error: {str(e)}"
             await self.speak_response(error_msg)